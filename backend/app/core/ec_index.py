@@ -0,0 +1,152 @@
+"""
+Inverted index from EC numbers to the rows that cite them.
+
+EC numbers are four-level hierarchical codes (class . subclass .
+sub-subclass . serial), so the index is a trie over the dot-separated
+levels: an exact number is a path to a leaf, and a partial query such as
+``1.1.1.-`` or ``2.7.*`` is the subtree under a prefix. Each leaf holds the
+positions of the rows citing that EC number, so a lookup costs the size of
+its result instead of a regex scan over the whole table.
+
+Patterns accepted by ``parse_ec_pattern``::
+
+    1.1.1.1     exact EC number
+    1.1.1.-     every serial number under sub-subclass 1.1.1
+    2.7.*       ``*`` stands for all remaining levels
+    2           a bare prefix, same as ``2.*``
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+EC_LEVELS = 4
+_LEVEL_RE = re.compile(r"^n?\d+$")
+_WILDCARDS = ("-", "*")
+
+
+def parse_ec_pattern(pattern: str) -> Tuple[Tuple[str, ...], bool]:
+    """
+    Split an EC query into its fixed levels.
+
+    Returns:
+        (fixed levels, exact) — *exact* is True for a full four-level number.
+
+    Raises:
+        ValueError: malformed pattern (non-numeric level, more than four
+            levels, or a fixed level after a wildcard).
+    """
+    parts = pattern.strip().split(".")
+    if not parts or len(parts) > EC_LEVELS:
+        raise ValueError(f"Invalid EC pattern: {pattern!r}")
+
+    fixed: List[str] = []
+    for i, part in enumerate(parts):
+        if part in _WILDCARDS:
+            # Only trailing wildcards: "1.-.1.1" is not a subtree; "*" must end the pattern
+            if any(p not in _WILDCARDS for p in parts[i:]) or (part == "*" and i != len(parts) - 1):
+                raise ValueError(f"Invalid EC pattern: {pattern!r}")
+            return tuple(fixed), False
+        if not _LEVEL_RE.match(part):
+            raise ValueError(f"Invalid EC pattern: {pattern!r}")
+        fixed.append(part)
+    return tuple(fixed), len(fixed) == EC_LEVELS
+
+
+def split_ec_list(value: object) -> List[str]:
+    """EC numbers of a comma-separated cell (NaN / empty -> [])."""
+    if not isinstance(value, str):
+        return []
+    return [ec.strip() for ec in value.split(",") if ec.strip()]
+
+
+class _ECNode:
+    __slots__ = ("children", "rows")
+
+    def __init__(self):
+        self.children: Dict[str, _ECNode] = {}
+        self.rows: List[int] = []
+
+
+class ECIndex:
+    """
+    EC trie with the row positions citing each EC number at its leaf.
+
+    Built once from one EC list per row; rows are plain integer positions
+    (edge indices, ``DataFrame`` row positions, ...), so the same class
+    indexes the edge table and the domain table.
+    """
+
+    def __init__(self):
+        self._root = _ECNode()
+
+    @classmethod
+    def from_lists(cls, ec_lists: Iterable[Iterable[str]]) -> "ECIndex":
+        """Index rows ``0 .. n-1``; row *i* cites the EC numbers of ``ec_lists[i]``."""
+        index = cls()
+        for row, ecs in enumerate(ec_lists):
+            for ec in ecs:
+                index.add(ec, row)
+        return index
+
+    def add(self, ec: str, row: int) -> None:
+        node = self._root
+        for level in ec.split("."):
+            child = node.children.get(level)
+            if child is None:
+                child = node.children[level] = _ECNode()
+            node = child
+        # Rows arrive in increasing order; skip a repeated EC within one row
+        if not node.rows or node.rows[-1] != row:
+            node.rows.append(row)
+
+    def _find(self, levels: Tuple[str, ...]) -> Optional[_ECNode]:
+        node = self._root
+        for level in levels:
+            node = node.children.get(level)
+            if node is None:
+                return None
+        return node
+
+    def _walk(self, node: _ECNode, prefix: Tuple[str, ...]) -> Iterator[Tuple[str, _ECNode]]:
+        """(EC number, node) of every leaf under *node*, in numeric order."""
+        stack = [(prefix, node)]
+        while stack:
+            path, current = stack.pop()
+            if current.rows:
+                yield ".".join(path), current
+            children = sorted(current.children.items(), key=lambda item: _level_key(item[0]), reverse=True)
+            stack.extend((path + (level,), child) for level, child in children)
+
+    def lookup(self, pattern: str) -> np.ndarray:
+        """Sorted positions of the rows citing any EC number matching *pattern*."""
+        levels, exact = parse_ec_pattern(pattern)
+        node = self._find(levels)
+        if node is None:
+            return np.zeros(0, dtype=np.int64)
+        if exact:
+            return np.asarray(node.rows, dtype=np.int64)
+        parts = [np.asarray(leaf.rows, dtype=np.int64) for _, leaf in self._walk(node, levels)]
+        if not parts:
+            return np.zeros(0, dtype=np.int64)
+        return np.unique(np.concatenate(parts))
+
+    def ec_numbers(self, pattern: str) -> List[Tuple[str, int]]:
+        """``(EC number, row count)`` of every indexed EC matching *pattern*, in numeric order."""
+        levels, _ = parse_ec_pattern(pattern)
+        node = self._find(levels)
+        if node is None:
+            return []
+        return [(ec, len(leaf.rows)) for ec, leaf in self._walk(node, levels)]
+
+
+def _level_key(level: str) -> tuple:
+    # Numeric order; preliminary serial numbers ("n1"), then anything else, after
+    if level.isdigit():
+        return (0, int(level))
+    if _LEVEL_RE.match(level):
+        return (1, int(level[1:]))
+    return (2, level)
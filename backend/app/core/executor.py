@@ -0,0 +1,352 @@
+"""
+Execution layer for CPU-bound viewer calls.
+
+The ``MetabolicViewer`` methods are ``async def`` but do purely synchronous
+pandas / graph work, so awaiting them directly blocks the event loop: one
+large ``/api/backtrace/tree`` request stalls every other request on the
+worker, ``/api/health`` included. ``ViewerExecutor.run`` instead hands the
+call to a pool and awaits the result, with a per-request timeout and
+cancellation when the client goes away.
+
+Configured with environment variables:
+
+  NEBULA_EXECUTOR          "thread" (default), "process" or "inline"
+  NEBULA_EXECUTOR_WORKERS  pool size (default: min(4, CPU count))
+  NEBULA_REQUEST_TIMEOUT   seconds before a call fails with TimeoutError
+                           (default 120; 0 disables)
+
+Thread workers share the server's viewer; NumPy and pandas release the GIL
+for part of the work only, so threads mainly keep the loop responsive.
+Process workers are forked once the viewer is loaded and inherit it
+read-only (the snapshot's mmap pages stay shared), which gives real
+parallelism; anything a call caches or mutates on the viewer then stays in
+that worker (so /api/cache/stats cannot report the tree and solution
+caches). "inline" runs calls on the loop, as before.
+
+A call that has not started yet is dropped on timeout or disconnect. One
+already running is stopped:
+
+  thread   the call runs under a cancellation flag (``app.utils.cancellation``)
+           that is set when it is abandoned; the AND-OR expansion and the
+           solution ranking check it and unwind with ``CallCancelled``.
+           Code without a check point (pandas work, serialization) runs to
+           its next one.
+  process  the worker running the call is killed and the pool is forked
+           anew. The other calls the old pool held are submitted again,
+           so they only lose the work done so far.
+"""
+
+import asyncio
+import concurrent.futures
+import inspect
+import logging
+import itertools
+import multiprocessing
+import os
+import signal
+import threading
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+
+from app.utils.cancellation import cancel_scope
+
+logger = logging.getLogger(__name__)
+
+EXECUTOR_KINDS = ("thread", "process", "inline")
+
+# The viewer a forked process worker calls into (inherited from the parent)
+_worker_viewer: Any = None
+# Shared with the process workers: each takes a slot on start and keeps its
+# pid and the id of the call it is running (0: idle) there
+_worker_slots: Any = None
+_worker_pids: Any = None
+_worker_calls: Any = None
+_worker_slot = -1
+
+
+class ClientDisconnected(Exception):
+    """The client closed the connection before the call finished."""
+
+
+def _init_worker() -> None:
+    """Process worker initializer: claim a slot in the shared tables."""
+    global _worker_slot
+    with _worker_slots.get_lock():
+        _worker_slot = _worker_slots.value
+        _worker_slots.value += 1
+    _worker_pids[_worker_slot] = os.getpid()
+
+
+def _call_viewer(call_id: int, method: str, args: tuple, kwargs: dict) -> Any:
+    """Run ``viewer.<method>(*args, **kwargs)`` to completion in a worker."""
+    _worker_calls[_worker_slot] = call_id
+    try:
+        result = getattr(_worker_viewer, method)(*args, **kwargs)
+        if inspect.iscoroutine(result):
+            # The viewer's coroutines never await anything: drive to completion here
+            result = asyncio.run(result)
+        return result
+    finally:
+        _worker_calls[_worker_slot] = 0
+
+
+def _collect_viewer(call_id: int, method: str, args: tuple, kwargs: dict) -> list:
+    """Run the generator ``viewer.<method>(*args, **kwargs)`` to the end in a worker."""
+    _worker_calls[_worker_slot] = call_id
+    try:
+        return list(getattr(_worker_viewer, method)(*args, **kwargs))
+    finally:
+        _worker_calls[_worker_slot] = 0
+
+
+def _noop() -> None:
+    return None
+
+
+class ViewerExecutor:
+    """
+    Runs viewer methods in a thread or process pool.
+
+    Args:
+        viewer: The ``MetabolicViewer`` to call into.
+        kind: "thread", "process" or "inline" (see module docstring).
+        max_workers: Pool size.
+        timeout: Default per-call timeout in seconds (``None``: no limit).
+    """
+
+    def __init__(
+        self,
+        viewer: Any,
+        kind: str = "thread",
+        max_workers: Optional[int] = None,
+        timeout: Optional[float] = 120.0,
+    ):
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(f"Unknown executor kind: {kind!r}")
+        self.viewer = viewer
+        self.kind = kind
+        self.max_workers = max(1, max_workers or min(4, os.cpu_count() or 1))
+        self.timeout = timeout if timeout and timeout > 0 else None
+        self._pool: Optional[concurrent.futures.Executor] = None
+        self._call_ids = itertools.count(1)
+        # Bumped when a stuck process worker is killed and the pool replaced
+        self._generation = 0
+
+    @classmethod
+    def from_env(cls, viewer: Any) -> "ViewerExecutor":
+        workers = os.environ.get("NEBULA_EXECUTOR_WORKERS")
+        return cls(
+            viewer,
+            kind=os.environ.get("NEBULA_EXECUTOR", "thread"),
+            max_workers=int(workers) if workers else None,
+            timeout=float(os.environ.get("NEBULA_REQUEST_TIMEOUT", 120)),
+        )
+
+    def start(self) -> None:
+        """Create the pool; process workers are forked here, all at once."""
+        global _worker_viewer, _worker_slots, _worker_pids, _worker_calls
+        if self._pool is not None or self.kind == "inline":
+            return
+        if self.kind == "thread":
+            self._pool = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="viewer"
+            )
+            return
+
+        context = multiprocessing.get_context("fork")
+        _worker_viewer = self.viewer
+        _worker_slots = context.Value("i", 0)
+        _worker_pids = context.Array("q", self.max_workers, lock=False)
+        _worker_calls = context.Array("q", self.max_workers, lock=False)
+        self._pool = concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=context,
+            initializer=_init_worker,
+        )
+        # Fork every worker now, while the parent is quiet, not mid-request
+        for future in [self._pool.submit(_noop) for _ in range(self.max_workers)]:
+            future.result()
+        logger.info(f"Forked {self.max_workers} viewer worker processes")
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def _recycle(self, call_id: int) -> None:
+        """Kill the process worker running *call_id* and fork a new pool."""
+        for slot, running in enumerate(_worker_calls):
+            if running == call_id:
+                break
+        else:
+            return  # finished in the meantime
+        logger.warning(f"Killing viewer worker {_worker_pids[slot]} stuck in an abandoned call")
+        # The old pool fails every call it holds with BrokenProcessPool;
+        # run/iterate see the new generation and submit those again
+        self._generation += 1
+        pool, self._pool = self._pool, None
+        try:
+            os.kill(_worker_pids[slot], signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        pool.shutdown(wait=False)
+        self.start()
+
+    def _submit_process(self, function: Callable[..., Any], method: str, args: tuple, kwargs: dict):
+        """Submit to the process pool: (future, abort), see ``_wait``."""
+        call_id = next(self._call_ids)
+        future = self._pool.submit(function, call_id, method, args, kwargs)
+        return future, lambda: self._recycle(call_id)
+
+    def _submit(self, method: str, args: tuple, kwargs: dict):
+        """Submit one call: (future, abort), see ``_wait``."""
+        if self.kind == "process":
+            return self._submit_process(_call_viewer, method, args, kwargs)
+
+        cancelled = threading.Event()
+
+        def call() -> Any:
+            with cancel_scope(cancelled):
+                result = getattr(self.viewer, method)(*args, **kwargs)
+                if inspect.iscoroutine(result):
+                    result = asyncio.run(result)
+                return result
+
+        return self._pool.submit(call), cancelled.set
+
+    async def _wait_process(self, submit: Callable[[], Any], method: str, is_disconnected, timeout) -> Any:
+        """``_wait`` for a process call, submitted again if a recycle broke its pool."""
+        while True:
+            generation = self._generation
+            future, abort = submit()
+            try:
+                return await self._wait(future, abort, method, is_disconnected, timeout)
+            except BrokenProcessPool:
+                if self._generation == generation:
+                    raise
+                logger.info(f"Viewer pool was replaced, running {method} again")
+
+    async def run(
+        self,
+        method: str,
+        *args: Any,
+        is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+        timeout: Optional[float] = None,
+        **kwargs: Any,
+    ) -> Any:
+        """
+        ``await viewer.<method>(*args, **kwargs)``, off the event loop.
+
+        Args:
+            method: Name of the viewer method.
+            is_disconnected: Optional ``Request.is_disconnected``; polled
+                while the call runs, and the call is abandoned with
+                ``ClientDisconnected`` once it returns True.
+            timeout: Overrides the default timeout for this call.
+
+        Raises:
+            asyncio.TimeoutError: the call took longer than the timeout.
+            ClientDisconnected: the client went away first.
+        """
+        if self.kind == "inline":
+            result = getattr(self.viewer, method)(*args, **kwargs)
+            return await result if inspect.isawaitable(result) else result
+
+        self.start()
+        if self.kind == "process":
+            return await self._wait_process(
+                lambda: self._submit(method, args, kwargs), method, is_disconnected, timeout
+            )
+        future, abort = self._submit(method, args, kwargs)
+        return await self._wait(future, abort, method, is_disconnected, timeout)
+
+    async def iterate(
+        self,
+        method: str,
+        *args: Any,
+        is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+        timeout: Optional[float] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[Any]:
+        """
+        ``for item in viewer.<method>(*args, **kwargs)``, off the event loop.
+
+        A thread worker advances the generator one item per call, so items
+        come out as they are produced, and the timeout and disconnect
+        checks of ``run`` apply to each step. A live generator cannot be
+        handed back from a process worker: there the worker runs it to the
+        end in one call and the items are yielded afterwards.
+        """
+        if self.kind == "inline":
+            for item in getattr(self.viewer, method)(*args, **kwargs):
+                yield item
+            return
+
+        self.start()
+        if self.kind == "process":
+            items = await self._wait_process(
+                lambda: self._submit_process(_collect_viewer, method, args, kwargs),
+                method, is_disconnected, timeout,
+            )
+            for item in items:
+                yield item
+            return
+
+        # Generators do no work until advanced, so creating it here is cheap
+        iterator = getattr(self.viewer, method)(*args, **kwargs)
+        cancelled = threading.Event()
+        done = object()
+
+        def step() -> Any:
+            with cancel_scope(cancelled):
+                return next(iterator, done)
+
+        while True:
+            future = self._pool.submit(step)
+            item = await self._wait(future, cancelled.set, method, is_disconnected, timeout)
+            if item is done:
+                return
+            yield item
+
+    async def _wait(
+        self,
+        submitted: concurrent.futures.Future,
+        abort: Callable[[], None],
+        method: str,
+        is_disconnected: Optional[Callable[[], Awaitable[bool]]],
+        timeout: Optional[float],
+    ) -> Any:
+        """
+        The result of *submitted*, under the timeout and disconnect rules
+        of ``run``. *abort* stops the call if it is already running when it
+        is abandoned (see the module docstring).
+        """
+        future = asyncio.wrap_future(submitted)
+        watcher = asyncio.ensure_future(_watch_disconnect(is_disconnected)) if is_disconnected else None
+        try:
+            waiting = {future} if watcher is None else {future, watcher}
+            done, _ = await asyncio.wait(
+                waiting,
+                timeout=timeout if timeout is not None else self.timeout,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if future in done:
+                return future.result()
+            if watcher is not None and watcher in done:
+                raise ClientDisconnected(method)
+            raise asyncio.TimeoutError(method)
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+            if not future.done():
+                # A queued call is dropped with the future; a running one is aborted
+                running = not submitted.cancel()
+                future.cancel()
+                if running:
+                    abort()
+
+
+async def _watch_disconnect(is_disconnected: Callable[[], Awaitable[bool]], interval: float = 0.25) -> None:
+    """Returns once the client has disconnected."""
+    while not await is_disconnected():
+        await asyncio.sleep(interval)
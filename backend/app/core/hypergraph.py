@@ -13,14 +13,22 @@ This maps to an AND-OR graph:
 
 from __future__ import annotations
 
+import functools
+import heapq
+import itertools
+import operator
 import re
 from dataclasses import dataclass, field
 from collections import defaultdict
-from typing import Dict, List, Set, FrozenSet, Optional, Any, Tuple
+from collections.abc import Mapping, Sequence
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Set, FrozenSet, Optional, Any, Tuple
 
 import pandas as pd
 import numpy as np
 
+from app.utils.cancellation import check_cancelled
+from app.utils.result_cache import ResultCache
+
 
 # ---------------------------------------------------------------------------
 # Data structures
@@ -28,101 +36,741 @@ import numpy as np
 
 COMPOUND_RE = re.compile(r"[CZ]\d{5}")
 
+# Source sets whose forward closure each HyperGraph keeps
+CLOSURE_CACHE_SIZE = 64
 
-@dataclass(frozen=True)
-class HyperEdge:
-    """A single directed hyperedge (reaction) in the metabolic hypergraph."""
-    id: str                     # unique row key, e.g. "R00479_v1_forward"
-    reaction: str               # display name, e.g. "R00479_v1"
-    reaction_id: str            # base reaction ID, e.g. "R00479"
-    reactants: FrozenSet[str]   # e.g. frozenset({"C00311", "Z00029"})
-    products: FrozenSet[str]    # e.g. frozenset({"C00042", "C00048", "Z00029"})
+
+class EdgeRecord(NamedTuple):
+    """Plain-attribute copy of one ``EdgeTable`` row (see ``EdgeTable.record``)."""
+    id: str
+    reaction: str
+    reaction_id: str
+    reactants: FrozenSet[str]
+    products: FrozenSet[str]
     reactant_gen: float
     product_gen: float
-    generation: float           # (reactant_gen + product_gen) / 2
-    ec_list: List[str]
+    generation: float
+    ec_list: Tuple[str, ...]
     equation: str
     source: str
     coenzyme: str
     direction: str
 
 
-class HyperGraph:
+class HyperEdge:
     """
-    Directed B-hypergraph built from simulations.csv.
+    A single directed hyperedge (reaction) in the metabolic hypergraph.
 
-    Provides O(1) adjacency lookups:
-      - produced_by[compound] -> list of HyperEdges that produce compound
-      - consumed_by[compound] -> list of HyperEdges that consume compound
+    A lightweight view of one row of an ``EdgeTable``: an edge costs two
+    slots instead of a dict, a list and a dozen string references.
+    Attributes come from the table's ``record`` of the row, decoded from
+    the columns the first time the row is read.
     """
 
-    def __init__(self):
-        self.edges: Dict[str, HyperEdge] = {}
-        self.produced_by: Dict[str, List[HyperEdge]] = defaultdict(list)
-        self.consumed_by: Dict[str, List[HyperEdge]] = defaultdict(list)
-        self.all_compounds: Set[str] = set()
+    __slots__ = ("table", "index")
 
-    @classmethod
-    def from_dataframe(cls, df: pd.DataFrame) -> "HyperGraph":
-        """Build the hypergraph from a simulations DataFrame."""
-        graph = cls()
+    def __init__(self, table: "EdgeTable", index: int):
+        self.table = table
+        self.index = index
 
-        for idx, row in df.iterrows():
-            reactants_str = str(row.get("reactants", ""))
-            products_str = str(row.get("products", ""))
+    @property
+    def id(self) -> str:
+        """Unique row key, e.g. "R00479_v1_forward_12"."""
+        return self.table.record(self.index).id
 
-            reactant_set = frozenset(COMPOUND_RE.findall(reactants_str))
-            product_set = frozenset(COMPOUND_RE.findall(products_str))
+    @property
+    def reaction(self) -> str:
+        """Display name, e.g. "R00479_v1"."""
+        return self.table.record(self.index).reaction
 
-            if not reactant_set and not product_set:
-                continue
+    @property
+    def reaction_id(self) -> str:
+        """Base reaction ID, e.g. "R00479"."""
+        return self.table.record(self.index).reaction_id
+
+    @property
+    def reactants(self) -> FrozenSet[str]:
+        return self.table.record(self.index).reactants
+
+    @property
+    def products(self) -> FrozenSet[str]:
+        return self.table.record(self.index).products
+
+    @property
+    def reactant_gen(self) -> float:
+        return self.table.record(self.index).reactant_gen
+
+    @property
+    def product_gen(self) -> float:
+        return self.table.record(self.index).product_gen
+
+    @property
+    def generation(self) -> float:
+        """(reactant_gen + product_gen) / 2"""
+        return self.table.record(self.index).generation
+
+    @property
+    def ec_list(self) -> Tuple[str, ...]:
+        """EC numbers, shared with every other edge that has the same list."""
+        return self.table.record(self.index).ec_list
+
+    @property
+    def equation(self) -> str:
+        return self.table.record(self.index).equation
+
+    @property
+    def source(self) -> str:
+        return self.table.record(self.index).source
+
+    @property
+    def coenzyme(self) -> str:
+        return self.table.record(self.index).coenzyme
+
+    @property
+    def direction(self) -> str:
+        return self.table.record(self.index).direction
 
-            # Parse EC list
-            ec_raw = row.get("ec_list", "")
-            if pd.isna(ec_raw) or ec_raw == "":
-                ec_list = []
-            else:
-                ec_list = [e.strip() for e in str(ec_raw).split(",") if e.strip()]
-
-            # Unique edge key: reaction name + direction + row index for uniqueness
-            reaction_name = str(row.get("reaction", f"R_{idx}"))
-            direction = str(row.get("direction", "forward"))
-            edge_id = f"{reaction_name}_{direction}_{idx}"
-
-            coenzyme = row.get("coenzyme", "")
-            if pd.isna(coenzyme):
-                coenzyme = ""
-
-            source = row.get("source", "")
-            if pd.isna(source):
-                source = ""
-
-            edge = HyperEdge(
-                id=edge_id,
-                reaction=reaction_name,
-                reaction_id=str(row.get("reaction_id", "")),
-                reactants=reactant_set,
-                products=product_set,
-                reactant_gen=float(row.get("reactant_gen", 0) or 0),
-                product_gen=float(row.get("product_gen", 0) or 0),
-                generation=float(row.get("generation", 0) or 0),
-                ec_list=ec_list,
-                equation=str(row.get("equation", "")),
-                source=source,
-                coenzyme=coenzyme,
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, HyperEdge) and other.table is self.table and other.index == self.index
+
+    def __hash__(self) -> int:
+        return hash((id(self.table), self.index))
+
+    def __repr__(self) -> str:
+        return f"HyperEdge(id={self.id!r})"
+
+
+def _plain_number(value: float) -> Any:
+    """int for integral floats (generations are whole numbers), else the float."""
+    return int(value) if float(value).is_integer() else value
+
+
+def _categorize(values: Sequence[Any]) -> Tuple[np.ndarray, List[Any]]:
+    """Factorize *values* into (smallest-dtype codes, categories)."""
+    codes, categories = pd.factorize(pd.Series(values, dtype=object))
+    return codes.astype(np.min_scalar_type(max(len(categories) - 1, 0))), list(categories)
+
+
+@dataclass(eq=False)
+class EdgeTable(Sequence):
+    """
+    Struct-of-arrays storage for every hyperedge in a HyperGraph.
+
+    Numeric attributes are NumPy columns; repeated strings (reaction,
+    reaction_id, source, coenzyme, direction) are categorical codes into
+    small category lists, and EC lists are codes into a pool of interned
+    tuples. Reactant/product sets are CSR arrays of compound indices.
+
+    Indexing the table yields ``HyperEdge`` proxies. Traversals read rows
+    through ``record``, which decodes a row once and keeps it, so the
+    columns stay compact while the rows a query touches cost no more to
+    read than plain attributes.
+    """
+    compound_ids: Sequence[str]
+    row_labels: Sequence[Any]           # DataFrame index label of each edge's row
+    reaction_codes: np.ndarray
+    reactions: Sequence[str]
+    reaction_id_codes: np.ndarray
+    reaction_ids: Sequence[str]
+    equations: Sequence[str]
+    source_codes: np.ndarray
+    sources: Sequence[str]
+    coenzyme_codes: np.ndarray
+    coenzymes: Sequence[str]
+    direction_codes: np.ndarray
+    directions: Sequence[str]
+    ec_codes: np.ndarray
+    ec_pool: Sequence[Tuple[str, ...]]
+    reactant_gen: np.ndarray
+    product_gen: np.ndarray
+    generation: np.ndarray
+    reactant_offsets: np.ndarray
+    reactant_compounds: np.ndarray
+    product_offsets: np.ndarray
+    product_compounds: np.ndarray
+    # Generation columns, filled in by ``HyperGraph.build_generation_columns``:
+    # the equation's compounds (reactants then products, first occurrences)
+    # as CSR, the generation of each, and the highest per edge
+    equation_offsets: Optional[np.ndarray] = None
+    equation_compounds: Optional[np.ndarray] = None
+    equation_generations: Optional[np.ndarray] = None
+    max_generation: Optional[np.ndarray] = None
+    _generation_dicts: Optional[List[Optional[Dict[str, Any]]]] = field(default=None, repr=False)
+    _records: Optional[List[Optional[EdgeRecord]]] = field(default=None, repr=False)
+
+    @classmethod
+    def empty(cls) -> "EdgeTable":
+        no_codes = np.zeros(0, dtype=np.uint8)
+        no_floats = np.zeros(0, dtype=np.float64)
+        no_offsets = np.zeros(1, dtype=np.int64)
+        no_compounds = np.zeros(0, dtype=np.int32)
+        return cls(
+            compound_ids=[], row_labels=[],
+            reaction_codes=no_codes, reactions=[],
+            reaction_id_codes=no_codes, reaction_ids=[],
+            equations=[],
+            source_codes=no_codes, sources=[],
+            coenzyme_codes=no_codes, coenzymes=[],
+            direction_codes=no_codes, directions=[],
+            ec_codes=no_codes, ec_pool=[],
+            reactant_gen=no_floats, product_gen=no_floats, generation=no_floats,
+            reactant_offsets=no_offsets, reactant_compounds=no_compounds,
+            product_offsets=no_offsets, product_compounds=no_compounds,
+        )
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [HyperEdge(self, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("edge index out of range")
+        return HyperEdge(self, int(index))
+
+    def __len__(self) -> int:
+        return len(self.reaction_codes)
+
+    def record(self, index: int) -> EdgeRecord:
+        """
+        Edge *index* decoded into plain Python values. Built once per edge
+        and shared between calls; reactant/product sets keep the order the
+        row's compounds were listed in.
+        """
+        cache = self._records
+        if cache is None:
+            cache = self._records = [None] * len(self)
+        result = cache[index]
+        if result is None:
+            ids = self.compound_ids
+            r_start, r_end = self.reactant_offsets[index], self.reactant_offsets[index + 1]
+            p_start, p_end = self.product_offsets[index], self.product_offsets[index + 1]
+            reaction = self.reactions[self.reaction_codes[index]]
+            direction = self.directions[self.direction_codes[index]]
+            result = cache[index] = EdgeRecord(
+                id=f"{reaction}_{direction}_{self.row_labels[index]}",
+                reaction=reaction,
+                reaction_id=self.reaction_ids[self.reaction_id_codes[index]],
+                reactants=frozenset([ids[c] for c in self.reactant_compounds[r_start:r_end].tolist()]),
+                products=frozenset([ids[c] for c in self.product_compounds[p_start:p_end].tolist()]),
+                reactant_gen=float(self.reactant_gen[index]),
+                product_gen=float(self.product_gen[index]),
+                generation=float(self.generation[index]),
+                ec_list=self.ec_pool[self.ec_codes[index]],
+                equation=self.equations[index],
+                source=self.sources[self.source_codes[index]],
+                coenzyme=self.coenzymes[self.coenzyme_codes[index]],
                 direction=direction,
             )
+        return result
+
+    def compound_generation(self, index: int) -> Dict[str, Any]:
+        """
+        ``compound -> generation`` (-1 if unknown) for the equation of edge
+        *index*. Built once per edge and shared between calls — read only.
+        """
+        cache = self._generation_dicts
+        if cache is None:
+            cache = self._generation_dicts = [None] * len(self)
+        result = cache[index]
+        if result is None:
+            start, end = self.equation_offsets[index], self.equation_offsets[index + 1]
+            result = cache[index] = {
+                self.compound_ids[c]: _plain_number(g)
+                for c, g in zip(self.equation_compounds[start:end].tolist(), self.equation_generations[start:end].tolist())
+            }
+        return result
+
+    def max_compound_generation(self, index: int) -> Any:
+        """Highest value of ``compound_generation(index)`` (0 for an empty equation)."""
+        return _plain_number(self.max_generation[index])
+
+    def nbytes(self) -> int:
+        """Bytes held by the NumPy columns (category lists not included)."""
+        return sum(
+            v.nbytes for v in vars(self).values() if isinstance(v, np.ndarray)
+        )
+
 
-            graph.edges[edge_id] = edge
+class _AdjacencyView(Mapping):
+    """
+    Read-only ``compound -> List[HyperEdge]`` view over a CSR adjacency.
+
+    Behaves like the ``defaultdict(list)`` it replaces: unknown compounds
+    yield an empty list, and only compounds with at least one incident edge
+    are reported as members.
+    """
+
+    __slots__ = ("_graph", "_offsets", "_indices")
+
+    def __init__(self, graph: "HyperGraph", offsets: np.ndarray, indices: np.ndarray):
+        self._graph = graph
+        self._offsets = offsets
+        self._indices = indices
+
+    def edge_indices(self, compound: str) -> np.ndarray:
+        """Integer edge indices incident to *compound* (empty if unknown)."""
+        cid = self._graph.compound_index.get(compound)
+        if cid is None:
+            return self._indices[:0]
+        return self._indices[self._offsets[cid]:self._offsets[cid + 1]]
+
+    def __getitem__(self, compound: str) -> List[HyperEdge]:
+        table = self._graph.edge_table
+        return [HyperEdge(table, i) for i in self.edge_indices(compound).tolist()]
+
+    def __contains__(self, compound: object) -> bool:
+        cid = self._graph.compound_index.get(compound)  # type: ignore[arg-type]
+        return cid is not None and self._offsets[cid + 1] > self._offsets[cid]
+
+    def __iter__(self):
+        degrees = np.diff(self._offsets)
+        compound_ids = self._graph.compound_ids
+        return (compound_ids[i] for i in np.flatnonzero(degrees).tolist())
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(np.diff(self._offsets)))
+
+
+def index_dtype(n: int) -> np.dtype:
+    """Narrowest dtype for indices into *n* items (edges or compounds)."""
+    return np.dtype(np.uint16 if n <= np.iinfo(np.uint16).max else np.int32)
+
+
+def _build_csr(keys: np.ndarray, values: np.ndarray, n_keys: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Group *values* by *keys* into CSR form (offsets, indices).
+
+    The sort is stable, so values keep their original relative order
+    within each key — adjacency lists stay in DataFrame row order.
+    """
+    order = np.argsort(keys, kind="stable")
+    offsets = np.zeros(n_keys + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=n_keys), out=offsets[1:])
+    return offsets, values[order].astype(np.int32)
+
+
+def _scan_compounds(column: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Extract every compound ID from a string column in a single regex pass.
+
+    All cells are joined into one buffer and scanned once; match offsets are
+    mapped back to row positions with a binary search.
+
+    Returns:
+        (row position of each match, compound ID of each match)
+    """
+    cells = column.fillna("").astype(str).tolist()
+    lengths = np.fromiter((len(c) + 1 for c in cells), dtype=np.int64, count=len(cells))
+    row_starts = np.zeros(len(cells), dtype=np.int64)
+    np.cumsum(lengths[:-1], out=row_starts[1:])
+
+    buffer = "\n".join(cells)
+    starts: List[int] = []
+    tokens: List[str] = []
+    for match in COMPOUND_RE.finditer(buffer):
+        starts.append(match.start())
+        tokens.append(match.group())
+
+    rows = np.searchsorted(row_starts, np.asarray(starts, dtype=np.int64), side="right") - 1
+    return rows, np.asarray(tokens, dtype=object)
+
+
+def _string_column(df: pd.DataFrame, name: str, default: str = "") -> List[str]:
+    """Column as a list of str with NaN/missing mapped to *default*."""
+    if name not in df.columns:
+        return [default] * len(df)
+    return [default if pd.isna(v) else str(v) for v in df[name].tolist()]
+
+
+def _float_column(df: pd.DataFrame, name: str) -> np.ndarray:
+    if name not in df.columns:
+        return np.zeros(len(df), dtype=np.float64)
+    return pd.to_numeric(df[name], errors="coerce").to_numpy(dtype=np.float64)
+
+
+class HyperGraph:
+    """
+    Directed B-hypergraph built from simulations.csv.
+
+    Compounds are interned to dense integers (``compound_ids`` /
+    ``compound_index``) and adjacency is stored as CSR arrays:
+
+      - produced_offsets / produced_edges: edges producing each compound
+      - consumed_offsets / consumed_edges: edges consuming each compound
+
+    ``produced_by`` and ``consumed_by`` expose the familiar
+    ``compound -> list of HyperEdges`` mapping as thin views over the CSR.
+
+    Once generations are known (``build_lateral_index``) a third CSR,
+    lateral_offsets / lateral_edges, lists each compound's same-generation
+    lateral reactions, and ``build_generation_columns`` adds the table
+    view's compound generations to the edge table.
+
+    A graph opened from a snapshot decodes its compound table and builds
+    ``compound_index`` on first use (``defer_compounds``).
+    """
+
+    def __init__(self):
+        self.edge_table: EdgeTable = EdgeTable.empty()
+        self._compound_ids: Optional[List[str]] = []
+        self._compound_index: Optional[Dict[str, int]] = {}
+        self._compound_source: Optional[Sequence[str]] = None
+        self.produced_offsets = np.zeros(1, dtype=np.int64)
+        self.produced_edges = np.zeros(0, dtype=np.int32)
+        self.consumed_offsets = np.zeros(1, dtype=np.int64)
+        self.consumed_edges = np.zeros(0, dtype=np.int32)
+        self._edges_by_id: Optional[Dict[str, HyperEdge]] = None
+        self._producers: Optional[List[Optional[List[Tuple[int, int, float, float]]]]] = None
+        self._consumers: Optional[List[Optional[List[Tuple[int, int, float, float]]]]] = None
+        self.produced_by = _AdjacencyView(self, self.produced_offsets, self.produced_edges)
+        self.consumed_by = _AdjacencyView(self, self.consumed_offsets, self.consumed_edges)
+        self.lateral_offsets: Optional[np.ndarray] = None
+        self.lateral_edges: Optional[np.ndarray] = None
+        # forward_closure masks, see ``viable_edges``
+        self._closures = ResultCache(max_entries=CLOSURE_CACHE_SIZE, ttl_seconds=None)
+        self._closure_gen_mapper: Optional[Dict[str, float]] = None
+
+    @property
+    def edge_list(self) -> EdgeTable:
+        """All edges, indexable by integer edge index."""
+        return self.edge_table
+
+    @property
+    def edges(self) -> Dict[str, HyperEdge]:
+        """``edge.id -> HyperEdge`` (built on first use)."""
+        if self._edges_by_id is None:
+            self._edges_by_id = {edge.id: edge for edge in self.edge_list}
+        return self._edges_by_id
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.edge_table)
+
+    @property
+    def compound_ids(self) -> List[str]:
+        """Compound ID of each dense compound index."""
+        if self._compound_ids is None:
+            self._compound_ids = list(self._compound_source)
+        return self._compound_ids
+
+    @compound_ids.setter
+    def compound_ids(self, compound_ids: List[str]) -> None:
+        self._compound_ids = compound_ids
+        self._compound_index = None
+        self._compound_source = None
+
+    @property
+    def compound_index(self) -> Dict[str, int]:
+        """``compound ID -> dense index`` (built on first use after ``defer_compounds``)."""
+        if self._compound_index is None:
+            self._compound_index = {c: i for i, c in enumerate(self.compound_ids)}
+        return self._compound_index
+
+    @compound_index.setter
+    def compound_index(self, compound_index: Dict[str, int]) -> None:
+        self._compound_index = compound_index
+
+    def defer_compounds(self, compound_ids: Sequence[str]) -> None:
+        """
+        Take the compound table from *compound_ids* (e.g. a snapshot's packed
+        strings), copied into ``compound_ids`` / ``compound_index`` only when
+        they are first read.
+        """
+        self._compound_ids = None
+        self._compound_index = None
+        self._compound_source = compound_ids
+
+    @property
+    def all_compounds(self):
+        """Set-like view of every compound that appears in some edge."""
+        return self.compound_index.keys()
+
+    @property
+    def num_compounds(self) -> int:
+        if self._compound_ids is None:
+            return len(self._compound_source)
+        return len(self._compound_ids)
+
+    def _set_adjacency(
+        self,
+        produced_offsets: np.ndarray,
+        produced_edges: np.ndarray,
+        consumed_offsets: np.ndarray,
+        consumed_edges: np.ndarray,
+    ) -> None:
+        self.produced_offsets = produced_offsets
+        self.produced_edges = produced_edges
+        self.consumed_offsets = consumed_offsets
+        self.consumed_edges = consumed_edges
+        self._producers = None
+        self._consumers = None
+        self._closures.clear()
+        self.produced_by = _AdjacencyView(self, produced_offsets, produced_edges)
+        self.consumed_by = _AdjacencyView(self, consumed_offsets, consumed_edges)
+
+    def producers(self, index: int) -> List[Tuple[int, int, float, float]]:
+        """
+        ``(edge index, reaction code, generation, product_gen)`` of every edge
+        producing compound *index*, in ``produced_by`` order. Decoded from
+        the CSR once per compound and kept, for the traversal loops.
+        """
+        cache = self._producers
+        if cache is None:
+            cache = self._producers = [None] * self.num_compounds
+        result = cache[index]
+        if result is None:
+            table = self.edge_table
+            edges = self.produced_edges[self.produced_offsets[index]:self.produced_offsets[index + 1]]
+            result = cache[index] = list(zip(
+                edges.tolist(),
+                table.reaction_codes[edges].tolist(),
+                table.generation[edges].tolist(),
+                table.product_gen[edges].tolist(),
+            ))
+        return result
+
+    def consumers(self, index: int) -> List[Tuple[int, int, float, float]]:
+        """
+        ``(edge index, reaction code, reactant_gen, product_gen)`` of every
+        edge consuming compound *index*, in ``consumed_by`` order; kept like
+        ``producers``.
+        """
+        cache = self._consumers
+        if cache is None:
+            cache = self._consumers = [None] * self.num_compounds
+        result = cache[index]
+        if result is None:
+            table = self.edge_table
+            edges = self.consumed_edges[self.consumed_offsets[index]:self.consumed_offsets[index + 1]]
+            result = cache[index] = list(zip(
+                edges.tolist(),
+                table.reaction_codes[edges].tolist(),
+                table.reactant_gen[edges].tolist(),
+                table.product_gen[edges].tolist(),
+            ))
+        return result
+
+    def build_lateral_index(self, gen_mapper: Dict[str, float]) -> None:
+        """
+        Precompute the same-generation lateral adjacency.
+
+        An edge is lateral for a compound it consumes when the edge's
+        reactant generation equals the compound's generation and its
+        product generation equals its reactant generation. Compounds
+        without a generation have none. Edges keep their ``consumed_by``
+        order.
+        """
+        table = self.edge_table
+        compound_gen = np.fromiter(
+            (gen_mapper.get(c, np.nan) for c in self.compound_ids),
+            dtype=np.float64,
+            count=self.num_compounds,
+        )
+        consumer = np.repeat(np.arange(self.num_compounds), np.diff(self.consumed_offsets))
+        edges = self.consumed_edges
+        reactant_gen = table.reactant_gen[edges]
+        lateral = (reactant_gen == compound_gen[consumer]) & (table.product_gen[edges] == reactant_gen)
+
+        self.lateral_offsets = np.zeros(self.num_compounds + 1, dtype=np.int64)
+        np.cumsum(np.bincount(consumer[lateral], minlength=self.num_compounds), out=self.lateral_offsets[1:])
+        self.lateral_edges = edges[lateral]
+
+    def build_generation_columns(self, gen_mapper: Dict[str, float]) -> None:
+        """
+        Precompute the per-edge compound generations of the table view.
+
+        The compounds of an edge's equation are its reactants followed by its
+        products, first occurrences only (what ``add_compound_generation``
+        reads back out of the equation text); each gets its generation, -1
+        when unknown, and ``max_generation`` holds the highest per edge.
+        Fully vectorized over the reactant/product CSR.
+        """
+        table = self.edge_table
+        n_edges = len(table)
+        compounds = np.concatenate([table.reactant_compounds, table.product_compounds]).astype(np.int64)
+        edges = np.concatenate([
+            np.repeat(np.arange(n_edges), np.diff(table.reactant_offsets)),
+            np.repeat(np.arange(n_edges), np.diff(table.product_offsets)),
+        ])
+        # Stable: reactants stay ahead of products within each edge
+        order = np.argsort(edges, kind="stable")
+        edges, compounds = edges[order], compounds[order]
+        # First occurrence of each (edge, compound) pair, e.g. a cofactor on both sides
+        stride = max(self.num_compounds, 1)
+        keep = np.sort(np.unique(edges * stride + compounds, return_index=True)[1])
+        edges, compounds = edges[keep], compounds[keep]
+
+        compound_gen = np.fromiter(
+            (gen_mapper.get(c, -1) for c in self.compound_ids),
+            dtype=np.float64,
+            count=self.num_compounds,
+        )
+        generations = compound_gen[compounds]
+        offsets = np.zeros(n_edges + 1, dtype=np.int64)
+        np.cumsum(np.bincount(edges, minlength=n_edges), out=offsets[1:])
+
+        max_generation = np.zeros(n_edges, dtype=np.float64)
+        nonempty = offsets[1:] > offsets[:-1]
+        if nonempty.any():
+            max_generation[nonempty] = np.maximum.reduceat(generations, offsets[:-1][nonempty])
+
+        table._generation_dicts = None
+        table.equation_offsets = offsets
+        table.equation_compounds = compounds.astype(np.int32)
+        table.equation_generations = generations
+        table.max_generation = max_generation
+
+    def viable_edges(
+        self,
+        gen_mapper: Dict[str, float],
+        cofactor_set: Set[str],
+        sources: Set[str],
+    ) -> Optional[np.ndarray]:
+        """
+        ``forward_closure`` mask for *sources*, or None when every edge is viable.
+
+        The closure only grows with its seeds, so once the closure without
+        any source covers every edge no source set is computed at all.
+        Other masks are kept per (cofactors, sources) in an LRU.
+        """
+        if self._closure_gen_mapper is not gen_mapper:
+            self._closures.clear()
+            self._closure_gen_mapper = gen_mapper
+        cofactor_key = frozenset(cofactor_set)
+        cached = (None,)
+        for key in ((cofactor_key, frozenset()), (cofactor_key, frozenset(sources))):
+            cached = self._closures.get(key)
+            if cached is None:
+                mask = forward_closure(self, gen_mapper, cofactor_set, set(key[1]))
+                cached = (None if mask.all() else mask,)
+                self._closures.put(key, cached)
+            if cached[0] is None:
+                return None
+        return cached[0]
+
+    def lateral_edge_indices(self, compound: str) -> np.ndarray:
+        """Lateral edge indices of *compound* (requires ``build_lateral_index``)."""
+        index = self.compound_index.get(compound)
+        if index is None:
+            return self.lateral_edges[:0]
+        return self.lateral_edges[self.lateral_offsets[index]:self.lateral_offsets[index + 1]]
 
-            for compound in product_set:
-                graph.produced_by[compound].append(edge)
-                graph.all_compounds.add(compound)
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame, gen_mapper: Optional[Dict[str, float]] = None) -> "HyperGraph":
+        """
+        Build the hypergraph from a simulations DataFrame.
+
+        Columnar build: the ``reactants``/``products`` columns are each
+        scanned with one regex pass, compound IDs are interned with
+        ``np.unique`` and the adjacency is assembled with a stable sort.
+        With *gen_mapper* the lateral index and generation columns are
+        built as well.
+        """
+        graph = cls()
+        n_rows = len(df)
 
-            for compound in reactant_set:
-                graph.consumed_by[compound].append(edge)
-                graph.all_compounds.add(compound)
+        empty = pd.Series([""] * n_rows, dtype=object)
+        r_rows, r_tokens = _scan_compounds(df["reactants"] if "reactants" in df.columns else empty)
+        p_rows, p_tokens = _scan_compounds(df["products"] if "products" in df.columns else empty)
 
+        # Intern compound IDs to dense integers (sorted lexicographically)
+        compound_ids, inverse = np.unique(
+            np.concatenate([r_tokens, p_tokens]).astype(str), return_inverse=True
+        )
+        n_compounds = len(compound_ids)
+        stride = max(n_compounds, 1)
+        r_cids = inverse[:len(r_tokens)].astype(np.int64)
+        p_cids = inverse[len(r_tokens):].astype(np.int64)
+
+        # Drop repeated (row, compound) pairs, keeping first occurrences in
+        # text order so each edge's frozenset is built in the same order
+        r_keep = np.sort(np.unique(r_rows * stride + r_cids, return_index=True)[1])
+        p_keep = np.sort(np.unique(p_rows * stride + p_cids, return_index=True)[1])
+        r_rows, r_cids = r_rows[r_keep], r_cids[r_keep]
+        p_rows, p_cids = p_rows[p_keep], p_cids[p_keep]
+
+        # Rows with neither reactants nor products are not edges
+        has_compounds = np.zeros(n_rows, dtype=bool)
+        has_compounds[r_rows] = True
+        has_compounds[p_rows] = True
+        kept_rows = np.flatnonzero(has_compounds)
+        edge_of_row = np.full(n_rows, -1, dtype=np.int64)
+        edge_of_row[kept_rows] = np.arange(len(kept_rows))
+
+        r_edges = edge_of_row[r_rows]
+        p_edges = edge_of_row[p_rows]
+
+        # Per-edge compound sets: pairs are already grouped by row
+        compound_list = compound_ids.tolist()
+        r_bounds = np.searchsorted(r_edges, np.arange(len(kept_rows) + 1)).astype(np.int64)
+        p_bounds = np.searchsorted(p_edges, np.arange(len(kept_rows) + 1)).astype(np.int64)
+
+        # Edge attribute columns, restricted to kept rows
+        kept = kept_rows.tolist()
+        index_labels = df.index.tolist()
+        if "reaction" in df.columns:
+            reaction_col = [
+                f"R_{idx}" if pd.isna(v) else str(v)
+                for idx, v in zip(index_labels, df["reaction"].tolist())
+            ]
+        else:
+            reaction_col = [f"R_{idx}" for idx in index_labels]
+
+        def take(values: Sequence[Any]) -> List[Any]:
+            return [values[row] for row in kept]
+
+        # EC lists repeat heavily — parse each distinct string once and
+        # intern the resulting tuples into a shared pool
+        ec_raw_codes, ec_raw = _categorize(take(_string_column(df, "ec_list")))
+        ec_pool: List[Tuple[str, ...]] = []
+        ec_pool_index: Dict[Tuple[str, ...], int] = {}
+        ec_remap = np.zeros(len(ec_raw), dtype=np.int64)
+        for j, raw in enumerate(ec_raw):
+            ecs = tuple(e.strip() for e in raw.split(",") if e.strip())
+            if ecs not in ec_pool_index:
+                ec_pool_index[ecs] = len(ec_pool)
+                ec_pool.append(ecs)
+            ec_remap[j] = ec_pool_index[ecs]
+        ec_codes = ec_remap[ec_raw_codes].astype(np.min_scalar_type(max(len(ec_pool) - 1, 0)))
+
+        reaction_codes, reactions = _categorize(take(reaction_col))
+        reaction_id_codes, reaction_ids = _categorize(take(_string_column(df, "reaction_id")))
+        source_codes, sources = _categorize(take(_string_column(df, "source")))
+        coenzyme_codes, coenzymes = _categorize(take(_string_column(df, "coenzyme")))
+        direction_codes, directions = _categorize(take(_string_column(df, "direction", "forward")))
+
+        graph.edge_table = EdgeTable(
+            compound_ids=compound_list,
+            row_labels=np.asarray(df.index)[kept_rows],
+            reaction_codes=reaction_codes,
+            reactions=reactions,
+            reaction_id_codes=reaction_id_codes,
+            reaction_ids=reaction_ids,
+            equations=take(_string_column(df, "equation")),
+            source_codes=source_codes,
+            sources=sources,
+            coenzyme_codes=coenzyme_codes,
+            coenzymes=coenzymes,
+            direction_codes=direction_codes,
+            directions=directions,
+            ec_codes=ec_codes,
+            ec_pool=ec_pool,
+            reactant_gen=_float_column(df, "reactant_gen")[kept_rows],
+            product_gen=_float_column(df, "product_gen")[kept_rows],
+            generation=_float_column(df, "generation")[kept_rows],
+            reactant_offsets=r_bounds,
+            reactant_compounds=r_cids.astype(np.int32),
+            product_offsets=p_bounds,
+            product_compounds=p_cids.astype(np.int32),
+        )
+        graph.compound_ids = compound_list
+        graph._set_adjacency(
+            *_build_csr(p_cids, p_edges, n_compounds),
+            *_build_csr(r_cids, r_edges, n_compounds),
+        )
+        if gen_mapper is not None:
+            graph.build_lateral_index(gen_mapper)
+            graph.build_generation_columns(gen_mapper)
         return graph
 
 
@@ -159,168 +807,394 @@ class ReactionNode:
 # AND-OR Backward Reachability
 # ---------------------------------------------------------------------------
 
-def backward_reachability(
+def forward_closure(
     graph: HyperGraph,
-    target: str,
     gen_mapper: Dict[str, float],
-    cofactors: Set[str] | None = None,
-    sources: Set[str] | None = None,
-    skip_cofactor: bool = True,
-) -> Tuple[Optional[CompoundNode], Dict[str, Any]]:
+    cofactor_set: Set[str],
+    sources: Set[str],
+) -> np.ndarray:
     """
-    Build a complete AND-OR DAG rooted at `target` by backward expansion.
+    Forward (AND-semantics) closure of the compounds a source-constrained
+    expansion can ground out in.
 
-    Args:
-        graph: The HyperGraph to traverse.
-        target: Target compound ID.
-        gen_mapper: compound_id -> generation mapping.
-        cofactors: Set of cofactor compound IDs (treated as leaves).
-        sources: Optional set of source compounds. If provided, a post-pass
-                 prunes branches that don't reach any source.
-        skip_cofactor: Whether to treat cofactors as leaves.
+    Seeds are every compound ``backward_reachability`` accepts as a valid
+    leaf: the sources, cofactors, gen-0 compounds and compounds without a
+    known generation. A reaction fires once all of its non-cofactor
+    reactants are reached, and derives each product its generation allows
+    (the same monotonicity rule the backward expansion applies).
 
     Returns:
-        (root CompoundNode or None, stats dict)
+        Boolean array over edge indices: True where every non-cofactor
+        reactant is reachable. Reactions outside it can only lead to
+        branches the source pruning would remove.
     """
-    if cofactors is None:
-        cofactors = set()
-    if sources is None:
-        sources = set()
-
-    cofactor_set = cofactors if skip_cofactor else set()
-
-    # Memoization: compound_id -> CompoundNode (fully expanded)
-    memo: Dict[str, CompoundNode] = {}
-    # Track which compounds are currently on the ancestor path (cycle detection)
-    # Using a set for the iterative stack-based approach won't work cleanly,
-    # so we pass ancestor_path through recursion.
-    stats = {
+    table = graph.edge_table
+    compound_ids = graph.compound_ids
+    n_compounds = graph.num_compounds
+
+    is_cofactor = np.fromiter((c in cofactor_set for c in compound_ids), dtype=bool, count=n_compounds)
+    compound_gen = np.fromiter(
+        (gen_mapper.get(c, -1) for c in compound_ids), dtype=np.float64, count=n_compounds
+    )
+    seeds = is_cofactor | (compound_gen == 0) | (compound_gen == -1)
+    for source in sources:
+        cid = graph.compound_index.get(source)
+        if cid is not None:
+            seeds[cid] = True
+
+    n_edges = len(table)
+    reactant_edges = np.repeat(np.arange(n_edges), np.diff(table.reactant_offsets))
+    product_edges = np.repeat(np.arange(n_edges), np.diff(table.product_offsets))
+
+    # Outstanding non-cofactor reactants per edge
+    counted = ~is_cofactor[table.reactant_compounds]
+    need = np.bincount(reactant_edges[counted], minlength=n_edges)
+
+    # (edge, product) pairs that respect generation monotonicity
+    product_gen = compound_gen[table.product_compounds]
+    allowed = ~((product_gen >= 0) & (table.generation[product_edges] > product_gen))
+
+    reached = seeds.copy()
+    frontier = np.flatnonzero(seeds & ~is_cofactor)
+    ready = need == 0
+
+    # Wave-wise propagation: consume the frontier, fire edges that became
+    # ready, and collect the products they derive for the first time.
+    while True:
+        fired = allowed & ready[product_edges]
+        products = np.unique(table.product_compounds[fired])
+        new = products[~reached[products]]
+        reached[new] = True
+        frontier = np.concatenate([frontier, new[~is_cofactor[new]]])
+        if not len(frontier):
+            break
+
+        starts = graph.consumed_offsets[frontier]
+        counts = graph.consumed_offsets[frontier + 1] - starts
+        positions = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        consumed = graph.consumed_edges[positions]
+        before = need == 0
+        np.subtract.at(need, consumed, 1)
+        ready = (need == 0) & ~before
+        frontier = frontier[:0]
+
+    return need == 0
+
+
+class _ExpansionFrame:
+    """One OR-node being expanded on the explicit stack of ``_BackwardExpander``."""
+
+    __slots__ = (
+        "compound", "index", "node", "gen", "depth",
+        "reactions", "edge", "reactants", "children",
+    )
+
+    def __init__(self, compound: str, index: int, node: CompoundNode, gen: float, depth: int, reactions):
+        self.compound = compound
+        self.index = index                               # interned compound index, -1 if unknown
+        self.node = node
+        self.gen = gen
+        self.depth = depth
+        self.reactions = reactions                       # iterator over candidate edge indices
+        self.edge: Optional[EdgeRecord] = None           # reaction currently being expanded
+        self.reactants = None                            # iterator over its reactants
+        self.children: List[CompoundNode] = []
+
+
+def _expansion_stats() -> Dict[str, Any]:
+    return {
         "total_compounds": 0,
         "total_reactions": 0,
         "shared_compounds": 0,
         "max_depth": 0,
     }
 
-    def _is_leaf(compound: str) -> Tuple[bool, str]:
-        """Determine if a compound is a leaf node and why."""
-        if compound in cofactor_set:
-            return True, "cofactor"
-        if sources and compound in sources:
-            return True, "source"
-        gen = gen_mapper.get(compound, -1)
-        if gen == 0:
-            return True, "gen0"
-        if gen == -1:
-            # Unknown compound — treat as leaf
-            return True, "unknown"
-        return False, ""
 
-    def expand_compound(compound: str, ancestor_path: FrozenSet[str], depth: int) -> CompoundNode:
-        """Recursively expand a compound (OR-node) by finding all producing reactions."""
-        stats["max_depth"] = max(stats["max_depth"], depth)
+class _BackwardExpander:
+    """
+    Explicit-stack AND-OR expansion.
 
-        gen = gen_mapper.get(compound, -1)
+    Produces exactly the DAG and stats of a depth-first recursive expansion
+    (same visiting order, same memoization and cycle cuts) but keeps its own
+    stack of ``_ExpansionFrame`` objects, so chain length is not bounded by
+    the interpreter's recursion limit.
 
-        # Check leaf conditions
-        leaf, reason = _is_leaf(compound)
-        if leaf:
-            node = CompoundNode(
-                id=compound,
-                generation=gen,
-                is_leaf=True,
-                leaf_reason=reason,
-            )
+    The ancestor path used for cycle detection is a flag per interned
+    compound (``on_path``), set on push and cleared on pop — O(1) per step
+    instead of copying a frozenset per node. A compound is on the stack at
+    most once, because it is memoized before its frame is pushed.
+    """
+
+    def __init__(
+        self,
+        graph: HyperGraph,
+        gen_mapper: Dict[str, float],
+        cofactor_set: Set[str],
+        sources: Set[str],
+        viable_edges: Optional[np.ndarray] = None,
+    ):
+        self.graph = graph
+        self.gen_mapper = gen_mapper
+        self.cofactor_set = cofactor_set
+        self.sources = sources
+        # Optional per-edge mask; reactions outside it are never descended into
+        self.viable_edges = viable_edges
+        self._viable = None if viable_edges is None else viable_edges.tolist()
+        # Memoization: compound_id -> CompoundNode (fully expanded)
+        self.memo: Dict[str, CompoundNode] = {}
+        self.stats = _expansion_stats()
+        self._compound_index = graph.compound_index
+        self._stack: List[_ExpansionFrame] = []
+        self._on_path = bytearray(graph.num_compounds)
+
+    def _leaf_reason(self, compound: str, gen: float) -> str:
+        """Return why *compound* is a leaf, or "" if it should be expanded."""
+        if compound in self.cofactor_set:
+            return "cofactor"
+        if self.sources and compound in self.sources:
+            return "source"
+        if gen == 0:
+            return "gen0"
+        if gen == -1:
+            # Unknown compound — treat as leaf
+            return "unknown"
+        return ""
+
+    def _enter(self, compound: str, depth: int) -> Optional[CompoundNode]:
+        """
+        Visit *compound*. Leaves and already-expanded compounds are resolved
+        immediately; otherwise a frame is pushed and None is returned.
+        """
+        stats = self.stats
+        if depth > stats["max_depth"]:
+            stats["max_depth"] = depth
+
+        gen = self.gen_mapper.get(compound, -1)
+
+        reason = self._leaf_reason(compound, gen)
+        if reason:
             stats["total_compounds"] += 1
-            return node
+            return CompoundNode(id=compound, generation=gen, is_leaf=True, leaf_reason=reason)
 
-        # Memoization: if already fully expanded, return a shared reference
-        if compound in memo:
+        # Memoization: if already expanded, return a shared reference
+        if compound in self.memo:
             stats["shared_compounds"] += 1
-            shared = CompoundNode(
-                id=compound,
-                generation=gen,
-                is_leaf=False,
-                is_shared=True,
-            )
-            return shared
+            return CompoundNode(id=compound, generation=gen, is_leaf=False, is_shared=True)
 
-        # Create the OR-node
+        # Once per expanded compound: cheap next to its producer scan
+        check_cancelled()
         node = CompoundNode(id=compound, generation=gen)
         stats["total_compounds"] += 1
-
-        # Register in memo BEFORE recursion to handle cycles via memoization
-        memo[compound] = node
-
-        new_ancestor = ancestor_path | frozenset({compound})
-
-        # Find all hyperedges that produce this compound
-        producing_edges = graph.produced_by.get(compound, [])
+        # Register in memo BEFORE expanding to handle cycles via memoization
+        self.memo[compound] = node
 
         # Deduplicate by reaction name — multiple rows for same reaction
-        # (e.g. same reaction producing multiple products) should merge
-        seen_reactions: Dict[str, List[HyperEdge]] = defaultdict(list)
-        for edge in producing_edges:
-            seen_reactions[edge.reaction].append(edge)
-
-        for reaction_name, edges in seen_reactions.items():
-            # Use the first edge as representative (they share the same reactants/equation)
-            edge = edges[0]
-
-            # Generation monotonicity: reaction generation must be <= compound generation
-            if gen >= 0 and edge.generation > gen:
-                continue
-
-            # Expand all non-cofactor reactants
-            reactant_children: List[CompoundNode] = []
-            skip_reaction = False
+        # (e.g. same reaction producing multiple products) should merge;
+        # the first edge is the representative. Works on the integer
+        # columns so skipped edges are never decoded.
+        index = self._compound_index.get(compound, -1)
+        viable = self._viable
+        representatives: Dict[int, Tuple[int, float]] = {}
+        if index >= 0:
+            for edge_index, code, edge_gen, _ in self.graph.producers(index):
+                if code not in representatives and (viable is None or viable[edge_index]):
+                    representatives[code] = (edge_index, edge_gen)
+
+        # Generation monotonicity: reaction generation must be <= compound generation
+        reactions = [
+            edge_index
+            for edge_index, edge_gen in representatives.values()
+            if not (gen >= 0 and edge_gen > gen)
+        ]
+
+        if index >= 0:
+            self._on_path[index] = 1
+        self._stack.append(_ExpansionFrame(compound, index, node, gen, depth, iter(reactions)))
+        return None
 
-            for reactant in edge.reactants:
+    def expand(self, target: str) -> CompoundNode:
+        """Expand *target* and everything below it; returns its OR-node."""
+        root = self._enter(target, 0)
+        if root is not None:
+            return root
+
+        stack = self._stack
+        cofactor_set = self.cofactor_set
+        stats = self.stats
+        compound_index = self._compound_index
+        on_path = self._on_path
+        record = self.graph.edge_table.record
+        root = stack[0].node
+
+        while stack:
+            frame = stack[-1]
+
+            if frame.reactants is None:
+                # Choose the next producing reaction of this OR-node
+                edge_index = next(frame.reactions, None)
+                if edge_index is None:
+                    # All producers handled — pop and hand the node to the parent
+                    node = frame.node
+                    if not node.producers:
+                        node.is_leaf = True
+                        node.leaf_reason = "no_producers"
+                    stack.pop()
+                    if frame.index >= 0:
+                        on_path[frame.index] = 0
+                    if stack:
+                        stack[-1].children.append(node)
+                    continue
+
+                edge = frame.edge = record(edge_index)
+                frame.reactants = iter(edge.reactants)
+                frame.children = []
+
+            # Expand the non-cofactor reactants of the current AND-node
+            descended = False
+            cycle = False
+            for reactant in frame.reactants:
                 if reactant in cofactor_set:
                     continue  # skip cofactors as reactants
-
-                if reactant in ancestor_path:
-                    # Cycle detected — skip this entire reaction branch
-                    skip_reaction = True
+                if on_path[compound_index[reactant]] and reactant != frame.compound:
+                    # Cycle detected (reactant is an ancestor) — skip this entire reaction branch
+                    cycle = True
+                    break
+                child = self._enter(reactant, frame.depth + 1)
+                if child is None:
+                    descended = True
                     break
+                frame.children.append(child)
 
-                child = expand_compound(reactant, new_ancestor, depth + 1)
-                reactant_children.append(child)
+            if descended:
+                continue
 
-            if skip_reaction:
+            edge = frame.edge
+            frame.reactants = None
+            if cycle:
                 continue
 
-            rxn_node = ReactionNode(
+            frame.node.producers.append(ReactionNode(
                 id=edge.id,
                 reaction=edge.reaction,
                 reaction_id=edge.reaction_id,
                 equation=edge.equation,
-                ec_list=edge.ec_list,
+                ec_list=list(edge.ec_list),
                 generation=edge.generation,
                 source=edge.source,
                 coenzyme=edge.coenzyme,
-                reactants=reactant_children,
-            )
+                reactants=frame.children,
+            ))
             stats["total_reactions"] += 1
-            node.producers.append(rxn_node)
 
-        # If no producers were found, mark as leaf
-        if not node.producers:
-            node.is_leaf = True
-            node.leaf_reason = "no_producers"
+        return root
 
-        return node
+
+def backward_reachability(
+    graph: HyperGraph,
+    target: str,
+    gen_mapper: Dict[str, float],
+    cofactors: Set[str] | None = None,
+    sources: Set[str] | None = None,
+    skip_cofactor: bool = True,
+) -> Tuple[Optional[CompoundNode], Dict[str, Any]]:
+    """
+    Build a complete AND-OR DAG rooted at `target` by backward expansion.
+
+    Args:
+        graph: The HyperGraph to traverse.
+        target: Target compound ID.
+        gen_mapper: compound_id -> generation mapping.
+        cofactors: Set of cofactor compound IDs (treated as leaves).
+        sources: Optional set of source compounds. If provided, expansion
+                 only follows reactions in their forward closure (see
+                 ``forward_closure``); a residual post-pass drops branches
+                 emptied by cycle cuts.
+        skip_cofactor: Whether to treat cofactors as leaves.
+
+    Returns:
+        (root CompoundNode or None, stats dict)
+    """
+    if sources is None:
+        sources = set()
+    expander = _make_expander(graph, gen_mapper, cofactors, sources, skip_cofactor)
 
     # --- Main entry ---
     if target not in graph.all_compounds and target not in gen_mapper:
-        return None, stats
+        return None, expander.stats
 
-    root = expand_compound(target, frozenset(), 0)
+    root = expander.expand(target)
 
-    # --- Post-pass: prune branches that don't reach any source ---
+    # --- Residual pass: branches emptied by cycle cuts during expansion ---
     if sources:
         root = _prune_unreachable(root, sources)
 
-    return root, stats
+    return root, expander.stats
+
+
+def backward_reachability_batch(
+    graph: HyperGraph,
+    targets: Iterable[str],
+    gen_mapper: Dict[str, float],
+    cofactors: Set[str] | None = None,
+    sources: Set[str] | None = None,
+    skip_cofactor: bool = True,
+) -> Iterator[Tuple[str, Optional[CompoundNode], Dict[str, Any]]]:
+    """
+    ``backward_reachability`` for several targets over one shared memo.
+
+    Targets are expanded in order by a single expander, so a compound
+    already expanded under an earlier target is reused (as the memoized
+    node, or as a shared stub inside a later DAG) instead of being walked
+    again; the forward closure for *sources* is computed once. Yields
+    ``(target, root, stats)`` as each target completes; stats count only the
+    work done for that target, plus ``reused`` when the root itself came
+    from the memo.
+
+    Because stubs may point at nodes expanded under an earlier target, a
+    root is only self-contained together with the roots before it —
+    serialize them into one ``DagBuilder``. Cycle cuts follow the ancestor
+    path of the first expansion, so a reused sub-DAG can differ slightly
+    from a standalone query for the same compound.
+    """
+    if sources is None:
+        sources = set()
+    expander = _make_expander(graph, gen_mapper, cofactors, sources, skip_cofactor)
+
+    for target in targets:
+        expander.stats = _expansion_stats()
+        if target not in graph.all_compounds and target not in gen_mapper:
+            yield target, None, expander.stats
+            continue
+
+        root = expander.memo.get(target)
+        expander.stats["reused"] = root is not None
+        if root is None:
+            root = expander.expand(target)
+        if sources:
+            # Pruning a node only depends on its own sub-DAG, so it is
+            # safe to repeat on memoized nodes shared with earlier roots
+            root = _prune_unreachable(root, sources)
+        yield target, root, expander.stats
+
+
+def _make_expander(
+    graph: HyperGraph,
+    gen_mapper: Dict[str, float],
+    cofactors: Set[str] | None,
+    sources: Set[str] | None,
+    skip_cofactor: bool,
+) -> _BackwardExpander:
+    """Expander with the cofactor mode applied and the source closure computed."""
+    if cofactors is None:
+        cofactors = set()
+    if sources is None:
+        sources = set()
+
+    cofactor_set = cofactors if skip_cofactor else set()
+
+    # --- Source-aware pruning: only descend into reactions the sources can fire ---
+    viable_edges = graph.viable_edges(gen_mapper, cofactor_set, sources) if sources else None
+    return _BackwardExpander(graph, gen_mapper, cofactor_set, sources, viable_edges)
 
 
 def _prune_unreachable(
@@ -406,10 +1280,181 @@ def tree_to_dict(node: CompoundNode) -> Dict[str, Any]:
     return result
 
 
+class DagBuilder:
+    """
+    Incremental DAG-by-reference serializer for AND-OR trees.
+
+    Emits one entry per unique compound and per unique reaction edge;
+    compounds list their producers and reactions their reactants as
+    integer indices into the ``reactions`` / ``compounds`` tables. Shared
+    stubs resolve to the entry of the compound they stand in for, so a
+    memoized sub-DAG is written exactly once; an entry keeps ``isShared``
+    only if its expansion is not part of the tree. Several roots can be added
+    to the same builder to share the tables between them.
+    """
+
+    def __init__(self):
+        self.compounds: List[Dict[str, Any]] = []
+        self.reactions: List[Dict[str, Any]] = []
+        self._compound_index: Dict[str, int] = {}
+        self._reaction_index: Dict[str, int] = {}
+        self._expanded: Set[int] = set()
+        # Entries created or filled in since the last ``take_changes``
+        self._dirty: Set[int] = set()
+        self._reactions_taken = 0
+
+    def _compound_ref(self, node: CompoundNode) -> int:
+        """Index of *node*'s compound entry, creating a placeholder if new."""
+        index = self._compound_index.get(node.id)
+        if index is None:
+            index = len(self.compounds)
+            self._compound_index[node.id] = index
+            self.compounds.append({
+                "id": node.id,
+                "generation": node.generation,
+                "isLeaf": node.is_leaf,
+                "isShared": node.is_shared,
+                "leafReason": node.leaf_reason,
+                "producers": [],
+            })
+            self._dirty.add(index)
+        return index
+
+    def add(self, root: CompoundNode) -> int:
+        """Serialize the DAG under *root*; returns the root's compound index."""
+        root_index = self._compound_ref(root)
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            index = self._compound_ref(node)
+            if node.is_shared or index in self._expanded:
+                continue
+            self._expanded.add(index)
+            self._dirty.add(index)
+
+            entry = self.compounds[index]
+            entry["isLeaf"] = node.is_leaf
+            entry["isShared"] = False
+            entry["leafReason"] = node.leaf_reason
+            producers = entry["producers"]
+            for rxn in node.producers:
+                rxn_index = self._reaction_index.get(rxn.id)
+                if rxn_index is None:
+                    rxn_index = len(self.reactions)
+                    self._reaction_index[rxn.id] = rxn_index
+                    self.reactions.append({
+                        "id": rxn.id,
+                        "reaction": rxn.reaction,
+                        "reactionId": rxn.reaction_id,
+                        "equation": rxn.equation,
+                        "ecList": rxn.ec_list,
+                        "generation": rxn.generation,
+                        "source": rxn.source,
+                        "coenzyme": rxn.coenzyme,
+                        "reactants": [self._compound_ref(child) for child in rxn.reactants],
+                    })
+                producers.append(rxn_index)
+            # Reversed so the walk follows document order
+            stack.extend(reversed([child for rxn in node.producers for child in rxn.reactants]))
+        return root_index
+
+    def take_changes(self) -> Dict[str, List[Tuple[int, Dict[str, Any]]]]:
+        """
+        ``(index, entry)`` pairs added or updated since the previous call.
+
+        Reaction entries never change once written; a compound entry can be
+        sent first as a placeholder and again once its expansion is added.
+        Applying every batch in order reproduces ``compounds`` / ``reactions``.
+        """
+        compounds = [(i, self.compounds[i]) for i in sorted(self._dirty)]
+        start = self._reactions_taken
+        reactions = list(enumerate(self.reactions[start:], start))
+        self._dirty.clear()
+        self._reactions_taken = len(self.reactions)
+        return {"compounds": compounds, "reactions": reactions}
+
+    def to_dict(self, root: Optional[int] = None) -> Dict[str, Any]:
+        """JSON-ready tables; *root* is the entry point for single-root DAGs."""
+        result: Dict[str, Any] = {"format": "dag"}
+        if root is not None:
+            result["root"] = root
+        result["compounds"] = self.compounds
+        result["reactions"] = self.reactions
+        return result
+
+
+def tree_to_dag(node: CompoundNode) -> Dict[str, Any]:
+    """
+    Convert an AND-OR tree to the flat DAG-by-reference format.
+
+    Same content as ``tree_to_dict`` without the repetition::
+
+        {"format": "dag", "root": 0,
+         "compounds": [{"id", "generation", "isLeaf", "isShared", "leafReason",
+                        "producers": [rxn, ...]}],
+         "reactions": [{"id", "reaction", ..., "reactants": [compound, ...]}]}
+    """
+    builder = DagBuilder()
+    return builder.to_dict(builder.add(node))
+
+
 # ---------------------------------------------------------------------------
 # Solution enumeration
 # ---------------------------------------------------------------------------
 
+class MinimalSetFilter:
+    """
+    Online subset-minimality filter over reaction-index bitsets.
+
+    Kept sets live in a set-trie (Savnik, 2013): each set is a path of its
+    bit indices in increasing order. Asking whether some kept set is a
+    subset of a candidate walks only the branches whose bits the candidate
+    has, instead of comparing against every kept set. Offering sets in
+    order of increasing size (as ``minimal_sets`` does) yields exactly the
+    minimal ones; offered in any other order, a set is only checked
+    against those before it.
+    """
+
+    _END = -1  # child key marking the end of a kept set
+
+    def __init__(self):
+        self._root: Dict[int, Any] = {}
+
+    def dominated(self, mask: int) -> bool:
+        """True if a kept set is a subset of (or equal to) *mask*."""
+        end = self._END
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            for bit, child in node.items():
+                if bit == end:
+                    return True
+                if mask >> bit & 1:
+                    stack.append(child)
+        return False
+
+    def offer(self, mask: int) -> bool:
+        """Keep *mask* unless it is dominated; returns whether it was kept."""
+        if self.dominated(mask):
+            return False
+        node = self._root
+        remaining = mask
+        while remaining:
+            low = remaining & -remaining
+            node = node.setdefault(low.bit_length() - 1, {})
+            remaining ^= low
+        node[self._END] = None
+        return True
+
+
+def minimal_sets(masks: List[int]) -> List[int]:
+    """The subset-minimal, distinct bitsets of *masks*, in their original order."""
+    keep = MinimalSetFilter()
+    order = sorted(range(len(masks)), key=lambda i: bin(masks[i]).count("1"))
+    kept = {i for i in order if keep.offer(masks[i])}
+    return [masks[i] for i in sorted(kept)]
+
+
 def enumerate_solutions(
     root: CompoundNode,
     max_solutions: int = 1000,
@@ -422,6 +1467,13 @@ def enumerate_solutions(
       - At every AND-node (reaction) ALL non-cofactor reactants are included.
       - Every leaf is a valid terminal (source, gen-0, cofactor, etc.).
 
+    Partial solutions are reaction-index bitsets. Each compound's list is
+    kept subset-minimal before it is memoized and combined further up, so
+    supersets of another solution are neither returned nor expanded. The
+    cross-product of minimal lists over disjoint reaction sets is minimal
+    by construction, so ``minimal_sets`` only runs where branches share
+    reactions.
+
     Each solution is returned as a list of reaction dicts (the edges used).
 
     Args:
@@ -432,13 +1484,16 @@ def enumerate_solutions(
         List of solutions.  Each solution is a list of
         ``{"reaction", "reaction_id", "equation", "ec_list", "generation"}``.
     """
-    # Memo: compound_id -> list of partial solutions (each a frozenset of reaction names)
-    memo: Dict[str, List[FrozenSet[str]]] = {}
-    # Map reaction name -> detail dict (for output)
-    rxn_detail: Dict[str, Dict[str, Any]] = {}
+    # Memo: compound_id -> list of partial solutions (bitsets over reaction indices)
+    memo: Dict[str, List[int]] = {}
+    # compound_id -> union of its partial solutions
+    support: Dict[str, int] = {}
+    # Reaction name -> bit index, and bit index -> detail dict (for output)
+    rxn_bit: Dict[str, int] = {}
+    rxn_detail: List[Dict[str, Any]] = []
     hit_limit = False
 
-    def _solve_compound(node: CompoundNode) -> List[FrozenSet[str]]:
+    def _solve_compound(node: CompoundNode) -> List[int]:
         """Return list of possible reaction-sets that fully resolve this compound."""
         nonlocal hit_limit
         if hit_limit:
@@ -446,7 +1501,7 @@ def enumerate_solutions(
 
         # Leaf or shared → trivially resolved (no reactions needed)
         if node.is_leaf or node.is_shared:
-            return [frozenset()]
+            return [0]
 
         # Memoization on compound id
         if node.id in memo:
@@ -455,7 +1510,9 @@ def enumerate_solutions(
         # Guard: register empty first to break infinite loops
         memo[node.id] = []
 
-        compound_solutions: List[FrozenSet[str]] = []
+        compound_solutions: List[int] = []
+        producer_bits: List[int] = []
+        producer_supports: List[int] = []
 
         # OR-choice: pick exactly one producer
         for rxn in node.producers:
@@ -463,8 +1520,9 @@ def enumerate_solutions(
                 break
 
             # Store reaction detail for later output
-            if rxn.reaction not in rxn_detail:
-                rxn_detail[rxn.reaction] = {
+            if rxn.reaction not in rxn_bit:
+                rxn_bit[rxn.reaction] = len(rxn_detail)
+                rxn_detail.append({
                     "reaction": rxn.reaction,
                     "reaction_id": rxn.reaction_id,
                     "equation": rxn.equation,
@@ -472,11 +1530,14 @@ def enumerate_solutions(
                     "generation": rxn.generation,
                     "source": rxn.source,
                     "coenzyme": rxn.coenzyme,
-                }
+                })
 
             # AND-combination: need solutions for ALL reactants
             # Start with just this reaction
-            partial: List[FrozenSet[str]] = [frozenset([rxn.reaction])]
+            bit = 1 << rxn_bit[rxn.reaction]
+            partial: List[int] = [bit]
+            partial_support = bit
+            overlap = False
 
             for child in rxn.reactants:
                 if hit_limit:
@@ -486,9 +1547,12 @@ def enumerate_solutions(
                     # This AND-branch is unsatisfiable
                     partial = []
                     break
+                child_support = support.get(child.id, 0) if not (child.is_leaf or child.is_shared) else 0
+                overlap = overlap or bool(partial_support & child_support)
+                partial_support |= child_support
 
                 # Cross-product: merge each partial with each child solution
-                new_partial: List[FrozenSet[str]] = []
+                new_partial: List[int] = []
                 for p in partial:
                     for c in child_solutions:
                         merged = p | c
@@ -500,35 +1564,461 @@ def enumerate_solutions(
                         break
                 partial = new_partial
 
+            if overlap:
+                partial = minimal_sets(partial)
+            producer_bits.append(bit)
+            producer_supports.append(partial_support)
             compound_solutions.extend(partial)
             if len(compound_solutions) >= max_solutions:
                 compound_solutions = compound_solutions[:max_solutions]
                 hit_limit = True
                 break
 
+        # A set from one producer can only contain a set from another if it
+        # uses that other producer's reaction
+        all_bits = 0
+        shared_bit = False
+        for bit in producer_bits:
+            shared_bit = shared_bit or bool(all_bits & bit)
+            all_bits |= bit
+        if shared_bit or any(sup & all_bits & ~bit for bit, sup in zip(producer_bits, producer_supports)):
+            compound_solutions = minimal_sets(compound_solutions)
+
         memo[node.id] = compound_solutions
+        support[node.id] = functools.reduce(operator.or_, compound_solutions, 0)
         return compound_solutions
 
     raw_solutions = _solve_compound(root)
 
-    # Convert frozensets to ordered reaction lists
+    # Convert bitsets to ordered reaction lists
     result: List[List[Dict[str, Any]]] = []
-    seen_sigs: Set[FrozenSet[str]] = set()
-
     for sol in raw_solutions:
-        if sol in seen_sigs:
-            continue
-        seen_sigs.add(sol)
+        rxn_list = []
+        while sol:
+            low = sol & -sol
+            rxn_list.append(rxn_detail[low.bit_length() - 1])
+            sol ^= low
         # Sort reactions by generation for readability
-        rxn_list = sorted(
-            [rxn_detail[name] for name in sol if name in rxn_detail],
-            key=lambda r: r.get("generation", 0),
-        )
+        rxn_list.sort(key=lambda r: r.get("generation", 0))
         result.append(rxn_list)
 
     return result
 
 
+def count_solutions(root: CompoundNode) -> Tuple[int, bool]:
+    """
+    Count the AND-OR solutions under `root` without enumerating them.
+
+    Dynamic programming over the DAG with Python big ints: a leaf or shared
+    stub has one (empty) derivation, an OR-node the sum over its producers,
+    an AND-node the product over its reactants. Each OR-node is evaluated
+    once, so this is linear in the DAG size.
+
+    This counts derivations, which is the solution model of
+    ``enumerate_solutions`` / ``ranked_solutions`` before deduplication.
+    When a reaction name occurs at most once in the DAG, distinct
+    derivations use distinct reaction sets and the count is exact;
+    otherwise it is an upper bound.
+
+    Returns:
+        (count, exact)
+    """
+    counts, exact = _solution_counts(root)
+    return counts[id(root)], exact
+
+
+def _solution_counts(root: CompoundNode) -> Tuple[Dict[int, int], bool]:
+    """Per-OR-node derivation counts (keyed by ``id(node)``) for ``count_solutions``."""
+    counts: Dict[int, int] = {}
+    seen_reactions: Set[str] = set()
+    exact = True
+
+    stack: List[Tuple[CompoundNode, bool]] = [(root, False)]
+    while stack:
+        node, ready = stack.pop()
+        key = id(node)
+        if key in counts:
+            continue
+        if node.is_leaf or node.is_shared or not node.producers:
+            counts[key] = 1
+            continue
+        if not ready:
+            # Children first, then revisit this node
+            stack.append((node, True))
+            stack.extend((child, False) for rxn in node.producers for child in rxn.reactants)
+            continue
+
+        total = 0
+        for rxn in node.producers:
+            if rxn.reaction in seen_reactions:
+                exact = False
+            seen_reactions.add(rxn.reaction)
+            product = 1
+            for child in rxn.reactants:
+                product *= counts[id(child)]
+            total += product
+        counts[key] = total
+
+    return counts, exact
+
+
+def essential_reactions(root: CompoundNode) -> Tuple[List[str], List[str]]:
+    """
+    Reactions and EC numbers that occur in every solution rooted at `root`.
+
+    Dominator-style fixpoint over the DAG, with reaction / EC bitsets:
+
+        E(leaf or stub) = {}
+        E(compound)     = AND over producers r of ( {r} | OR over reactants c of E(c) )
+
+    Each OR-node is evaluated once, after its reactants, which makes the
+    fixpoint a single linear pass over an acyclic DAG. Intersecting over
+    all derivations gives the same answer as over the minimal ones, since
+    every derivation contains a minimal one. EC numbers use the same
+    recurrence with each reaction's ``ec_list`` in place of ``{r}``.
+
+    Returns:
+        (reaction names, EC numbers), each sorted.
+    """
+    reaction_bits: Dict[str, int] = {}
+    ec_bits: Dict[str, int] = {}
+    essential: Dict[int, Tuple[int, int]] = {}
+
+    def _bit(index: Dict[str, int], key: str) -> int:
+        return 1 << index.setdefault(key, len(index))
+
+    stack: List[Tuple[CompoundNode, bool]] = [(root, False)]
+    while stack:
+        node, ready = stack.pop()
+        key = id(node)
+        if key in essential:
+            continue
+        if node.is_leaf or node.is_shared or not node.producers:
+            essential[key] = (0, 0)
+            continue
+        if not ready:
+            stack.append((node, True))
+            stack.extend((child, False) for rxn in node.producers for child in rxn.reactants)
+            continue
+
+        reactions = ecs = -1  # all bits set: identity of the intersection
+        for rxn in node.producers:
+            rxn_reactions = _bit(reaction_bits, rxn.reaction)
+            rxn_ecs = 0
+            for ec in rxn.ec_list:
+                rxn_ecs |= _bit(ec_bits, ec)
+            for child in rxn.reactants:
+                child_reactions, child_ecs = essential[id(child)]
+                rxn_reactions |= child_reactions
+                rxn_ecs |= child_ecs
+            reactions &= rxn_reactions
+            ecs &= rxn_ecs
+        essential[key] = (reactions, ecs)
+
+    reactions, ecs = essential[id(root)]
+    return (
+        sorted(name for name, bit in reaction_bits.items() if reactions >> bit & 1),
+        sorted(ec for ec, bit in ec_bits.items() if ecs >> bit & 1),
+    )
+
+
+class SolutionSpace:
+    """
+    Random access to the solutions of an AND-OR DAG.
+
+    Solutions are numbered ``0 .. total-1`` in a canonical order (producer
+    order at each OR-node, mixed radix over the reactants of an AND-node)
+    and ``solution(i)`` rebuilds the i-th one from the per-node counts of
+    ``count_solutions`` in time proportional to its size. Nothing else is
+    kept, so paging through any number of solutions costs no memory.
+
+    Reactions are reported as indices into ``reactions``, a table of every
+    distinct reaction in the DAG in document order. As with
+    ``count_solutions``, two indices may give the same reaction set when
+    ``exact`` is False.
+    """
+
+    def __init__(self, root: CompoundNode):
+        self.root = root
+        self._counts, self.exact = _solution_counts(root)
+        self.total = self._counts[id(root)]
+
+        self.reactions: List[Dict[str, Any]] = []
+        self._reaction_index: Dict[str, int] = {}
+        visited: Set[int] = set()
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            if id(node) in visited:
+                continue
+            visited.add(id(node))
+            for rxn in node.producers:
+                if rxn.reaction not in self._reaction_index:
+                    self._reaction_index[rxn.reaction] = len(self.reactions)
+                    self.reactions.append({
+                        "reaction": rxn.reaction,
+                        "reaction_id": rxn.reaction_id,
+                        "equation": rxn.equation,
+                        "ec_list": rxn.ec_list,
+                        "generation": rxn.generation,
+                        "source": rxn.source,
+                        "coenzyme": rxn.coenzyme,
+                    })
+            stack.extend(reversed([child for rxn in node.producers for child in rxn.reactants]))
+
+    def _count(self, node: CompoundNode) -> int:
+        return self._counts.get(id(node), 1)
+
+    def solution(self, index: int) -> List[int]:
+        """Sorted reaction-table indices of solution *index*."""
+        if not 0 <= index < self.total:
+            raise IndexError(index)
+        used: Set[int] = set()
+        stack = [(self.root, index)]
+        while stack:
+            node, rank = stack.pop()
+            if node.is_leaf or node.is_shared or not node.producers:
+                continue
+            # OR-node: find the producer whose block contains rank
+            for rxn in node.producers:
+                block = 1
+                for child in rxn.reactants:
+                    block *= self._count(child)
+                if rank < block:
+                    break
+                rank -= block
+            used.add(self._reaction_index[rxn.reaction])
+            # AND-node: split rank into one digit per reactant
+            for child in rxn.reactants:
+                rank, digit = divmod(rank, self._count(child))
+                stack.append((child, digit))
+        return sorted(used)
+
+    def page(self, offset: int, limit: int) -> List[List[int]]:
+        """Solutions ``offset .. offset+limit-1`` (fewer at the end)."""
+        return [self.solution(i) for i in range(offset, min(offset + limit, self.total))]
+
+
+# Ranking criteria for ``ranked_solutions``: per-reaction weight and how
+# weights of an AND-combination are folded together.
+SOLUTION_COSTS: Dict[str, Tuple[Callable[[ReactionNode], float], Callable[..., float]]] = {
+    "reactions": (lambda rxn: 1, lambda *costs: sum(costs)),
+    "max_generation": (lambda rxn: rxn.generation, lambda *costs: max(costs)),
+    "ecs": (lambda rxn: len(rxn.ec_list), lambda *costs: sum(costs)),
+}
+
+# Default work bound of ``top_solutions``: ranking candidates popped (over
+# all OR-nodes) per solution asked for
+RANKED_CANDIDATES_PER_SOLUTION = 200
+
+
+class _RankedDerivations:
+    """
+    Lazy k-best derivations of an AND-OR DAG (Huang & Chiang, 2005, alg. 3).
+
+    A derivation of a compound picks one producer and a derivation of each
+    of its reactants; leaves and shared stubs have exactly one, empty,
+    derivation (as in ``enumerate_solutions``). Each OR-node keeps the
+    derivations found so far in increasing cost plus a heap of candidates,
+    and the (k+1)-th best is only computed when it is asked for.
+
+    Each OR-node's list is kept distinct by reaction set: a candidate
+    whose set repeats one already in the list is dropped as soon as it is
+    popped. Every parent derivation built on it has a counterpart of equal
+    set and no higher cost built on the earlier entry, so duplicates never
+    reach the parents, and the multiplicity a reaction occurring at several
+    OR-nodes adds to the derivation space is not carried up the DAG. Their
+    successors are still queued.
+
+    *max_examined* caps the candidates popped over all OR-nodes; once it
+    is reached ``kth`` answers None and ``truncated`` is set.
+
+    Costs are ``(primary, reaction_count)`` tuples, the count breaking ties.
+    """
+
+    def __init__(self, criterion: str, max_examined: Optional[int] = None):
+        if criterion not in SOLUTION_COSTS:
+            raise ValueError(f"Unknown solution cost: {criterion!r}")
+        self.weight, self.combine = SOLUTION_COSTS[criterion]
+        self.max_examined = max_examined
+        self.examined = 0
+        self.truncated = False
+        # Reaction name -> bit, and bit -> the first ReactionNode seen for it
+        self.bits: Dict[str, int] = {}
+        self.reaction_nodes: List[ReactionNode] = []
+        # id(node) -> [(cost, producer index, reactant ranks, reaction mask)], best first
+        self.derivations: Dict[int, List[Tuple[Tuple[float, int], int, Tuple[int, ...], int]]] = {}
+        self.candidates: Dict[int, List[Tuple[Tuple[float, int], int, int, Tuple[int, ...]]]] = {}
+        self.queued: Dict[int, Set[Tuple[int, Tuple[int, ...]]]] = {}
+        self.masks: Dict[int, Set[int]] = {}
+        self.popped: Dict[int, Tuple[int, Tuple[int, ...]]] = {}  # successors not queued yet
+        self._seq = itertools.count()
+
+    def _cost(self, node: CompoundNode, producer: int, ranks: Tuple[int, ...]) -> Optional[Tuple[float, int]]:
+        """Cost of a candidate, or None if a reactant has fewer derivations."""
+        rxn = node.producers[producer]
+        primary = [self.weight(rxn)]
+        count = 1
+        for child, rank in zip(rxn.reactants, ranks):
+            derivation = self.kth(child, rank)
+            if derivation is None:
+                return None
+            primary.append(derivation[0][0])
+            count += derivation[0][1]
+        return (self.combine(*primary), count)
+
+    def _push(self, node: CompoundNode, producer: int, ranks: Tuple[int, ...]) -> None:
+        key = id(node)
+        if (producer, ranks) in self.queued[key]:
+            return
+        cost = self._cost(node, producer, ranks)
+        if cost is None:
+            return
+        self.queued[key].add((producer, ranks))
+        heapq.heappush(self.candidates[key], (cost, next(self._seq), producer, ranks))
+
+    def _mask(self, node: CompoundNode, producer: int, ranks: Tuple[int, ...]) -> int:
+        """Reaction bitset of a candidate whose reactant derivations are all found."""
+        rxn = node.producers[producer]
+        bit = self.bits.get(rxn.reaction)
+        if bit is None:
+            bit = self.bits[rxn.reaction] = len(self.reaction_nodes)
+            self.reaction_nodes.append(rxn)
+        mask = 1 << bit
+        for child, rank in zip(rxn.reactants, ranks):
+            mask |= self.kth(child, rank)[3]
+        return mask
+
+    def kth(self, node: CompoundNode, k: int) -> Optional[Tuple[Tuple[float, int], int, Tuple[int, ...], int]]:
+        """The k-th best (0-based) derivation of *node*, or None if there are fewer."""
+        if node.is_leaf or node.is_shared or not node.producers:
+            return ((0, 0), -1, (), 0) if k == 0 else None
+
+        key = id(node)
+        found = self.derivations.get(key)
+        if found is None:
+            found = self.derivations[key] = []
+            self.candidates[key] = []
+            self.queued[key] = set()
+            self.masks[key] = set()
+            for producer, rxn in enumerate(node.producers):
+                self._push(node, producer, (0,) * len(rxn.reactants))
+
+        heap = self.candidates[key]
+        while len(found) <= k:
+            last = self.popped.pop(key, None)
+            if last is not None:
+                # Successors of the last candidate: bump one reactant's rank
+                producer, ranks = last
+                for i in range(len(ranks)):
+                    self._push(node, producer, ranks[:i] + (ranks[i] + 1,) + ranks[i + 1:])
+            if not heap:
+                break
+            if self.max_examined is not None and self.examined >= self.max_examined:
+                self.truncated = True
+                break
+            check_cancelled()
+            cost, _, producer, ranks = heapq.heappop(heap)
+            self.examined += 1
+            self.popped[key] = (producer, ranks)
+            mask = self._mask(node, producer, ranks)
+            if mask not in self.masks[key]:
+                self.masks[key].add(mask)
+                found.append((cost, producer, ranks, mask))
+
+        return found[k] if k < len(found) else None
+
+    def reactions(self, mask: int) -> List[Dict[str, Any]]:
+        """Detail dicts of the reactions in *mask*, sorted by generation."""
+        used = []
+        for bit in range(mask.bit_length()):
+            if mask >> bit & 1:
+                rxn = self.reaction_nodes[bit]
+                used.append({
+                    "reaction": rxn.reaction,
+                    "reaction_id": rxn.reaction_id,
+                    "equation": rxn.equation,
+                    "ec_list": rxn.ec_list,
+                    "generation": rxn.generation,
+                    "source": rxn.source,
+                    "coenzyme": rxn.coenzyme,
+                })
+        return sorted(used, key=lambda r: r.get("generation", 0))
+
+
+def ranked_solutions(
+    root: CompoundNode,
+    cost: str = "reactions",
+    max_examined: Optional[int] = None,
+) -> Iterator[Tuple[float, List[Dict[str, Any]]]]:
+    """
+    Lazily yield AND-OR solutions rooted at `root` in increasing cost.
+
+    Same solution model as ``enumerate_solutions`` (one producer per
+    OR-node, all reactants per AND-node), but best-first: only as many
+    derivations are expanded as solutions are consumed, so taking the k
+    cheapest never materializes the cross-product.
+
+    Args:
+        root: The CompoundNode root of the AND-OR tree.
+        cost: Ranking criterion, a key of ``SOLUTION_COSTS``:
+              "reactions" (number of reactions), "max_generation" (latest
+              reaction generation) or "ecs" (EC numbers involved). Costs
+              are summed over the derivation, so a reaction reached along
+              two branches counts twice; ties go to fewer reactions.
+        max_examined: Stop after popping this many candidates in total
+                      (see ``_RankedDerivations``).
+
+    Yields:
+        ``(cost, reactions)`` with each distinct reaction set once, as the
+        same detail dicts ``enumerate_solutions`` returns, sorted by
+        generation. Not filtered for minimality: see ``top_solutions``.
+    """
+    ranking = _RankedDerivations(cost, max_examined)
+    for k in itertools.count():
+        derivation = ranking.kth(root, k)
+        if derivation is None:
+            return
+        yield derivation[0][0], ranking.reactions(derivation[3])
+
+
+def top_solutions(
+    root: CompoundNode,
+    k: int,
+    cost: str = "reactions",
+    minimal: bool = True,
+    max_examined: Optional[int] = None,
+) -> Tuple[List[Tuple[float, List[Dict[str, Any]]]], bool]:
+    """
+    The ``k`` cheapest solutions of `root` (``ranked_solutions``), reduced
+    to the subset-minimal ones among them with ``minimal_sets``.
+
+    The reduction runs once over the k results, so fewer than k may be
+    returned; no further derivations are expanded to replace them.
+
+    Args:
+        max_examined: Work bound, see ``ranked_solutions``. Defaults to
+                      ``RANKED_CANDIDATES_PER_SOLUTION`` per solution asked for.
+
+    Returns:
+        (solutions, complete): ``complete`` is False when the work bound
+        cut the search short, so cheaper solutions may have been missed.
+    """
+    if max_examined is None:
+        max_examined = RANKED_CANDIDATES_PER_SOLUTION * max(k, 1)
+    ranking = _RankedDerivations(cost, max_examined)
+    found = []
+    for rank in range(k):
+        derivation = ranking.kth(root, rank)
+        if derivation is None:
+            break
+        found.append((derivation[0][0], derivation[3]))
+    if minimal:
+        keep = set(minimal_sets([mask for _, mask in found]))
+        found = [(c, mask) for c, mask in found if mask in keep]
+    return [(c, ranking.reactions(mask)) for c, mask in found], not ranking.truncated
+
+
 # ---------------------------------------------------------------------------
 # Flat reaction list extraction (backward compat with existing backtrace)
 # ---------------------------------------------------------------------------
@@ -564,6 +2054,139 @@ def tree_to_flat_reactions(node: CompoundNode) -> List[Dict[str, Any]]:
     return reactions
 
 
+def backtrack_edges(
+    graph: HyperGraph,
+    target: str,
+    gen_mapper: Dict[str, float],
+    cofactors: Optional[Iterable[str]] = None,
+    src_compound: str = "",
+) -> List[Tuple[int, str]]:
+    """
+    ``app.utils.helpers.create_backtrack_df`` on the ``produced_by`` index.
+
+    Same frontier walk, in the same order: for each compound, the edges
+    producing it at their lowest ``product_gen`` (``get_first_occurance``),
+    in row order, whose reactants are queued next. Each lookup is a CSR
+    slice instead of a regex scan over every row of the simulations table.
+
+    Behavior change: a product written with a glued stoichiometric
+    coefficient ("2C00221") is a product here, as everywhere else in the
+    hypergraph; ``get_first_occurance`` only matches IDs delimited by "+"
+    or whitespace and missed those rows.
+
+    Returns:
+        ``(edge index, target compound)`` per row of the legacy frame, in
+        its order before the final sort by generation.
+    """
+    table = graph.edge_table
+    offsets, members = table.reactant_offsets, table.reactant_compounds
+    compound_ids = graph.compound_ids
+
+    rows: List[Tuple[int, str]] = []
+    compounds_to_process = {target}
+    processed_compounds = set(cofactors) if cofactors else set()
+
+    # Upper bound: never trace into compounds with generation > target
+    target_gen = gen_mapper.get(target, np.inf)
+
+    if src_compound:
+        processed_compounds.add(src_compound)
+        stop_gen = gen_mapper.get(src_compound, 0)
+    else:
+        stop_gen = 0
+
+    while compounds_to_process:
+        current_compound = compounds_to_process.pop()
+        current_gen = gen_mapper.get(current_compound, np.inf)
+
+        if current_compound in processed_compounds or current_gen < stop_gen:
+            continue
+        if current_gen > target_gen and current_compound != target:
+            continue
+        # Gen-0 compounds are seeds — no need to trace further
+        if current_gen == 0 and current_compound != target:
+            processed_compounds.add(current_compound)
+            continue
+
+        producing = graph.produced_by.edge_indices(current_compound)
+        product_gen = table.product_gen[producing]
+        if len(producing) and not np.isnan(product_gen).all():
+            # First occurrence: rows at the lowest product generation (NaN never matches)
+            for edge_index in producing[product_gen <= np.nanmin(product_gen)].tolist():
+                rows.append((edge_index, current_compound))
+                # Reactants in text order, queued through a set as the legacy loop does
+                reactants = set([compound_ids[c] for c in members[offsets[edge_index]:offsets[edge_index + 1]].tolist()])
+                compounds_to_process.update(reactants)
+
+        processed_compounds.add(current_compound)
+
+    return rows
+
+
+def backtrack_edges_from(
+    graph: HyperGraph,
+    seeds: Iterable[str],
+    gen_mapper: Dict[str, float],
+    cofactors: Optional[Iterable[str]] = None,
+) -> List[Tuple[int, str]]:
+    """
+    Union of ``backtrack_edges`` over several targets, in one walk.
+
+    Each target bounds its own walk by its generation, so the frontier
+    carries a bound per compound: the highest generation among the seeds
+    that reach it. Compounds are expanded highest bound first, which makes
+    the first visit of a compound the one with its final bound; every
+    compound is then expanded once, however many seed cones overlap there.
+
+    Returns:
+        ``(edge index, target compound)`` rows, one per expanded compound and
+        first-occurrence edge (order unspecified).
+    """
+    table = graph.edge_table
+    offsets, members = table.reactant_offsets, table.reactant_compounds
+    compound_ids = graph.compound_ids
+
+    seed_set = set(seeds)
+    processed_compounds = set(cofactors) if cofactors else set()
+    rows: List[Tuple[int, str]] = []
+
+    order = itertools.count()
+    heap = [(-gen_mapper.get(seed, np.inf), next(order), seed) for seed in sorted(seed_set)]
+    heapq.heapify(heap)
+    while heap:
+        neg_bound, _, compound = heapq.heappop(heap)
+        if compound in processed_compounds:
+            continue
+        gen = gen_mapper.get(compound, np.inf)
+        is_seed = compound in seed_set
+        if gen < 0:
+            continue
+        if gen > -neg_bound and not is_seed:
+            continue
+        # Gen-0 compounds are seeds of the simulation — not traced further
+        if gen == 0 and not is_seed:
+            processed_compounds.add(compound)
+            continue
+        # A seed also has its own walk, bounded by its generation; the
+        # inherited bound only applies where another walk expands it too
+        bound = -neg_bound
+        if is_seed and not 0 < gen <= bound:
+            bound = gen
+
+        producing = graph.produced_by.edge_indices(compound)
+        product_gen = table.product_gen[producing]
+        if len(producing) and not np.isnan(product_gen).all():
+            for edge_index in producing[product_gen <= np.nanmin(product_gen)].tolist():
+                rows.append((edge_index, compound))
+                for c in members[offsets[edge_index]:offsets[edge_index + 1]].tolist():
+                    if compound_ids[c] not in processed_compounds:
+                        heapq.heappush(heap, (-bound, next(order), compound_ids[c]))
+
+        processed_compounds.add(compound)
+
+    return rows
+
+
 def collect_flat_reactions(
     graph: HyperGraph,
     target: str,
@@ -590,15 +2213,36 @@ def collect_flat_reactions(
         reaction, source, coenzyme, equation, transition, target,
         ec_list, reactant_gen, product_gen
     """
+    return flat_reaction_rows(
+        graph, flat_reaction_edges(graph, target, gen_mapper, cofactors, include_lateral)
+    )
+
+
+def flat_reaction_edges(
+    graph: HyperGraph,
+    target: str,
+    gen_mapper: Dict[str, float],
+    cofactors: Set[str],
+    include_lateral: bool = True,
+) -> List[Tuple[int, int]]:
+    """
+    The traversal behind ``collect_flat_reactions``.
+
+    Returns ``(edge index, compound index)`` pairs in output order, one per
+    reaction: the representative edge and the compound that pulled it in.
+    """
     target_gen = gen_mapper.get(target, float("inf"))
+    table = graph.edge_table
+    record = table.record
+    compound_index = graph.compound_index
 
     queue: Set[str] = {target}
     processed: Set[str] = set(cofactors)
     discovered_compounds: Set[str] = set()  # Track all compounds in backward trace
 
-    # reaction_name -> representative HyperEdge (deduplicated)
-    # Also track which *target compound* triggered this reaction
-    seen_rxns: Dict[str, Tuple[HyperEdge, str]] = {}
+    # reaction code -> (representative edge index, compound that pulled it
+    # in); codes stand one-to-one for reaction names
+    seen_rxns: Dict[int, Tuple[int, str]] = {}
 
     while queue:
         compound = queue.pop()
@@ -616,24 +2260,28 @@ def collect_flat_reactions(
             continue
 
         # Find reactions producing this compound (O(1) lookup)
-        producing = graph.produced_by.get(compound, [])
+        index = compound_index.get(compound)
+        if index is None:
+            continue
 
         # Deduplicate edges by reaction name, keep min product_gen
-        best: Dict[str, HyperEdge] = {}
-        for edge in producing:
-            prev = best.get(edge.reaction)
-            if prev is None or edge.product_gen < prev.product_gen:
-                best[edge.reaction] = edge
-
-        # Filter to minimum product_gen (matches get_first_occurance behaviour)
-        if best:
-            min_pgen = min(e.product_gen for e in best.values())
-            best = {k: e for k, e in best.items() if e.product_gen <= min_pgen}
-
-        for rxn_name, edge in best.items():
-            if rxn_name not in seen_rxns:
-                seen_rxns[rxn_name] = (edge, compound)
+        best: Dict[int, Tuple[int, float]] = {}
+        min_pgen = float("inf")
+        for edge_index, code, _, edge_pgen in graph.producers(index):
+            prev = best.get(code)
+            if prev is None or edge_pgen < prev[1]:
+                best[code] = (edge_index, edge_pgen)
+                if edge_pgen < min_pgen:
+                    min_pgen = edge_pgen
+
+        for code, (edge_index, edge_pgen) in best.items():
+            # Only the minimum product_gen (matches get_first_occurance behaviour)
+            if edge_pgen > min_pgen:
+                continue
+            if code not in seen_rxns:
+                seen_rxns[code] = (edge_index, compound)
 
+            edge = record(edge_index)
             # Enqueue non-cofactor reactants
             for reactant in edge.reactants:
                 if reactant not in processed:
@@ -652,40 +2300,113 @@ def collect_flat_reactions(
         # Include the target in lateral search
         compounds_for_lateral = discovered_compounds | {target}
         
-        for compound in compounds_for_lateral:
-            compound_gen = gen_mapper.get(compound, -1)
-            if compound_gen == -1:
-                continue
-            
-            # Find reactions where this compound is consumed (as reactant)
-            consuming = graph.consumed_by.get(compound, [])
-            for edge in consuming:
-                if edge.reaction not in seen_rxns:
-                    # Only include lateral reactions where:
-                    # 1. The reactant generation matches the compound's generation
-                    # 2. The product generation equals reactant generation (same-gen only)
-                    # 3. The generation doesn't exceed target generation
-                    if (edge.reactant_gen == compound_gen and 
-                        edge.product_gen == edge.reactant_gen and
-                        edge.product_gen <= target_gen):
-                        seen_rxns[edge.reaction] = (edge, compound)
-
-    # Build output list in the same shape the table view expects
+        if graph.lateral_edges is not None:
+            # Prebuilt same-generation lists: only the target bound is left
+            for compound in compounds_for_lateral:
+                if gen_mapper.get(compound, -1) == -1:
+                    continue
+                lateral = graph.lateral_edge_indices(compound)
+                for edge_index, code, edge_pgen in zip(
+                    lateral.tolist(),
+                    table.reaction_codes[lateral].tolist(),
+                    table.product_gen[lateral].tolist(),
+                ):
+                    if code not in seen_rxns and edge_pgen <= target_gen:
+                        seen_rxns[code] = (edge_index, compound)
+        else:
+            for compound in compounds_for_lateral:
+                compound_gen = gen_mapper.get(compound, -1)
+                if compound_gen == -1:
+                    continue
+
+                # Find reactions where this compound is consumed (as reactant)
+                index = compound_index.get(compound)
+                if index is None:
+                    continue
+                for edge_index, code, edge_rgen, edge_pgen in graph.consumers(index):
+                    if code not in seen_rxns:
+                        # Only include lateral reactions where:
+                        # 1. The reactant generation matches the compound's generation
+                        # 2. The product generation equals reactant generation (same-gen only)
+                        # 3. The generation doesn't exceed target generation
+                        if (edge_rgen == compound_gen and
+                            edge_pgen == edge_rgen and
+                            edge_pgen <= target_gen):
+                            seen_rxns[code] = (edge_index, compound)
+
+    # Sort by generation (lexsort is stable, like list.sort)
+    pairs = [(edge_index, compound_index[compound]) for edge_index, compound in seen_rxns.values()]
+    edges = np.fromiter((edge_index for edge_index, _ in pairs), dtype=np.int64, count=len(pairs))
+    order = np.lexsort((table.reactant_gen[edges], table.product_gen[edges]))
+    return [pairs[i] for i in order.tolist()]
+
+
+def flat_reaction_rows(graph: HyperGraph, pairs: Iterable[Tuple[int, int]]) -> List[Dict[str, Any]]:
+    """
+    Table-view rows (see ``collect_flat_reactions``) for ``(edge, compound)``
+    pairs, with ``compound_generation`` / ``max_generation`` when the table
+    has its generation columns.
+    """
+    table = graph.edge_table
+    with_generations = table.max_generation is not None
     results: List[Dict[str, Any]] = []
-    for rxn_name, (edge, tgt_cpd) in seen_rxns.items():
-        ec_list = edge.ec_list if edge.ec_list else []
+    for edge_index, compound_index in pairs:
+        edge = table.record(edge_index)
         results.append({
-            "reaction": rxn_name,
+            "reaction": edge.reaction,
             "source": edge.source or "",
             "coenzyme": edge.coenzyme or "",
             "equation": edge.equation or "",
             "transition": f"{int(edge.reactant_gen)} -> {int(edge.product_gen)}",
-            "target": tgt_cpd,
-            "ec_list": ec_list,
+            "target": graph.compound_ids[compound_index],
+            "ec_list": list(edge.ec_list),
             "reactant_gen": edge.reactant_gen,
             "product_gen": edge.product_gen,
         })
-
-    # Sort by generation
-    results.sort(key=lambda r: (r["product_gen"], r["reactant_gen"]))
+        if with_generations:
+            results[-1]["compound_generation"] = table.compound_generation(edge_index)
+            results[-1]["max_generation"] = table.max_compound_generation(edge_index)
     return results
+
+
+@dataclass
+class FlatBacktraceIndex:
+    """
+    Precomputed ``flat_reaction_edges`` for every compound (cofactors skipped,
+    lateral reactions included), as one CSR over compound indices.
+
+    The dataset is static between deploys, so ``app.core.snapshot`` builds
+    this offline and a request becomes a slice plus ``flat_reaction_rows``.
+    """
+    offsets: np.ndarray   # (num_compounds + 1,)
+    edges: np.ndarray     # edge index per row
+    targets: np.ndarray   # compound index that pulled the row in
+
+    @classmethod
+    def build(
+        cls,
+        graph: HyperGraph,
+        gen_mapper: Dict[str, float],
+        cofactors: Set[str],
+    ) -> "FlatBacktraceIndex":
+        offsets = np.zeros(graph.num_compounds + 1, dtype=np.int64)
+        edges: List[int] = []
+        targets: List[int] = []
+        for i, compound in enumerate(graph.compound_ids):
+            for edge_index, compound_index in flat_reaction_edges(graph, compound, gen_mapper, cofactors):
+                edges.append(edge_index)
+                targets.append(compound_index)
+            offsets[i + 1] = len(edges)
+        return cls(
+            offsets=offsets,
+            edges=np.asarray(edges, dtype=index_dtype(len(graph.edge_table))),
+            targets=np.asarray(targets, dtype=index_dtype(graph.num_compounds)),
+        )
+
+    def rows(self, graph: HyperGraph, compound: str) -> List[Dict[str, Any]]:
+        """``collect_flat_reactions(graph, compound, ...)`` by lookup."""
+        index = graph.compound_index.get(compound)
+        if index is None:
+            return []
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return flat_reaction_rows(graph, zip(self.edges[start:end].tolist(), self.targets[start:end].tolist()))
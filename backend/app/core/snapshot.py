@@ -0,0 +1,385 @@
+"""
+Prebuilt, memory-mappable hypergraph snapshot.
+
+Building the hypergraph means parsing ``simulations.csv``,
+``generations.csv`` and ``cofactors.csv`` in every uvicorn worker. This
+module compiles all of that once, offline, into a single binary file that
+the server opens with ``mmap``:
+
+  - the interned compound table
+  - the ``EdgeTable`` columns (categorical codes, EC pool, reactant/product
+    CSR, and the generation columns of ``build_generation_columns``)
+  - the CSR ``produced_by`` / ``consumed_by`` adjacency and lateral index
+  - ``gen_mapper`` and the cofactor list
+  - the ``FlatBacktraceIndex`` (flat backtrace rows of every compound)
+
+Arrays are read straight out of the mapping with ``np.frombuffer``, so
+opening a snapshot costs roughly the same regardless of dataset size, and
+every worker on a box shares the same physical pages through the OS page
+cache. Everything derived from the generations is stored, not rebuilt per
+worker, and strings are decoded lazily: the compound table (and
+``compound_index``) on first use, other strings only for edges a request
+touches.
+
+File layout (all integers little-endian)::
+
+    magic    8 bytes   b"NEBSNAP\\0"
+    version  uint32
+    hdr_len  uint32
+    header   hdr_len bytes of UTF-8 JSON (array table + source fingerprint)
+    arrays   raw array data, each block 64-byte aligned
+
+Compile with::
+
+    python -m app.core.snapshot            # from the backend/ directory
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import mmap
+import os
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.core.hypergraph import EdgeTable, FlatBacktraceIndex, HyperGraph, index_dtype
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC = b"NEBSNAP\0"
+SNAPSHOT_VERSION = 4
+SNAPSHOT_FILENAME = "hypergraph.snap"
+
+# Files the snapshot is compiled from; their size/mtime form the fingerprint
+SOURCE_FILES = ("simulations.csv", "generations.csv", "cofactors.csv")
+
+_PREAMBLE = struct.Struct("<8sII")
+_ALIGN = 64
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def dataset_fingerprint(data_dir: Path) -> Dict[str, List[int]]:
+    """``{filename: [size, mtime_ns]}`` for every snapshot source file."""
+    fingerprint: Dict[str, List[int]] = {}
+    for name in SOURCE_FILES:
+        st = (Path(data_dir) / name).stat()
+        fingerprint[name] = [st.st_size, st.st_mtime_ns]
+    return fingerprint
+
+
+# EdgeTable columns stored verbatim, and (codes, categories) column pairs
+_EDGE_ARRAYS = (
+    "reactant_gen", "product_gen", "generation", "ec_codes",
+    "reactant_offsets", "reactant_compounds", "product_offsets", "product_compounds",
+)
+# Filled in by ``HyperGraph.build_generation_columns``
+_GENERATION_ARRAYS = ("equation_offsets", "equation_compounds", "equation_generations", "max_generation")
+_EDGE_CATEGORIES = (
+    ("reaction_codes", "reactions"),
+    ("reaction_id_codes", "reaction_ids"),
+    ("source_codes", "sources"),
+    ("coenzyme_codes", "coenzymes"),
+    ("direction_codes", "directions"),
+)
+
+
+def _pack_strings(values: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Encode strings as one UTF-8 buffer plus an offsets array."""
+    encoded = [v.encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+class _StringPool:
+    """
+    Random access into a packed string column without decoding all of it.
+    Each entry is decoded on first access and kept.
+    """
+
+    __slots__ = ("_data", "_offsets", "_cache")
+
+    def __init__(self, data: np.ndarray, offsets: np.ndarray):
+        self._data = data
+        self._offsets = offsets
+        self._cache: List[Optional[str]] = [None] * (len(offsets) - 1)
+
+    def __getitem__(self, index: int) -> str:
+        value = self._cache[index]
+        if value is None:
+            value = self._data[self._offsets[index]:self._offsets[index + 1]].tobytes().decode("utf-8")
+            self._cache[index] = value
+        return value
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __iter__(self):
+        return iter(self.tolist())
+
+    def tolist(self) -> List[str]:
+        blob = self._data.tobytes()
+        bounds = self._offsets.tolist()
+        return [blob[bounds[i]:bounds[i + 1]].decode("utf-8") for i in range(len(bounds) - 1)]
+
+
+class _ECListPool(_StringPool):
+    """``_StringPool`` of comma-joined EC lists, read back as tuples."""
+
+    __slots__ = ()
+
+    def __getitem__(self, index: int) -> Tuple[str, ...]:
+        value = self._cache[index]
+        if value is None:
+            text = self._data[self._offsets[index]:self._offsets[index + 1]].tobytes().decode("utf-8")
+            value = self._cache[index] = tuple(text.split(",")) if text else ()
+        return value
+
+    def tolist(self) -> List[Tuple[str, ...]]:
+        return [tuple(text.split(",")) if text else () for text in super().tolist()]
+
+
+# ---------------------------------------------------------------------------
+# Writing
+# ---------------------------------------------------------------------------
+
+def write_snapshot(
+    graph: HyperGraph,
+    gen_mapper: Dict[str, float],
+    cofactors: Sequence[str],
+    path: Path,
+    fingerprint: Optional[Dict[str, List[int]]] = None,
+    flat_index: Optional[FlatBacktraceIndex] = None,
+) -> None:
+    """
+    Serialize a hypergraph plus its lookup tables to *path*.
+
+    The file is written to a temporary sibling and renamed into place, so
+    workers that already mapped the previous snapshot keep a valid view.
+    """
+    table: EdgeTable = graph.edge_table
+    arrays: Dict[str, np.ndarray] = {}
+
+    def add_strings(name: str, values: Sequence[str]) -> None:
+        arrays[f"{name}.data"], arrays[f"{name}.offsets"] = _pack_strings(values)
+
+    add_strings("compounds", graph.compound_ids)
+    arrays["produced_offsets"] = graph.produced_offsets
+    arrays["produced_edges"] = graph.produced_edges
+    arrays["consumed_offsets"] = graph.consumed_offsets
+    arrays["consumed_edges"] = graph.consumed_edges
+
+    if graph.lateral_offsets is None:
+        graph.build_lateral_index(gen_mapper)
+    if table.max_generation is None:
+        graph.build_generation_columns(gen_mapper)
+    arrays["lateral_offsets"] = graph.lateral_offsets
+    arrays["lateral_edges"] = graph.lateral_edges
+
+    for column in _EDGE_ARRAYS + _GENERATION_ARRAYS:
+        arrays[f"edge.{column}"] = getattr(table, column)
+    for codes, categories in _EDGE_CATEGORIES:
+        arrays[f"edge.{codes}"] = getattr(table, codes)
+        add_strings(f"edge.{categories}", list(getattr(table, categories)))
+    add_strings("edge.equations", list(table.equations))
+    add_strings("edge.ec_pool", [",".join(ecs) for ecs in table.ec_pool])
+    row_labels = np.asarray(table.row_labels)
+    if row_labels.dtype.kind in "iu":
+        arrays["edge.row_labels"] = row_labels.astype(np.int64)
+    else:
+        add_strings("edge.row_labels", [str(label) for label in row_labels])
+
+    add_strings("gen_mapper.keys", list(gen_mapper.keys()))
+    arrays["gen_mapper.values"] = np.asarray(list(gen_mapper.values()))
+    add_strings("cofactors", list(cofactors))
+
+    if flat_index is not None:
+        arrays["flat.offsets"] = flat_index.offsets
+        arrays["flat.edges"] = flat_index.edges.astype(index_dtype(len(table)), copy=False)
+        arrays["flat.targets"] = flat_index.targets.astype(index_dtype(graph.num_compounds), copy=False)
+
+    layout: Dict[str, Dict[str, Any]] = {}
+    offset = 0
+    for name, arr in arrays.items():
+        arr = np.ascontiguousarray(arr)
+        arrays[name] = arr
+        offset = -(-offset // _ALIGN) * _ALIGN
+        layout[name] = {"dtype": arr.dtype.str, "shape": list(arr.shape), "offset": offset}
+        offset += arr.nbytes
+
+    header = json.dumps({
+        "arrays": layout,
+        "fingerprint": fingerprint or {},
+        "num_edges": len(table),
+    }).encode("utf-8")
+    data_start = -(-(_PREAMBLE.size + len(header)) // _ALIGN) * _ALIGN
+
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(_PREAMBLE.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(header)))
+        f.write(header)
+        for name, arr in arrays.items():
+            f.seek(data_start + layout[name]["offset"])
+            f.write(arr.tobytes())
+        f.truncate(data_start + offset)
+    os.replace(tmp_path, path)
+
+
+# ---------------------------------------------------------------------------
+# Reading
+# ---------------------------------------------------------------------------
+
+@dataclass
+class Snapshot:
+    """An opened snapshot: the graph plus the lookup tables compiled with it."""
+    graph: HyperGraph
+    gen_mapper: Dict[str, float]
+    cofactors: List[str]
+    fingerprint: Dict[str, List[int]]
+    flat_index: Optional[FlatBacktraceIndex] = None
+
+
+def _open_arrays(path: Path) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+    """Map *path* read-only and return (header, {name: array view})."""
+    with open(path, "rb") as f:
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, version, header_len = _PREAMBLE.unpack_from(buf, 0)
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError(f"{path} is not a hypergraph snapshot")
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f"{path} has snapshot version {version}, expected {SNAPSHOT_VERSION}")
+
+    header = json.loads(bytes(buf[_PREAMBLE.size:_PREAMBLE.size + header_len]).decode("utf-8"))
+    data_start = -(-(_PREAMBLE.size + header_len) // _ALIGN) * _ALIGN
+
+    arrays: Dict[str, np.ndarray] = {}
+    for name, spec in header["arrays"].items():
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"], dtype=np.int64))
+        arrays[name] = np.frombuffer(
+            buf, dtype=dtype, count=count, offset=data_start + spec["offset"]
+        ).reshape(spec["shape"])
+    return header, arrays
+
+
+def load_snapshot(
+    path: Path,
+    expected_fingerprint: Optional[Dict[str, List[int]]] = None,
+) -> Optional[Snapshot]:
+    """
+    Open a snapshot written by ``write_snapshot``.
+
+    Returns None (so the caller can fall back to building from CSV) when the
+    file is missing, unreadable, from another format version, or was
+    compiled from different source files than *expected_fingerprint*.
+    """
+    path = Path(path)
+    if not path.exists():
+        return None
+    try:
+        header, arrays = _open_arrays(path)
+    except (OSError, ValueError, KeyError, struct.error) as e:
+        logger.warning(f"Ignoring hypergraph snapshot {path}: {e}")
+        return None
+
+    if expected_fingerprint is not None and header.get("fingerprint") != expected_fingerprint:
+        logger.warning(f"Hypergraph snapshot {path} is stale; rebuild with `python -m app.core.snapshot`")
+        return None
+
+    def pool(name: str) -> _StringPool:
+        return _StringPool(arrays[f"{name}.data"], arrays[f"{name}.offsets"])
+
+    graph = HyperGraph()
+    compounds = pool("compounds")
+    graph.defer_compounds(compounds)
+    graph._set_adjacency(
+        arrays["produced_offsets"],
+        arrays["produced_edges"],
+        arrays["consumed_offsets"],
+        arrays["consumed_edges"],
+    )
+
+    columns: Dict[str, Any] = {column: arrays[f"edge.{column}"] for column in _EDGE_ARRAYS + _GENERATION_ARRAYS}
+    for codes, categories in _EDGE_CATEGORIES:
+        columns[codes] = arrays[f"edge.{codes}"]
+        columns[categories] = pool(f"edge.{categories}")
+    columns["equations"] = pool("edge.equations")
+    columns["ec_pool"] = _ECListPool(arrays["edge.ec_pool.data"], arrays["edge.ec_pool.offsets"])
+    if "edge.row_labels" in arrays:
+        columns["row_labels"] = arrays["edge.row_labels"]
+    else:
+        columns["row_labels"] = pool("edge.row_labels")
+    graph.edge_table = EdgeTable(compound_ids=compounds, **columns)
+    graph.lateral_offsets = arrays["lateral_offsets"]
+    graph.lateral_edges = arrays["lateral_edges"]
+
+    gen_mapper = dict(zip(pool("gen_mapper.keys").tolist(), arrays["gen_mapper.values"].tolist()))
+    flat_index = None
+    if "flat.offsets" in arrays:
+        flat_index = FlatBacktraceIndex(
+            offsets=arrays["flat.offsets"],
+            edges=arrays["flat.edges"],
+            targets=arrays["flat.targets"],
+        )
+    return Snapshot(
+        graph=graph,
+        gen_mapper=gen_mapper,
+        cofactors=pool("cofactors").tolist(),
+        fingerprint=header.get("fingerprint", {}),
+        flat_index=flat_index,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Offline compile step
+# ---------------------------------------------------------------------------
+
+def compile_snapshot(data_dir: Path, output: Optional[Path] = None, flat_index: bool = True) -> Path:
+    """
+    Build the hypergraph from the CSV sources in *data_dir* and write a snapshot.
+
+    With *flat_index* the flat backtrace of every compound is precomputed
+    too; that is most of the compile time (minutes rather than seconds).
+    """
+    data_dir = Path(data_dir)
+    output = Path(output) if output else data_dir / SNAPSHOT_FILENAME
+
+    fingerprint = dataset_fingerprint(data_dir)
+    df = pd.read_csv(data_dir / "simulations.csv")
+    generation_df = pd.read_csv(data_dir / "generations.csv").set_index("compound_id")
+    gen_mapper = generation_df["modified_generation"].dropna().to_dict()
+    cofactors = pd.read_csv(data_dir / "cofactors.csv").loc[:, "Compound ID"].tolist()
+
+    graph = HyperGraph.from_dataframe(df, gen_mapper)
+    index = None
+    if flat_index:
+        logger.info(f"Precomputing flat backtraces for {graph.num_compounds} compounds")
+        index = FlatBacktraceIndex.build(graph, gen_mapper, set(cofactors))
+    write_snapshot(graph, gen_mapper, cofactors, output, fingerprint, index)
+    return output
+
+
+if __name__ == "__main__":
+    from app import DATA_DIR
+
+    parser = argparse.ArgumentParser(description="Compile the NEBULA hypergraph snapshot")
+    parser.add_argument("--data-dir", type=Path, default=DATA_DIR, help="directory with the CSV sources")
+    parser.add_argument("--output", type=Path, default=None, help=f"snapshot path (default: <data-dir>/{SNAPSHOT_FILENAME})")
+    parser.add_argument("--no-flat-index", action="store_true", help="skip precomputing the flat backtrace index")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    path = compile_snapshot(args.data_dir, args.output, flat_index=not args.no_flat_index)
+    logger.info(f"Wrote hypergraph snapshot to {path} ({path.stat().st_size / 1e6:.1f} MB)")
@@ -1,8 +1,36 @@
+import asyncio
+import logging
+import os
+import threading
+import time
 import requests
+from requests.adapters import HTTPAdapter
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 import pandas as pd
 
+from app import DATA_DIR
+from app.utils.uniprot_cache import UniProtCache
+
+logger = logging.getLogger(__name__)
+
+# UniProt REST API root; point it at a local stand-in to test without the network
+UNIPROT_BASE_URL = os.environ.get("NEBULA_UNIPROT_URL", "https://rest.uniprot.org").rstrip("/")
+# Accession fetches in flight at once (also the connection pool size)
+UNIPROT_CONCURRENCY = int(os.environ.get("NEBULA_UNIPROT_CONCURRENCY", 8))
+UNIPROT_RETRIES = int(os.environ.get("NEBULA_UNIPROT_RETRIES", 3))
+UNIPROT_BACKOFF = float(os.environ.get("NEBULA_UNIPROT_BACKOFF", 0.5))
+# Worth retrying: rate limiting and server-side failures
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+# Persistent entry cache ("" disables it); see app.utils.uniprot_cache
+UNIPROT_CACHE_PATH = os.environ.get("NEBULA_UNIPROT_CACHE", str(DATA_DIR / "uniprot_cache.sqlite"))
+_entry_cache: Optional[UniProtCache] = None
+_entry_cache_ready = False
+
 @dataclass
 class FeatureLocation:
     start: int
@@ -85,21 +113,93 @@ def parse_uniprot_entry(entry_data: Dict, organism_code: str = "") -> UniProtEnt
         organism_code=organism_code
     )
     
+def uniprot_session() -> requests.Session:
+    """
+    The process-wide keep-alive session (requests.Session is safe to share
+    between the fetcher threads; its pool holds one connection per worker).
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(UNIPROT_CONCURRENCY, 1))
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
+def uniprot_cache() -> Optional[UniProtCache]:
+    """The shared on-disk entry cache, or None when disabled."""
+    global _entry_cache, _entry_cache_ready
+    if not _entry_cache_ready:
+        with _session_lock:
+            if not _entry_cache_ready:
+                if UNIPROT_CACHE_PATH:
+                    _entry_cache = UniProtCache(
+                        UNIPROT_CACHE_PATH,
+                        ttl_seconds=float(os.environ.get("NEBULA_UNIPROT_CACHE_TTL", 30 * 86400)),
+                        max_entries=int(os.environ.get("NEBULA_UNIPROT_CACHE_SIZE", 20000)),
+                    )
+                _entry_cache_ready = True
+    return _entry_cache
+
+def set_uniprot_cache(cache: Optional[UniProtCache]) -> None:
+    """Replace the entry cache (None disables caching), e.g. for benchmarks."""
+    global _entry_cache, _entry_cache_ready
+    with _session_lock:
+        _entry_cache = cache
+        _entry_cache_ready = True
+
+def uniprot_get(url: str, params: Optional[Dict] = None, timeout: float = 10) -> requests.Response:
+    """
+    GET through the shared session, retrying connection errors, timeouts
+    and RETRY_STATUSES with exponential backoff (a Retry-After header in
+    seconds is honoured). The last response or exception is returned/raised.
+    """
+    for attempt in range(UNIPROT_RETRIES + 1):
+        last = attempt == UNIPROT_RETRIES
+        try:
+            response = uniprot_session().get(url, params=params, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout):
+            if last:
+                raise
+            delay = UNIPROT_BACKOFF * 2 ** attempt
+        else:
+            if response.status_code not in RETRY_STATUSES or last:
+                return response
+            retry_after = response.headers.get("Retry-After", "")
+            delay = float(retry_after) if retry_after.isdigit() else UNIPROT_BACKOFF * 2 ** attempt
+        logger.info(f"Retrying UniProt request {url} in {delay:.1f}s")
+        time.sleep(delay)
+
 def get_uniprot_entries(ec_id: str, min_results:int = 10) -> List[UniProtEntry]:
     """
     Fetch and parse UniProt entries for given EC number using cursor-based pagination
     to ensure at least 10 results when available
+
+    The accessions found are cached with their entries, so a repeat search
+    for the same EC number is answered from the cache.
     """
-    base_url = "https://rest.uniprot.org/uniprotkb/search"
+    cache = uniprot_cache()
+    if cache is not None:
+        accessions = cache.get(f"ec:{ec_id}")
+        if accessions is not None:
+            cached = cache.get_many(accessions)
+            if len(cached) == len(accessions):
+                return [parse_uniprot_entry(cached[accession]) for accession in accessions]
+
+    base_url = f"{UNIPROT_BASE_URL}/uniprotkb/search"
     params = {
         "query": f"ec:{ec_id}",
         "size": 25
     }
     result = []
+    raw_entries = {}
     
     while True:
         # Make request
-        response = requests.get(base_url, params=params)
+        response = uniprot_get(base_url, params=params)
         response.raise_for_status()
         
         # Parse current page of results
@@ -109,6 +209,7 @@ def get_uniprot_entries(ec_id: str, min_results:int = 10) -> List[UniProtEntry]:
                 result.append(parse_uniprot_entry(entry))
             except KeyError:
                 continue
+            raw_entries[entry['primaryAccession']] = entry
                 
         # Check if we have enough results
         if len(result) >= min_results:
@@ -131,14 +232,18 @@ def get_uniprot_entries(ec_id: str, min_results:int = 10) -> List[UniProtEntry]:
         # Extract cursor and update params for next request
         cursor = next_link.split("cursor=")[1].split("&")[0]
         params["cursor"] = cursor
+
+    if cache is not None:
+        cache.put_many(raw_entries)
+        cache.put(f"ec:{ec_id}", [entry.primary_accession for entry in result])
         
     return result
 
-def fetch_uniprot_by_accession(accession: str) -> Optional[Dict]:
-    """Fetch a single UniProt entry by accession ID"""
-    url = f"https://rest.uniprot.org/uniprotkb/{accession}"
+def download_uniprot_entry(accession: str) -> Optional[Dict]:
+    """Fetch a single UniProt entry by accession ID from the API (no cache)"""
+    url = f"{UNIPROT_BASE_URL}/uniprotkb/{accession}"
     try:
-        response = requests.get(url, timeout=10)
+        response = uniprot_get(url)
         if response.status_code == 404:
             return None
         response.raise_for_status()
@@ -146,10 +251,48 @@ def fetch_uniprot_by_accession(accession: str) -> Optional[Dict]:
     except requests.RequestException:
         return None
 
-def list_accessions_for_ec(ec_id: str, gene_mapper: Dict) -> List[Dict]:
+def fetch_uniprot_by_accession(accession: str) -> Optional[Dict]:
+    """Fetch a single UniProt entry by accession ID, through the entry cache"""
+    cache = uniprot_cache()
+    if cache is not None:
+        entry_data = cache.get(accession)
+        if entry_data is not None:
+            return entry_data
+    entry_data = download_uniprot_entry(accession)
+    if entry_data is not None and cache is not None:
+        cache.put(accession, entry_data)
+    return entry_data
+
+async def fetch_uniprot_entries(accessions: List[str], concurrency: int = UNIPROT_CONCURRENCY) -> List[Optional[Dict]]:
+    """
+    Fetch many UniProt entries: cached ones from the entry cache, the rest
+    concurrently, at most *concurrency* at a time over the shared session.
+
+    Returns:
+        The entry JSON (or None) of each accession, in the order given
+    """
+    cache = uniprot_cache()
+    found = await asyncio.to_thread(cache.get_many, accessions) if cache is not None else {}
+    missing = [accession for accession in dict.fromkeys(accessions) if accession not in found]
+
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+    async def fetch(accession: str) -> Optional[Dict]:
+        async with semaphore:
+            return await asyncio.to_thread(download_uniprot_entry, accession)
+
+    fetched = dict(zip(missing, await asyncio.gather(*(fetch(accession) for accession in missing))))
+    fetched = {accession: entry for accession, entry in fetched.items() if entry is not None}
+    if cache is not None and fetched:
+        await asyncio.to_thread(cache.put_many, fetched)
+    found.update(fetched)
+    return [found.get(accession) for accession in accessions]
+
+def list_accessions_for_ec(ec_id: str, gene_mapper: Dict, search_fallback: bool = True) -> List[Dict]:
     """
     List all accessions for an EC number from the precomputed gene_mapper.
-    Falls back to UniProt API search if no entries found in gene_mapper.
+    Falls back to UniProt API search if no entries found in gene_mapper
+    (unless search_fallback is False).
     
     Returns:
         List of dicts with 'accession' and 'organism_code' keys
@@ -164,7 +307,7 @@ def list_accessions_for_ec(ec_id: str, gene_mapper: Dict) -> List[Dict]:
             result.append({"accession": accession, "organism_code": organism_code})
     
     # Fallback: if gene_mapper has no entries, fetch from UniProt API
-    if not result:
+    if not result and search_fallback:
         entries = get_uniprot_entries(ec_id)
         for entry in entries:
             result.append({
@@ -189,10 +332,11 @@ def get_single_uniprot_entry(accession: str, organism_code: str = "") -> Optiona
     except KeyError:
         return None
 
-def get_uniprot_entries_from_mapper(ec_id: str, gene_mapper: Dict) -> List[UniProtEntry]:
+async def get_uniprot_entries_from_mapper(ec_id: str, gene_mapper: Dict) -> List[UniProtEntry]:
     """
     Look up UniProt accessions from precomputed gene_mapper and fetch each entry
-    by direct accession instead of broad EC search.
+    by direct accession instead of broad EC search. The entries are fetched
+    concurrently (see fetch_uniprot_entries) and kept in gene_mapper order.
     
     Falls back to the older get_uniprot_entries() if no entries are found in gene_mapper.
     
@@ -203,27 +347,21 @@ def get_uniprot_entries_from_mapper(ec_id: str, gene_mapper: Dict) -> List[UniPr
     Returns:
         List of UniProtEntry objects
     """
-    prefix = f"{ec_id}:"
+    listed = list_accessions_for_ec(ec_id, gene_mapper, search_fallback=False)
+    entries_data = await fetch_uniprot_entries([item["accession"] for item in listed])
+
     result = []
-    
-    for key, accessions in gene_mapper.items():
-        if not key.startswith(prefix):
+    for item, entry_data in zip(listed, entries_data):
+        if entry_data is None:
+            continue
+        try:
+            result.append(parse_uniprot_entry(entry_data, organism_code=item["organism_code"]))
+        except KeyError:
             continue
-        organism_code = key[len(prefix):]
-        
-        for accession in accessions:
-            entry_data = fetch_uniprot_by_accession(accession)
-            if entry_data is None:
-                continue
-            try:
-                entry = parse_uniprot_entry(entry_data, organism_code=organism_code)
-                result.append(entry)
-            except KeyError:
-                continue
     
     # Fallback: if gene_mapper has no entries for this EC number, use the older search logic
     if not result:
-        result = get_uniprot_entries(ec_id)
+        result = await asyncio.to_thread(get_uniprot_entries, ec_id)
     
     return result
 
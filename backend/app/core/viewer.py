@@ -1,27 +1,42 @@
-from fastapi import HTTPException, BackgroundTasks
-from fastapi.responses import FileResponse
 import pandas as pd
 import numpy as np
-from typing import Dict, Optional, List
+from typing import Any, Dict, Iterator, Optional, List
+import base64
+import hashlib
 import json
-import tempfile
+import logging
 import os
+import re
+from functools import cached_property
 from pathlib import Path
 
-from app.utils.helpers import create_backtrack_df, parse_ec_list, add_compound_generation
+from app.utils.helpers import parse_ec_list
 from app.core.uniprot import get_uniprot_entries_from_mapper, integrate_ecod_data, filter_important_features, list_accessions_for_ec, get_single_uniprot_entry
-from app.core.hypergraph import HyperGraph, backward_reachability, tree_to_dict, tree_to_flat_reactions, enumerate_solutions, collect_flat_reactions
+from app.core.hypergraph import HyperGraph, DagBuilder, backward_reachability, backward_reachability_batch, backtrack_edges, backtrack_edges_from, tree_to_dict, tree_to_dag, tree_to_flat_reactions, enumerate_solutions, top_solutions, count_solutions, essential_reactions, collect_flat_reactions, SolutionSpace
+from app.core.ec_index import ECIndex, split_ec_list
+from app.core.snapshot import SNAPSHOT_FILENAME, dataset_fingerprint, load_snapshot
+from app.utils.result_cache import ResultCache
+from app.utils.result_store import ResultStore
 
-def get_uniprot_from_ec(ec_number, domains_df):
+logger = logging.getLogger(__name__)
+
+def get_uniprot_from_ec(ec_number, domains_df, ec_index=None):
     """
     Get domain information from domains.csv based on EC number
+
+    With an ``ECIndex`` over the domain rows the EC number may also be a
+    class pattern (``1.1.1.-``, ``2.7.*``) and no table scan is needed.
     """
     try:
         # Clean the EC number (remove any whitespace and ensure proper format)
         ec_number = ec_number.strip()
         
         # Filter based on EC number and select only the required columns
-        result_df = domains_df[domains_df['ec'].str.contains(ec_number, na=False)][
+        if ec_index is not None:
+            matched = domains_df.iloc[ec_index.lookup(ec_number)]
+        else:
+            matched = domains_df[domains_df['ec'].str.contains(ec_number, na=False)]
+        result_df = matched[
             ['organism_name', 'domain_id', 'A', 'X', 'H', 'T', 'F', 'range', 'length']
         ]
         
@@ -37,39 +52,117 @@ def get_uniprot_from_ec(ec_number, domains_df):
         return results
         
     except Exception as e:
-        print(f"Error reading domains data: {e}")
+        logger.error(f"Error reading domains data: {e}")
         return []
 
 class MetabolicViewer:
     def __init__(self):
-        """Initialize the MetabolicViewer with required data files"""
-        BASE_DIR = Path(__file__).parent.parent.parent
-        DATA_DIR = BASE_DIR / "data"
-        
-        # data file
-        self.df = pd.read_csv(DATA_DIR / "simulations.csv")
-        self.generation_df = pd.read_csv(DATA_DIR / "generations.csv")
-        self.domain_df = pd.read_csv(DATA_DIR / "domains.csv")
-        self.ecod_df = pd.read_csv(DATA_DIR / "ecod_domains.csv")
-        self.cof_df = pd.read_csv(DATA_DIR / "cofactors.csv")
-        self.cofactors = self.cof_df.loc[:, 'Compound ID'].tolist()
-        
-        with open(DATA_DIR / "gene_mapper.json", "r") as f:
-            self.gene_mapper = json.load(f)
-        
-        # processing the data
-        self.generation_df.set_index("compound_id", inplace=True)
-        self.gen_mapper = self.generation_df["modified_generation"].dropna().to_dict()
-        self.current_df: Optional[pd.DataFrame] = None
-        self.current_target: Optional[str] = None
+        """
+        Initialize the MetabolicViewer.
 
-        # Build hypergraph index for AND-OR backward reachability
-        self.hypergraph = HyperGraph.from_dataframe(self.df)
+        The hypergraph, gen_mapper and cofactor list come from the prebuilt
+        snapshot when one matching the current data files exists (see
+        ``app.core.snapshot``); otherwise they are built from the CSVs.
+        The remaining tables are read lazily on first use.
+        """
+        BASE_DIR = Path(__file__).parent.parent.parent
+        self.data_dir = BASE_DIR / "data"
+
+        fingerprint = dataset_fingerprint(self.data_dir)
+        # Changes whenever the source data does; part of every cache key
+        self.dataset_version = hashlib.sha1(
+            json.dumps(fingerprint, sort_keys=True).encode("utf-8")
+        ).hexdigest()[:16]
+
+        # Serialized /api/backtrace/tree responses
+        self.tree_cache = ResultCache(
+            max_entries=int(os.environ.get("NEBULA_TREE_CACHE_SIZE", 256)),
+            ttl_seconds=float(os.environ.get("NEBULA_TREE_CACHE_TTL", 3600)),
+        )
+        # AND-OR DAGs behind /api/backtrace/solutions, reused across pages
+        self.solution_cache = ResultCache(
+            max_entries=int(os.environ.get("NEBULA_SOLUTION_CACHE_SIZE", 32)),
+            ttl_seconds=float(os.environ.get("NEBULA_TREE_CACHE_TTL", 3600)),
+        )
+        # Backtrace results behind /api/download/{result_id}; filled by the
+        # server process (see app.utils.result_store)
+        self.result_store = ResultStore(
+            max_entries=int(os.environ.get("NEBULA_RESULT_STORE_SIZE", 128)),
+            ttl_seconds=float(os.environ.get("NEBULA_RESULT_STORE_TTL", 3600)),
+        )
+
+        snapshot = load_snapshot(
+            self.data_dir / SNAPSHOT_FILENAME,
+            expected_fingerprint=fingerprint,
+        )
+        if snapshot is not None:
+            logger.info("Loaded hypergraph snapshot")
+            self.hypergraph = snapshot.graph
+            self.gen_mapper = snapshot.gen_mapper
+            self.cofactors = snapshot.cofactors
+            # Precomputed flat backtraces (cofactors skipped), if compiled in
+            self.flat_index = snapshot.flat_index
+        else:
+            self.flat_index = None
+            self.gen_mapper = self.generation_df["modified_generation"].dropna().to_dict()
+            self.cofactors = self.cof_df.loc[:, 'Compound ID'].tolist()
+            # Build hypergraph index for AND-OR backward reachability
+            self.hypergraph = HyperGraph.from_dataframe(self.df, self.gen_mapper)
+
+    # data files, read on first use
+    @cached_property
+    def df(self) -> pd.DataFrame:
+        return pd.read_csv(self.data_dir / "simulations.csv")
+
+    @cached_property
+    def generation_df(self) -> pd.DataFrame:
+        return pd.read_csv(self.data_dir / "generations.csv").set_index("compound_id")
+
+    @cached_property
+    def domain_df(self) -> pd.DataFrame:
+        return pd.read_csv(self.data_dir / "domains.csv")
+
+    @cached_property
+    def ecod_df(self) -> pd.DataFrame:
+        return pd.read_csv(self.data_dir / "ecod_domains.csv")
+
+    @cached_property
+    def cof_df(self) -> pd.DataFrame:
+        return pd.read_csv(self.data_dir / "cofactors.csv")
+
+    @cached_property
+    def gene_mapper(self) -> Dict:
+        with open(self.data_dir / "gene_mapper.json", "r") as f:
+            return json.load(f)
+
+    @cached_property
+    def edge_of_row(self) -> Dict[Any, int]:
+        """simulations.csv row label -> edge index."""
+        return {label: i for i, label in enumerate(np.asarray(self.hypergraph.edge_table.row_labels).tolist())}
+
+    # EC number -> rows, built on first use (see ``app.core.ec_index``)
+    @cached_property
+    def ec_index(self) -> ECIndex:
+        """Edge indices of the reactions citing each EC number."""
+        table = self.hypergraph.edge_table
+        return ECIndex.from_lists(table.ec_pool[code] for code in table.ec_codes.tolist())
+
+    @cached_property
+    def domain_ec_index(self) -> ECIndex:
+        """Positions of the domains.csv rows of each EC number."""
+        return ECIndex.from_lists(split_ec_list(ec) for ec in self.domain_df['ec'].tolist())
+
+    def list_ec_numbers(self, pattern: str) -> Dict:
+        """EC numbers with reactions under a class pattern, with their reaction counts."""
+        try:
+            return {"data": [{"ec": ec, "reactions": count} for ec, count in self.ec_index.ec_numbers(pattern)]}
+        except Exception as e:
+            return {"data": [], "error": str(e)}
 
     async def get_ec_data(self, ec_number: str) -> Dict:
-        """Get UniProt data for an EC number"""
+        """Get UniProt data for an EC number (or class pattern)"""
         try:
-            uniprot_data = get_uniprot_from_ec(ec_number, self.domain_df)
+            uniprot_data = get_uniprot_from_ec(ec_number, self.domain_df, self.domain_ec_index)
             return {"data": uniprot_data}
         except Exception as e:
             return {"error": str(e)}
@@ -77,7 +170,7 @@ class MetabolicViewer:
     async def get_ec_uniprot_data(self, ec_number: str) -> Dict:
         """Get UniProt data for an EC number"""
         try:
-            entries = get_uniprot_entries_from_mapper(ec_number, self.gene_mapper)
+            entries = await get_uniprot_entries_from_mapper(ec_number, self.gene_mapper)
             entries = [filter_important_features(entry) for entry in entries]
             return {"data": entries}
         except Exception as e:
@@ -86,7 +179,7 @@ class MetabolicViewer:
     async def get_ec_domains(self, ec_number: str) -> Dict:
         """Get integrated domain data for an EC number"""
         try:
-            entries = get_uniprot_entries_from_mapper(ec_number, self.gene_mapper)
+            entries = await get_uniprot_entries_from_mapper(ec_number, self.gene_mapper)
             entries = [filter_important_features(entry) for entry in entries]
             entries = integrate_ecod_data(entries, self.ecod_df, self.domain_df)
             return {"data": entries}
@@ -119,58 +212,100 @@ class MetabolicViewer:
         Returns reaction pathway data including EC numbers
         """
         try:
-            self.current_target = target
-            
             if skip_cofactor:
                 cofactors = self.cofactors
             else:
                 cofactors = []
             
-            backtrack_df = create_backtrack_df(self.df, target, self.gen_mapper, cofactors, source)
+            backtrack_df = self._backtrack_frame(
+                backtrack_edges(self.hypergraph, target, self.gen_mapper, cofactors, source)
+            )
             
             if backtrack_df.empty:
                 return {"data": []}
             
-            # Replace NaN/inf values before creating transition
-            backtrack_df = backtrack_df.replace([np.inf, -np.inf], None)
-            backtrack_df = backtrack_df.fillna('N/A')
+            display_df = self._display_frame(backtrack_df)
             
-            # Parse EC list into proper list format
-            backtrack_df['ec_list'] = backtrack_df['ec_list'].apply(parse_ec_list)
-            
-            # Create display DataFrame with all required columns
-            display_df = pd.DataFrame({
-                'reaction': backtrack_df['reaction'],
-                'source': backtrack_df['source'],
-                'coenzyme': backtrack_df['coenzyme'],
-                'equation': backtrack_df['equation'],
-                'transition': backtrack_df.apply(
-                    lambda row: f"{int(row.get('reactant_gen'))} -> {int(row.get('product_gen'))}", 
-                    axis=1
-                ),
-                'target': backtrack_df['target'],
-                'ec_list': backtrack_df['ec_list'],
-            })
-            
-            self.current_df = display_df.copy()
-            
-            # drop duplicate reaction entry
-            display_df.drop_duplicates(["equation"], inplace=True)
-            
-            # aggrigate data
-            agg_df = {col: 'first' for col in display_df.columns if col != "reaction"}
-            agg_df['target'] = lambda x: ', '.join(x)
-            display_df = display_df.groupby("reaction").agg(agg_df).reset_index()
-            display_df = display_df.sort_values(['transition'])
-            # add product generation
-            display_df.loc[:, "compound_generation"] = display_df.equation.apply(lambda x: add_compound_generation(x, self.gen_mapper))
-            display_df.loc[:, "max_generation"] = display_df["compound_generation"].apply(lambda x: max(x.values()))
-            display_df = display_df.sort_values("max_generation") 
-            
-            return {"data": display_df.to_dict('records')}
+            return {"data": self._display_records(display_df)}
         except Exception as e:
             return {"data": [], "error": str(e)}
 
+    def _display_frame(self, backtrack_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Table-view columns of a ``_backtrack_frame``, one row per (reaction,
+        target), plus the ``edge`` index that ``_display_records`` consumes.
+        """
+        return pd.DataFrame({
+            'reaction': backtrack_df['reaction'],
+            'source': backtrack_df['source'],
+            'coenzyme': backtrack_df['coenzyme'],
+            'equation': backtrack_df['equation'],
+            'transition': backtrack_df.apply(
+                lambda row: f"{int(row['reactant_gen']) if row['reactant_gen'] != 'N/A' else 0} -> {int(row['product_gen']) if row['product_gen'] != 'N/A' else 0}",
+                axis=1
+            ),
+            'target': backtrack_df['target'],
+            'ec_list': backtrack_df['ec_list'],
+            'edge': backtrack_df['edge'],
+        })
+
+    def _display_records(self, display_df: pd.DataFrame) -> List[Dict]:
+        """
+        One record per reaction (targets joined), ordered by generation.
+
+        *display_df* carries an ``edge`` column (edge index of each row) used
+        to attach the precomputed compound generations; it is not returned.
+        """
+        # drop duplicate reaction entry
+        display_df = display_df.drop_duplicates(["equation"])
+        
+        # aggrigate data
+        agg_df = {col: 'first' for col in display_df.columns if col != "reaction"}
+        agg_df['target'] = lambda x: ', '.join(x)
+        display_df = display_df.groupby("reaction").agg(agg_df).reset_index()
+        display_df = display_df.sort_values(['transition'])
+        # add product generation (precomputed per edge, see build_generation_columns)
+        table = self.hypergraph.edge_table
+        edges = display_df.pop('edge').tolist()
+        display_df.loc[:, "compound_generation"] = [table.compound_generation(e) for e in edges]
+        display_df.loc[:, "max_generation"] = [table.max_compound_generation(e) for e in edges]
+        display_df = display_df.sort_values("max_generation") 
+        
+        return display_df.to_dict('records')
+
+    def _backtrack_frame(self, rows: List[tuple]) -> pd.DataFrame:
+        """
+        The ``create_backtrack_df`` frame for ``backtrack_edges`` rows, read
+        from the edge table (no simulations.csv access), sorted by generation,
+        with NaN shown as 'N/A' and EC lists parsed.
+        """
+        if not rows:
+            return pd.DataFrame()
+        table = self.hypergraph.edge_table
+        edges = np.fromiter((edge for edge, _ in rows), dtype=np.int64, count=len(rows))
+
+        def strings(codes: np.ndarray, categories) -> List[str]:
+            # Missing strings are stored as ""
+            return [categories[c] or 'N/A' for c in codes[edges].tolist()]
+
+        def generations(values: np.ndarray) -> List[Any]:
+            # inf and NaN both end up 'N/A'
+            return ['N/A' if not np.isfinite(v) else v for v in values[edges].tolist()]
+
+        backtrack_df = pd.DataFrame({
+            'reaction': [table.reactions[c] for c in table.reaction_codes[edges].tolist()],
+            'source': strings(table.source_codes, table.sources),
+            'coenzyme': strings(table.coenzyme_codes, table.coenzymes),
+            'equation': [table.equations[e] or 'N/A' for e in edges.tolist()],
+            'reactant_gen': generations(table.reactant_gen),
+            'product_gen': generations(table.product_gen),
+            'generation': table.generation[edges],
+            'target': [compound for _, compound in rows],
+            'ec_list': [list(table.ec_pool[c]) or ['N/A'] for c in table.ec_codes[edges].tolist()],
+            'edge': edges,
+        })
+        return backtrack_df.sort_values('generation').reset_index(drop=True)
+
     async def get_reaction_backtrace(self, reaction_id: str, skip_cofactor=True) -> Dict:
         """
         Given a reaction ID, show that reaction and backtrace its source
@@ -178,7 +313,6 @@ class MetabolicViewer:
         Returns the reaction itself plus all upstream backtrace results.
         """
         try:
-            import re as _re
             # Match rows where reaction_id column equals the given ID
             reaction_rows = self.df[self.df['reaction_id'] == reaction_id]
             if reaction_rows.empty:
@@ -190,55 +324,48 @@ class MetabolicViewer:
                 cofactors = set()
 
             # ── Build result rows for the reaction itself ──
-            rx_df = reaction_rows.copy()
-            rx_df = rx_df.replace([np.inf, -np.inf], None).fillna('N/A')
-            rx_df['ec_list'] = rx_df['ec_list'].apply(parse_ec_list)
+            # Rows without an edge (no compounds parsed) are not shown
+            edges = pd.Series(
+                [self.edge_of_row.get(label) for label in reaction_rows.index.tolist()],
+                index=reaction_rows.index, dtype=object,
+            )
+            rx_df = reaction_rows[edges.notna()].replace([np.inf, -np.inf], None).fillna('N/A')
+
+            def generation_ints(column: str) -> pd.Series:
+                # 'N/A' (missing or infinite) shows as 0
+                return pd.to_numeric(rx_df[column], errors='coerce').fillna(0).astype(int).astype(str)
 
             display_df = pd.DataFrame({
                 'reaction': rx_df['reaction'],
                 'source': rx_df['source'],
                 'coenzyme': rx_df['coenzyme'],
                 'equation': rx_df['equation'],
-                'transition': rx_df.apply(
-                    lambda row: f"{int(row['reactant_gen']) if row['reactant_gen'] not in (None, 'N/A') else 0} -> {int(row['product_gen']) if row['product_gen'] not in (None, 'N/A') else 0}",
-                    axis=1
-                ),
+                'transition': generation_ints('reactant_gen') + ' -> ' + generation_ints('product_gen'),
                 'target': rx_df['products'],
-                'ec_list': rx_df['ec_list'],
+                'ec_list': rx_df['ec_list'].map(parse_ec_list),
+                'edge': edges[rx_df.index],
             })
-            display_df.drop_duplicates(["equation"], inplace=True)
-            agg_df = {col: 'first' for col in display_df.columns if col != "reaction"}
-            agg_df['target'] = lambda x: ', '.join(x)
-            display_df = display_df.groupby("reaction").agg(agg_df).reset_index()
-            display_df = display_df.sort_values(['transition'])
-            display_df.loc[:, "compound_generation"] = display_df.equation.apply(
-                lambda x: add_compound_generation(x, self.gen_mapper)
-            )
-            display_df.loc[:, "max_generation"] = display_df["compound_generation"].apply(
-                lambda x: max(x.values()) if x else 0
-            )
-            display_df = display_df.sort_values("max_generation")
-            reaction_self_rows = display_df.to_dict('records')
+            reaction_self_rows = self._display_records(display_df) if not display_df.empty else []
 
-            # ── Collect reactant compounds and backtrace them ──
-            reactant_compounds = set()
-            for _, row in reaction_rows.iterrows():
-                reactants_str = str(row.get('reactants', ''))
-                reactant_compounds.update(_re.findall(r'[CZ]\d{5}', reactants_str))
+            # ── Collect reactant compounds and backtrace them together ──
+            reactant_compounds = set(re.findall(r'[CZ]\d{5}', ' '.join(reaction_rows['reactants'].astype(str))))
 
             compounds_to_trace = reactant_compounds - cofactors
 
             all_results = list(reaction_self_rows)
             seen = {row.get('reaction', '') for row in all_results}
 
-            for compound in compounds_to_trace:
-                result = await self.get_backtrace(compound, skip_cofactor=skip_cofactor)
-                if result.get('data'):
-                    for row in result['data']:
-                        key = row.get('reaction', '')
-                        if key not in seen:
-                            seen.add(key)
-                            all_results.append(row)
+            # One walk seeded with every reactant: shared upstream cones are
+            # expanded once (see ``backtrack_edges_from``)
+            backtrack_df = self._backtrack_frame(
+                backtrack_edges_from(self.hypergraph, compounds_to_trace, self.gen_mapper, cofactors)
+            )
+            if not backtrack_df.empty:
+                for row in self._display_records(self._display_frame(backtrack_df)):
+                    key = row.get('reaction', '')
+                    if key not in seen:
+                        seen.add(key)
+                        all_results.append(row)
 
             return {"data": all_results}
         except Exception as e:
@@ -248,13 +375,15 @@ class MetabolicViewer:
         """
         Given an EC number, find all reactions that reference it and return
         them in the same format as compound backtrace results.
+
+        The EC number may be a class pattern (``1.1.1.-``, ``2.7.*``) to
+        list every reaction of an enzyme class.
         """
         try:
-            import re as _re
-            # Filter rows where ec_list contains the exact EC number
-            escaped = _re.escape(ec_number)
-            pattern = rf'(?:^|[,\s]){escaped}(?:[,\s]|$)'
-            ec_rows = self.df[self.df['ec_list'].str.contains(pattern, na=False, regex=True)].copy()
+            # Rows whose ec_list cites a matching EC number, from the index
+            edges = self.ec_index.lookup(ec_number)
+            row_labels = self.hypergraph.edge_table.row_labels
+            ec_rows = self.df.loc[[row_labels[e] for e in edges.tolist()]].copy()
             if ec_rows.empty:
                 return {"data": []}
 
@@ -277,27 +406,11 @@ class MetabolicViewer:
                 ),
                 'target': ec_rows.get('products', 'N/A'),
                 'ec_list': ec_rows['ec_list'],
+                'edge': edges,
             })
 
-            # Deduplicate by equation
-            display_df.drop_duplicates(["equation"], inplace=True)
-
-            # Aggregate by reaction
-            agg_df = {col: 'first' for col in display_df.columns if col != "reaction"}
-            agg_df['target'] = lambda x: ', '.join(x)
-            display_df = display_df.groupby("reaction").agg(agg_df).reset_index()
-            display_df = display_df.sort_values(['transition'])
-
-            # Add compound generation info
-            display_df.loc[:, "compound_generation"] = display_df.equation.apply(
-                lambda x: add_compound_generation(x, self.gen_mapper)
-            )
-            display_df.loc[:, "max_generation"] = display_df["compound_generation"].apply(
-                lambda x: max(x.values()) if x else 0
-            )
-            display_df = display_df.sort_values("max_generation")
-
-            return {"data": display_df.to_dict('records')}
+            # Deduplicate by equation, aggregate by reaction, add generations
+            return {"data": self._display_records(display_df)}
         except Exception as e:
             return {"data": [], "error": str(e)}
 
@@ -306,6 +419,9 @@ class MetabolicViewer:
         target: str,
         sources: List[str] = None,
         skip_cofactor: bool = True,
+        tree_format: str = "tree",
+        ranking: str = "reactions",
+        max_solutions: int = 500,
     ) -> Dict:
         """
         AND-OR hypergraph backward reachability from target.
@@ -319,6 +435,12 @@ class MetabolicViewer:
             sources: Optional list of source compound IDs. If provided,
                      prune branches that don't reach any source.
             skip_cofactor: Whether to treat cofactors as leaves.
+            tree_format: "tree" for nested dicts, "dag" for the flat
+                         by-reference tables (see ``tree_to_dag``).
+            ranking: Solution cost to rank by (a key of ``SOLUTION_COSTS``);
+                     "none" keeps the unranked DFS enumeration.
+            max_solutions: Number of solutions to rank; the subset-minimal
+                           ones among them are returned.
         """
         try:
             cofactors = set(self.cofactors) if skip_cofactor else set()
@@ -336,29 +458,32 @@ class MetabolicViewer:
             if root is None:
                 return {"target": target, "sources": sources or [], "tree": None, "stats": stats, "solutions": [], "data": []}
 
-            tree_dict = tree_to_dict(root)
+            tree_dict = tree_to_dag(root) if tree_format == "dag" else tree_to_dict(root)
 
-            # Enumerate minimal solutions
-            solutions = enumerate_solutions(root, max_solutions=500)
+            # The cheapest solutions first, or the first ones in DFS order
+            if ranking == "none":
+                solutions = [(None, sol) for sol in enumerate_solutions(root, max_solutions=max_solutions)]
+            else:
+                solutions, stats["solutions_complete"] = top_solutions(root, max_solutions, ranking)
             solution_summaries = []
-            for i, sol in enumerate(solutions):
+            for i, (cost, sol) in enumerate(solutions):
                 solution_summaries.append({
                     "id": i,
                     "reactionCount": len(sol),
+                    "cost": cost,
                     "reactions": sol,
                 })
 
             stats["total_solutions"] = len(solution_summaries)
+            # Big int as a string: JSON consumers may not hold it exactly
+            solution_count, exact = count_solutions(root)
+            stats["solution_count"] = str(solution_count)
+            stats["solution_count_exact"] = exact
+            # Reactions / ECs every pathway needs
+            stats["essential_reactions"], stats["essential_ecs"] = essential_reactions(root)
 
             # Flat reaction list (powers table / 2D / 3D views)
-            flat_rows = collect_flat_reactions(
-                self.hypergraph, target, self.gen_mapper, cofactors
-            )
-            # Add compound_generation + max_generation (table view needs these)
-            for row in flat_rows:
-                cpd_gen = add_compound_generation(row["equation"], self.gen_mapper)
-                row["compound_generation"] = cpd_gen
-                row["max_generation"] = max(cpd_gen.values()) if cpd_gen else 0
+            flat_rows = self._flat_rows(target, skip_cofactor, cofactors)
 
             return {
                 "target": target,
@@ -371,25 +496,236 @@ class MetabolicViewer:
         except Exception as e:
             return {"target": target, "sources": sources or [], "tree": None, "stats": {}, "solutions": [], "data": [], "error": str(e)}
 
-    async def download_csv(self, background_tasks: BackgroundTasks) -> FileResponse:
-        """Generate and return a CSV file of the current dataframe"""
-        if self.current_df is None:
-            raise HTTPException(status_code=400, detail="No data available for download")
-        
+    def _flat_rows(self, target: str, skip_cofactor: bool, cofactors: set) -> List[Dict]:
+        """Flat reaction rows for *target*, including the table view's generation columns."""
+        if skip_cofactor and self.flat_index is not None:
+            flat_rows = self.flat_index.rows(self.hypergraph, target)
+        else:
+            flat_rows = collect_flat_reactions(
+                self.hypergraph, target, self.gen_mapper, cofactors
+            )
+        # compound_generation + max_generation come precomputed with the rows
+        return flat_rows
+
+    def _backtrace_batch(
+        self,
+        targets: List[str],
+        sources: Optional[List[str]],
+        skip_cofactor: bool,
+        builder: DagBuilder,
+    ) -> Iterator[Dict]:
+        """Per-target results of one shared traversal, serialized into *builder*."""
+        cofactors = set(self.cofactors) if skip_cofactor else set()
+        source_set = set(sources) if sources else set()
+        for target, root, stats in backward_reachability_batch(
+            self.hypergraph,
+            targets,
+            self.gen_mapper,
+            cofactors,
+            source_set,
+            skip_cofactor,
+        ):
+            if root is None:
+                yield {"target": target, "root": None, "stats": stats, "data": []}
+                continue
+            yield {
+                "target": target,
+                "root": builder.add(root),
+                "stats": stats,
+                "data": self._flat_rows(target, skip_cofactor, cofactors),
+            }
+
+    def iter_backtrace_batch(
+        self,
+        targets: List[str],
+        sources: List[str] = None,
+        skip_cofactor: bool = True,
+    ) -> Iterator[Dict]:
+        """
+        Backtrace several targets in one traversal, yielding as each completes.
+
+        All targets share one expansion memo (see
+        ``backward_reachability_batch``), so upstream work common to several
+        targets is done once, and one set of DAG tables: each result carries
+        its ``root`` index and, under ``dag``, the ``(index, entry)`` table
+        rows added or updated since the previous result (see
+        ``DagBuilder.take_changes``). Applying the deltas in order rebuilds
+        the tables of ``get_backtrace_batch``.
+
+        Per-target solution stats are not computed here, since a later root
+        may stop at stubs expanded under an earlier one; use
+        ``get_backtrace_tree`` for those.
+
+        Yields:
+            {"target", "root", "stats", "data", "dag"} per target, or
+            {"error"} once if the traversal fails.
+        """
+        builder = DagBuilder()
         try:
-            with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.csv') as tmp_file:
-                self.current_df.to_csv(tmp_file.name, index=False)
-                tmp_file_path = tmp_file.name
+            for result in self._backtrace_batch(targets, sources, skip_cofactor, builder):
+                result["dag"] = builder.take_changes()
+                yield result
+        except Exception as e:
+            yield {"error": str(e)}
 
-            filename = f"metabolic_pathway_{self.current_target or 'data'}.csv"
-            
-            # Schedule cleanup task
-            background_tasks.add_task(os.unlink, tmp_file_path)
-            
-            return FileResponse(
-                path=tmp_file_path,
-                filename=filename,
-                media_type='text/csv'
+    async def get_backtrace_batch(
+        self,
+        targets: List[str],
+        sources: List[str] = None,
+        skip_cofactor: bool = True,
+    ) -> Dict:
+        """
+        ``iter_backtrace_batch`` as a single response.
+
+        Returns:
+            {"sources", "tree": shared DAG tables, "results": [{"target",
+            "root", "stats", "data"}, ...]}
+        """
+        builder = DagBuilder()
+        try:
+            results = list(self._backtrace_batch(targets, sources, skip_cofactor, builder))
+            return {"sources": sources or [], "tree": builder.to_dict(), "results": results}
+        except Exception as e:
+            return {"sources": sources or [], "tree": None, "results": [], "error": str(e)}
+
+    def _tree_cache_key(
+        self,
+        target: str,
+        sources: Optional[List[str]],
+        skip_cofactor: bool,
+        *options: Any,
+    ) -> tuple:
+        """Normalized (target, sorted sources, cofactor mode, *options, dataset version)."""
+        source_key = tuple(sorted({s.strip().upper() for s in sources or [] if s.strip()}))
+        return (target.strip().upper(), source_key, bool(skip_cofactor), *options, self.dataset_version)
+
+    async def get_backtrace_tree_json(
+        self,
+        target: str,
+        sources: List[str] = None,
+        skip_cofactor: bool = True,
+        tree_format: str = "tree",
+        ranking: str = "reactions",
+        max_solutions: int = 500,
+    ) -> Dict:
+        """
+        ``get_backtrace_tree`` response as pre-serialized JSON bytes.
+
+        Responses are kept in ``tree_cache``, so a repeated query skips both
+        the traversal and serialization. Errors are never cached.
+
+        Returns:
+            {"body": bytes, "data": flat rows} on success (the rows are also
+            in the body; they are returned for the result store),
+            {"error": str} otherwise.
+        """
+        options = (tree_format, ranking, max_solutions)
+        key = self._tree_cache_key(target, sources, skip_cofactor, *options)
+        cached = self.tree_cache.get(key)
+        if cached is not None:
+            body, rows = cached
+            return {"body": body, "data": rows}
+
+        target, source_list = key[0], list(key[1]) or None
+        result = await self.get_backtrace_tree(target, source_list, skip_cofactor, *options)
+        if result.get("error"):
+            return {"error": result["error"]}
+
+        body = json.dumps(
+            result, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode("utf-8")
+        self.tree_cache.put(key, (body, result["data"]))
+        return {"body": body, "data": result["data"]}
+
+    @staticmethod
+    def _query_tag(key: tuple) -> str:
+        """Short digest of a cache key; binds a cursor to its query and dataset."""
+        return hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:12]
+
+    def _encode_cursor(self, key: tuple, offset: int) -> str:
+        payload = json.dumps({"q": self._query_tag(key), "o": offset}, separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+    def _decode_cursor(self, key: tuple, cursor: str) -> int:
+        """Offset stored in *cursor*; ValueError if malformed or for another query."""
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+            tag, offset = payload["q"], int(payload["o"])
+        except Exception:
+            raise ValueError("Malformed cursor")
+        if tag != self._query_tag(key):
+            raise ValueError("Cursor does not belong to this query or dataset version")
+        if offset < 0:
+            raise ValueError("Malformed cursor")
+        return offset
+
+    def _solution_space(self, key: tuple, skip_cofactor: bool) -> Optional[SolutionSpace]:
+        """Cached ``SolutionSpace`` for a normalized tree key (None: unknown target)."""
+        space = self.solution_cache.get(key)
+        if space is None:
+            target, sources = key[0], set(key[1])
+            root, _ = backward_reachability(
+                self.hypergraph,
+                target,
+                self.gen_mapper,
+                set(self.cofactors) if skip_cofactor else set(),
+                sources,
+                skip_cofactor,
             )
+            if root is None:
+                return None
+            space = SolutionSpace(root)
+            self.solution_cache.put(key, space)
+        return space
+
+    async def get_solutions_page(
+        self,
+        target: str,
+        sources: List[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+        skip_cofactor: bool = True,
+    ) -> Dict:
+        """
+        One page of AND-OR solutions for target.
+
+        Solutions are built on demand from a cached ``SolutionSpace``, so
+        pages cost the same however deep the client goes. Each solution is
+        a list of indices into the reaction table, which is sent with the
+        first page only (no cursor).
+
+        Args:
+            target: Target compound ID.
+            sources: Optional list of source compound IDs.
+            cursor: ``next_cursor`` of the previous page, None for the first.
+            limit: Solutions per page.
+            skip_cofactor: Whether to treat cofactors as leaves.
+
+        Raises:
+            ValueError: If *cursor* is malformed or belongs to another query.
+        """
+        key = self._tree_cache_key(target, sources, skip_cofactor)
+        offset = self._decode_cursor(key, cursor) if cursor else 0
+        try:
+            space = self._solution_space(key, skip_cofactor)
+            if space is None:
+                return {"target": key[0], "sources": list(key[1]), "total": "0", "exact": True,
+                        "offset": 0, "solutions": [], "reactions": [], "next_cursor": None}
+
+            solutions = space.page(offset, limit)
+            end = offset + len(solutions)
+            result = {
+                "target": key[0],
+                "sources": list(key[1]),
+                "total": str(space.total),
+                "exact": space.exact,
+                "offset": offset,
+                "solutions": solutions,
+                "next_cursor": self._encode_cursor(key, end) if end < space.total else None,
+            }
+            if cursor is None:
+                result["reactions"] = space.reactions
+            return result
         except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Error generating CSV file: {str(e)}")
\ No newline at end of file
+            return {"target": target, "solutions": [], "error": str(e)}
@@ -1,7 +1,9 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
+import asyncio
+import json
 import logging
 from pathlib import Path
 import re
@@ -10,6 +12,12 @@ import xml.etree.ElementTree as ET
 
 from app import STATIC_DIR, DATA_DIR, DOCS_DIR
 from app.core.viewer import MetabolicViewer
+from app.core.executor import ViewerExecutor, ClientDisconnected
+from app.core.hypergraph import SOLUTION_COSTS
+from app.core.ec_index import parse_ec_pattern
+from app.core.uniprot import uniprot_cache
+from app.utils.result_store import DOWNLOAD_FORMATS, serialize
+from app.utils.export import EXPORT_FORMATS, RESULT_COLUMNS, csv_header, iter_csv, iter_ndjson
 from app.utils.smiles_cache import get_smiles_batch, get_mol_batch, get_cofactor_names, get_compound_names_batch
 
 # Set up logging
@@ -36,6 +44,77 @@ app.add_middleware(
 
 # Initialize viewer
 viewer = MetabolicViewer()
+# Pool the traversal endpoints run on, off the event loop (see app.core.executor)
+executor = ViewerExecutor.from_env(viewer)
+
+EC_PATTERN_HELP = (
+    "Invalid EC number format. Must be in format N.N.N.N (e.g., 1.1.1.1) "
+    "or an enzyme class pattern (e.g., 1.1.1.- or 2.7.*)"
+)
+
+async def run_viewer(request: Request, method: str, *args, **kwargs):
+    """
+    ``await viewer.<method>(...)`` on the executor pool.
+
+    Timeouts become 504; a client that disconnected gets 499 (nobody is
+    listening, the status only shows up in the access log).
+    """
+    try:
+        return await executor.run(method, *args, is_disconnected=request.is_disconnected, **kwargs)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Request timed out")
+    except ClientDisconnected:
+        logger.info(f"Client disconnected, abandoned {method}")
+        raise HTTPException(status_code=499, detail="Client closed request")
+
+def keep_result(result: dict, name: str) -> dict:
+    """Store the response's rows for /api/download and add its result_id."""
+    result["result_id"] = viewer.result_store.add(result.get("data", []), name)
+    return result
+
+def export_response(request: Request, format: str, filename: str, method: str, *args) -> StreamingResponse:
+    """
+    Stream the rows of ``viewer.<method>(*args)`` as CSV or NDJSON.
+
+    The CSV header goes out before the traversal starts, then the rows in
+    chunks (see app.utils.export). The status is sent with the first byte,
+    so a failure after that only ends the stream early; NDJSON adds a last
+    {"error": ...} line.
+    """
+    media_type, extension = EXPORT_FORMATS[format]
+
+    async def body():
+        if format == 'csv':
+            yield csv_header(RESULT_COLUMNS)
+        try:
+            result = await executor.run(method, *args, is_disconnected=request.is_disconnected)
+        except asyncio.TimeoutError:
+            result = {"error": "Request timed out"}
+        except ClientDisconnected:
+            logger.info(f"Client disconnected, abandoned {method} export")
+            return
+        if result.get('error'):
+            logger.error(f"Error in {method} export: {result['error']}")
+            if format == 'ndjson':
+                yield (json.dumps({"error": result['error']}) + "\n").encode("utf-8")
+            return
+        rows = result.get('data', [])
+        chunks = iter_csv(rows, RESULT_COLUMNS, header=False) if format == 'csv' else iter_ndjson(rows)
+        for chunk in chunks:
+            yield chunk
+
+    return StreamingResponse(
+        body(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{extension}"'},
+    )
+
+def check_export_format(format: str):
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid format. Must be one of: {', '.join(EXPORT_FORMATS)}."
+        )
 
 @app.get("/api/health")
 async def health_check():
@@ -146,7 +225,7 @@ async def get_kegg_ortho_edges():
         raise HTTPException(status_code=500, detail="Failed to parse KEGG ortho edges")
 
 @app.get("/api/backtrace")
-async def get_backtrace(target: str, source: str=''):
+async def get_backtrace(request: Request, target: str, source: str=''):
     """
     Perform backtrace analysis for a target compound
     
@@ -164,12 +243,12 @@ async def get_backtrace(target: str, source: str=''):
                     detail="Invalid compound ID format. Must start with 'C' followed by 5 digits."
                 )
             
-        result = await viewer.get_backtrace(target, source)
+        result = await run_viewer(request, "get_backtrace", target, source)
         
         if result.get('error'):
             raise HTTPException(status_code=404, detail=result['error'])
             
-        return result
+        return keep_result(result, f"metabolic_pathway_{target}")
         
     except HTTPException as he:
         raise he
@@ -180,8 +259,27 @@ async def get_backtrace(target: str, source: str=''):
             detail="Failed to process backtrace request"
         )
         
+@app.get("/api/backtrace/export")
+async def export_backtrace(request: Request, target: str, source: str = '', format: str = 'csv'):
+    """
+    Backtrace rows of a target compound as a streamed CSV or NDJSON file.
+
+    Args:
+        target (str): Target compound ID
+        source (str): Optional source compound ID
+        format (str): 'csv' (default) or 'ndjson'
+    """
+    check_export_format(format)
+    for element in [target, source]:
+        if element and not re.match(r'^C\d{5}$', element):
+            raise HTTPException(
+                status_code=400,
+                detail="Invalid compound ID format. Must start with 'C' followed by 5 digits."
+            )
+    return export_response(request, format, f"metabolic_pathway_{target}", "get_backtrace", target, source)
+
 @app.get("/api/backtrace/tree")
-async def get_backtrace_tree(target: str, source: str = ''):
+async def get_backtrace_tree(request: Request, target: str, source: str = '', format: str = 'tree', rank: str = 'reactions', k: int = 500):
     """
     AND-OR hypergraph backward reachability from target compound.
 
@@ -189,11 +287,39 @@ async def get_backtrace_tree(target: str, source: str = ''):
       - OR-nodes = compounds (produced by any of several reactions)
       - AND-nodes = reactions (require all reactants)
 
+    With format=dag the tree is sent as flat compound/reaction tables
+    with integer references instead (one entry per unique node).
+
+    Solutions are the subset-minimal ones among the k cheapest pathways
+    under the chosen ranking, so fewer than k may come back. The ranking
+    does bounded work; stats.solutions_complete is false when it stopped
+    short and cheaper pathways may be missing.
+
     Args:
         target: Target compound ID (e.g. C00258)
         source: Optional comma-separated source compound IDs (e.g. C00022,C00036)
+        format: 'tree' (nested, default) or 'dag' (by reference)
+        rank: Solution cost - 'reactions' (default), 'max_generation',
+              'ecs', or 'none' for unranked DFS order
+        k: Number of solutions to return (1-5000)
     """
     try:
+        if format not in ('tree', 'dag'):
+            raise HTTPException(
+                status_code=400,
+                detail="Invalid format. Must be 'tree' or 'dag'."
+            )
+        if rank not in SOLUTION_COSTS and rank != 'none':
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid rank. Must be one of: {', '.join([*SOLUTION_COSTS, 'none'])}."
+            )
+        if not 1 <= k <= 5000:
+            raise HTTPException(
+                status_code=400,
+                detail="Invalid k. Must be between 1 and 5000."
+            )
+
         # Validate target
         if not re.match(r'^[CZ]\d{5}$', target):
             raise HTTPException(
@@ -212,12 +338,17 @@ async def get_backtrace_tree(target: str, source: str = ''):
                         detail=f"Invalid source compound ID: {s}"
                     )
 
-        result = await viewer.get_backtrace_tree(target, sources)
+        result = await run_viewer(
+            request, "get_backtrace_tree_json", target, sources, tree_format=format, ranking=rank, max_solutions=k
+        )
 
         if result.get('error'):
             raise HTTPException(status_code=500, detail=result['error'])
 
-        return result
+        # The body comes pre-serialized (and cached); close its object with result_id
+        result_id = viewer.result_store.add(result['data'], f"metabolic_pathway_{target}")
+        body = result['body'][:-1] + b',"result_id":' + json.dumps(result_id).encode("utf-8") + b'}'
+        return Response(content=body, media_type="application/json")
 
     except HTTPException as he:
         raise he
@@ -228,8 +359,153 @@ async def get_backtrace_tree(target: str, source: str = ''):
             detail="Failed to process backtrace tree request"
         )
 
+@app.get("/api/backtrace/solutions")
+async def get_backtrace_solutions(request: Request, target: str, source: str = '', cursor: str = '', limit: int = 50):
+    """
+    Page through the AND-OR solutions (pathways) of a target compound.
+
+    Solutions are lists of indices into a reaction table that comes with
+    the first page. Pass the returned next_cursor to get the following
+    page; it is null after the last one.
+
+    Args:
+        target: Target compound ID (e.g. C00258)
+        source: Optional comma-separated source compound IDs
+        cursor: Opaque cursor from the previous page (empty for the first)
+        limit: Solutions per page (1-1000)
+    """
+    try:
+        if not re.match(r'^[CZ]\d{5}$', target):
+            raise HTTPException(
+                status_code=400,
+                detail="Invalid compound ID format. Must start with 'C' or 'Z' followed by 5 digits."
+            )
+
+        sources = None
+        if source and source.strip():
+            sources = [s.strip() for s in source.split(',') if s.strip()]
+            for s in sources:
+                if not re.match(r'^[CZ]\d{5}$', s):
+                    raise HTTPException(
+                        status_code=400,
+                        detail=f"Invalid source compound ID: {s}"
+                    )
+
+        if not 1 <= limit <= 1000:
+            raise HTTPException(
+                status_code=400,
+                detail="Invalid limit. Must be between 1 and 1000."
+            )
+
+        try:
+            result = await run_viewer(request, "get_solutions_page", target, sources, cursor or None, limit)
+        except ValueError as ve:
+            raise HTTPException(status_code=400, detail=str(ve))
+
+        if result.get('error'):
+            raise HTTPException(status_code=500, detail=result['error'])
+
+        return result
+
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        logger.error(f"Error in backtrace solutions API: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="Failed to process backtrace solutions request"
+        )
+
+@app.post("/api/backtrace/batch")
+async def backtrace_batch(request: Request, payload: dict):
+    """
+    Backtrace several target compounds in one combined traversal.
+
+    Upstream work shared between targets is done once, and all targets
+    share one DAG (by-reference compound/reaction tables, as with
+    format=dag); each result points at its root entry.
+
+    Body: { "targets": ["C00258", ...], "sources": ["C00022", ...], "stream": false }
+    Returns: { "sources": [...], "tree": {...}, "results": [{ "target", "root", "stats", "data" }, ...] }
+
+    With "stream": true the response is NDJSON, one result per line as
+    each target completes; instead of "tree", every line carries under
+    "dag" the [index, entry] table rows added or updated since the
+    previous line.
+    """
+    try:
+        targets = payload.get("targets", [])
+        if not targets or not isinstance(targets, list):
+            raise HTTPException(status_code=400, detail="targets must be a non-empty list")
+        if len(targets) > 200:
+            raise HTTPException(status_code=400, detail="At most 200 targets per batch")
+        for cid in targets:
+            if not re.match(r'^[CZ]\d{5}$', str(cid)):
+                raise HTTPException(status_code=400, detail=f"Invalid compound ID: {cid}")
+        # Duplicates would only repeat a result
+        targets = list(dict.fromkeys(targets))
+
+        sources = payload.get("sources") or None
+        if sources is not None:
+            if not isinstance(sources, list):
+                raise HTTPException(status_code=400, detail="sources must be a list")
+            for s in sources:
+                if not re.match(r'^[CZ]\d{5}$', str(s)):
+                    raise HTTPException(status_code=400, detail=f"Invalid source compound ID: {s}")
+
+        if payload.get("stream"):
+            # Each target is computed on the executor pool, one step per line
+            async def ndjson():
+                try:
+                    async for result in executor.iterate(
+                        "iter_backtrace_batch", targets, sources, is_disconnected=request.is_disconnected
+                    ):
+                        yield json.dumps(result, ensure_ascii=False, separators=(",", ":")) + "\n"
+                except asyncio.TimeoutError:
+                    yield json.dumps({"error": "Request timed out"}) + "\n"
+                except ClientDisconnected:
+                    logger.info("Client disconnected, abandoned iter_backtrace_batch")
+
+            return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+        result = await run_viewer(request, "get_backtrace_batch", targets, sources)
+
+        if result.get('error'):
+            raise HTTPException(status_code=500, detail=result['error'])
+
+        return result
+
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        logger.error(f"Error in backtrace batch API: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="Failed to process backtrace batch request"
+        )
+
+@app.get("/api/cache/stats")
+async def cache_stats():
+    """
+    Hit/miss/eviction counters of the result caches and the UniProt entry cache.
+
+    The tree and solution caches fill wherever the traversals run. With
+    NEBULA_EXECUTOR=process every worker keeps its own, out of this
+    process's reach, so they are reported as null rather than as the empty
+    copies left in the server process. The result store and the UniProt
+    cache are used by the server process in every mode.
+    """
+    in_workers = executor.kind == "process"
+    return {
+        "executor": executor.kind,
+        "tree": None if in_workers else viewer.tree_cache.stats(),
+        "solutions": None if in_workers else viewer.solution_cache.stats(),
+        "results": viewer.result_store.stats(),
+        "uniprot": uniprot_cache().stats() if uniprot_cache() is not None else None,
+    }
+
 @app.get("/api/search")
-async def search(type: str, query: str):
+async def search(request: Request, type: str, query: str):
     """
     Search for compound data by KEGG compound ID
     
@@ -247,12 +523,12 @@ async def search(type: str, query: str):
                 detail="Invalid compound ID format. Must start with 'C' followed by 5 digits."
             )
             
-        result = await viewer.get_backtrace(query)
+        result = await run_viewer(request, "get_backtrace", query)
         
         if result.get('error'):
             raise HTTPException(status_code=404, detail=result['error'])
             
-        return result
+        return keep_result(result, f"metabolic_pathway_{query}")
         
     except HTTPException as he:
         raise he
@@ -264,7 +540,7 @@ async def search(type: str, query: str):
         )
 
 @app.get("/api/reaction/backtrace")
-async def get_reaction_backtrace(reaction: str):
+async def get_reaction_backtrace(request: Request, reaction: str):
     """
     Perform backtrace analysis starting from a reaction ID.
     Finds the reaction's product compounds and backtraces them.
@@ -282,12 +558,12 @@ async def get_reaction_backtrace(reaction: str):
                 detail="Invalid reaction ID format. Must start with 'R' followed by 5 digits."
             )
 
-        result = await viewer.get_reaction_backtrace(reaction)
+        result = await run_viewer(request, "get_reaction_backtrace", reaction)
 
         if result.get('error'):
             raise HTTPException(status_code=404, detail=result['error'])
 
-        return result
+        return keep_result(result, f"reaction_backtrace_{reaction}")
 
     except HTTPException as he:
         raise he
@@ -298,30 +574,50 @@ async def get_reaction_backtrace(reaction: str):
             detail="Failed to process reaction backtrace request"
         )
 
+@app.get("/api/reaction/backtrace/export")
+async def export_reaction_backtrace(request: Request, reaction: str, format: str = 'csv'):
+    """
+    Reaction backtrace rows as a streamed CSV or NDJSON file.
+
+    Args:
+        reaction (str): KEGG reaction ID (e.g. R00217)
+        format (str): 'csv' (default) or 'ndjson'
+    """
+    check_export_format(format)
+    if not re.match(r'^R\d{5}$', reaction):
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid reaction ID format. Must start with 'R' followed by 5 digits."
+        )
+    return export_response(request, format, f"reaction_backtrace_{reaction}", "get_reaction_backtrace", reaction)
+
 @app.get("/api/ec/reactions")
-async def get_ec_reactions(ec: str):
+async def get_ec_reactions(request: Request, ec: str):
     """
     List all reactions where a given EC number is present.
 
     Args:
-        ec (str): Enzyme Commission number (format: N.N.N.N)
+        ec (str): Enzyme Commission number (format: N.N.N.N), or an
+            enzyme class pattern such as 1.1.1.- or 2.7.*
 
     Returns:
         dict: Reactions in the same format as compound backtrace results
     """
     try:
-        if not re.match(r'^\d+(\.\d+){3}$', ec):
+        try:
+            parse_ec_pattern(ec)
+        except ValueError:
             raise HTTPException(
                 status_code=400,
-                detail="Invalid EC number format. Must be in format N.N.N.N (e.g., 1.1.1.1)"
+                detail=EC_PATTERN_HELP
             )
 
-        result = await viewer.get_ec_reactions(ec)
+        result = await run_viewer(request, "get_ec_reactions", ec)
 
         if result.get('error'):
             raise HTTPException(status_code=404, detail=result['error'])
 
-        return result
+        return keep_result(result, f"ec_reactions_{ec.replace('*', 'x')}")
 
     except HTTPException as he:
         raise he
@@ -332,6 +628,58 @@ async def get_ec_reactions(ec: str):
             detail="Failed to process EC reactions request"
         )
 
+@app.get("/api/ec/reactions/export")
+async def export_ec_reactions(request: Request, ec: str, format: str = 'csv'):
+    """
+    Reactions of an EC number or enzyme class as a streamed CSV or NDJSON file.
+
+    Args:
+        ec (str): EC number (N.N.N.N) or class pattern (1.1.1.-, 2.7.*)
+        format (str): 'csv' (default) or 'ndjson'
+    """
+    check_export_format(format)
+    try:
+        parse_ec_pattern(ec)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=EC_PATTERN_HELP)
+    return export_response(request, format, f"ec_reactions_{ec.replace('*', 'x')}", "get_ec_reactions", ec)
+
+@app.get("/api/ec/browse")
+async def browse_ec(ec: str = '*'):
+    """
+    List the EC numbers of an enzyme class that have reactions.
+
+    Args:
+        ec (str): Class pattern such as 2.7.* or 1.1.1.- (default: all)
+
+    Returns:
+        dict: {"data": [{"ec": "2.7.1.1", "reactions": 4}, ...]} in numeric order
+    """
+    try:
+        try:
+            parse_ec_pattern(ec)
+        except ValueError:
+            raise HTTPException(
+                status_code=400,
+                detail=EC_PATTERN_HELP
+            )
+
+        result = viewer.list_ec_numbers(ec)
+
+        if result.get('error'):
+            raise HTTPException(status_code=500, detail=result['error'])
+
+        return result
+
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        logger.error(f"Error in EC browse API: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="Failed to process EC browse request"
+        )
+
 @app.get("/api/compound/{compound_id}")
 async def get_compound_data(compound_id: str):
     """
@@ -528,16 +876,19 @@ async def get_ec_data(ec_number: str):
     Get EC number data
     
     Args:
-        ec_number (str): Enzyme Commission number (format: N.N.N.N)
+        ec_number (str): Enzyme Commission number (format: N.N.N.N), or an
+            enzyme class pattern such as 1.1.1.- or 2.7.*
         
     Returns:
         dict: EC number information including domain data
     """
-    # Validate EC number format (e.g., 1.1.1.1)
-    if not re.match(r'^\d+(\.\d+){3}$', ec_number):
+    # Validate EC number or class pattern (e.g., 1.1.1.1, 2.7.*)
+    try:
+        parse_ec_pattern(ec_number)
+    except ValueError:
         raise HTTPException(
             status_code=400,
-            detail="Invalid EC number format. Must be in format N.N.N.N (e.g., 1.1.1.1)"
+            detail=EC_PATTERN_HELP
         )
     
     try:
@@ -557,18 +908,49 @@ async def get_ec_data(ec_number: str):
             detail="Failed to fetch EC data"
         )
 
-@app.get("/api/download/csv")
-async def download_csv(background_tasks: BackgroundTasks):
-    """Download results as CSV file"""
+@app.get("/api/download/{result_id}")
+async def download_result(result_id: str, format: str = 'csv'):
+    """
+    Download a backtrace result as a file.
+
+    Args:
+        result_id: The result_id of a /api/backtrace, /api/backtrace/tree,
+            /api/search, /api/reaction/backtrace or /api/ec/reactions response
+        format: 'csv' (default) or 'ndjson', streamed; 'parquet' or
+            'arrow' (Arrow IPC file), which need pyarrow
+    """
     try:
-        return await viewer.download_csv(background_tasks)
+        if format not in DOWNLOAD_FORMATS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid format. Must be one of: {', '.join(DOWNLOAD_FORMATS)}."
+            )
+        stored = viewer.result_store.get(result_id)
+        if stored is None:
+            raise HTTPException(status_code=404, detail="Result not found or expired")
+
+        media_type, extension = DOWNLOAD_FORMATS[format]
+        headers = {"Content-Disposition": f'attachment; filename="{stored.name}.{extension}"'}
+        if format in EXPORT_FORMATS:
+            chunks = iter_csv(stored.records) if format == 'csv' else iter_ndjson(stored.records)
+            return StreamingResponse(chunks, media_type=media_type, headers=headers)
+        return Response(
+            content=serialize(stored, format),
+            media_type=media_type,
+            headers=headers,
+        )
+    except HTTPException as he:
+        raise he
+    except ImportError:
+        logger.error("pyarrow not installed — Parquet/Arrow downloads unavailable")
+        raise HTTPException(status_code=501, detail="pyarrow not installed. Use format=csv or install pyarrow.")
     except Exception as e:
-        logger.error(f"Error in CSV download: {e}")
+        logger.error(f"Error in result download: {e}")
         raise HTTPException(
             status_code=500,
-            detail="Failed to generate CSV"
+            detail="Failed to generate download"
         )
-        
+
 @app.get("/api/ec/{ec_number}/uniprot")
 async def get_ec_uniprot_data(ec_number: str):
     """
@@ -850,10 +1232,21 @@ async def startup_event():
                 raise FileNotFoundError(f"Missing required data file: {file}")
                 
         logger.info("All required data files verified")
+
+        if executor.kind == "process":
+            # Load the lazy tables before forking so every worker inherits them
+            for attr in ("df", "edge_of_row", "ec_index"):
+                getattr(viewer, attr)
+        executor.start()
+        logger.info(f"Viewer executor: {executor.kind}, {executor.max_workers} workers")
         
     except Exception as e:
         logger.error(f"Startup error: {e}")
         raise
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    executor.shutdown()
     
 
 if __name__ == "__main__":
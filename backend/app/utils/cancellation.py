@@ -0,0 +1,38 @@
+"""
+Cooperative cancellation of viewer calls running on a thread.
+
+The executor runs each call inside ``cancel_scope(event)`` and sets the
+event when it abandons the call (timeout or disconnect). The long loops of
+the AND-OR code call ``check_cancelled``, which raises ``CallCancelled``
+once the event is set, so the abandoned call stops instead of running to
+the end unseen. Outside a scope the check is a no-op.
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+
+class CallCancelled(Exception):
+    """The caller abandoned the call running on this thread."""
+
+
+_local = threading.local()
+
+
+@contextmanager
+def cancel_scope(event: threading.Event) -> Iterator[None]:
+    """Make *event* the cancellation flag of the current thread."""
+    previous: Optional[threading.Event] = getattr(_local, "event", None)
+    _local.event = event
+    try:
+        yield
+    finally:
+        _local.event = previous
+
+
+def check_cancelled() -> None:
+    """Raise ``CallCancelled`` if the current thread's call was abandoned."""
+    event = getattr(_local, "event", None)
+    if event is not None and event.is_set():
+        raise CallCancelled()
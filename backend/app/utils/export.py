@@ -0,0 +1,93 @@
+"""
+Chunked CSV / NDJSON encoders for result exports.
+
+The generators here turn result rows into byte chunks of a bounded number
+of rows each, for ``StreamingResponse``: a response starts with the first
+chunk instead of after the whole file is built, and the encoded output
+never sits in memory all at once.
+"""
+
+import csv
+import io
+import json
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+# Columns of a backtrace-style record (see MetabolicViewer._display_records)
+RESULT_COLUMNS = [
+    "reaction", "source", "coenzyme", "equation", "transition", "target",
+    "ec_list", "compound_generation", "max_generation",
+]
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+}
+
+CHUNK_ROWS = 500
+
+
+def flat_value(value: Any) -> Any:
+    """A cell for a flat table: lists joined, dicts as compact JSON."""
+    if isinstance(value, (list, tuple)):
+        return ", ".join(str(v) for v in value)
+    if isinstance(value, dict):
+        return json.dumps(value, separators=(",", ":"))
+    return value
+
+
+def csv_header(columns: Sequence[str]) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(columns)
+    return buffer.getvalue().encode("utf-8")
+
+
+def iter_csv(
+    records: Iterable[Dict[str, Any]],
+    columns: Optional[Sequence[str]] = None,
+    header: bool = True,
+    chunk_rows: int = CHUNK_ROWS,
+) -> Iterator[bytes]:
+    """
+    CSV of *records*, *chunk_rows* rows per chunk; the header is a chunk of
+    its own. *columns* defaults to the keys of the first record.
+    """
+    records = iter(records)
+    if columns is None:
+        first = next(records, None)
+        if first is None:
+            return
+        columns = list(first)
+        records = _chain_first(first, records)
+    if header:
+        yield csv_header(columns)
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    rows = 0
+    for record in records:
+        writer.writerow([flat_value(record.get(column, "")) for column in columns])
+        rows += 1
+        if rows == chunk_rows:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            rows = 0
+    if rows:
+        yield buffer.getvalue().encode("utf-8")
+
+
+def iter_ndjson(records: Iterable[Dict[str, Any]], chunk_rows: int = CHUNK_ROWS) -> Iterator[bytes]:
+    """One JSON object per line, *chunk_rows* lines per chunk."""
+    lines: List[str] = []
+    for record in records:
+        lines.append(json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=str))
+        if len(lines) == chunk_rows:
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+            lines = []
+    if lines:
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def _chain_first(first: Dict[str, Any], rest: Iterator[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    yield first
+    yield from rest
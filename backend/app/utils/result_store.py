@@ -0,0 +1,94 @@
+"""
+Per-result download store.
+
+Every backtrace-style response (``/api/backtrace``, ``/api/search``,
+``/api/reaction/backtrace``, ``/api/ec/reactions``) is kept here under a
+random ``result_id`` that comes back with it, so ``/api/download/{result_id}``
+serves exactly that result, whichever query other clients ran since. Entries
+live in a ``ResultCache`` (LRU + TTL), in the server process: they are put
+after the executor call returns, so this works the same with process workers.
+
+CSV and NDJSON downloads are streamed in chunks (``app.utils.export``);
+Parquet and Arrow files are built in memory and need ``pyarrow``.
+"""
+
+import io
+import secrets
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from app.utils.export import EXPORT_FORMATS, flat_value
+from app.utils.result_cache import ResultCache
+
+DOWNLOAD_FORMATS = {
+    **EXPORT_FORMATS,
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.file", "arrow"),
+}
+
+
+@dataclass
+class StoredResult:
+    records: List[Dict[str, Any]]
+    name: str
+
+    def frame(self) -> pd.DataFrame:
+        """The records as a flat table: lists joined, dicts as JSON text."""
+        return pd.DataFrame([
+            {key: flat_value(value) for key, value in record.items()}
+            for record in self.records
+        ])
+
+
+class ResultStore:
+    """
+    Bounded store of response records, keyed by an unguessable result ID.
+
+    Args:
+        max_entries: Results kept before the least recently used is evicted.
+        ttl_seconds: Lifetime of a result; ``None`` or <= 0 disables expiry.
+    """
+
+    def __init__(self, max_entries: int = 128, ttl_seconds: Optional[float] = 3600.0):
+        self.cache = ResultCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+
+    def add(self, records: List[Dict[str, Any]], name: str) -> str:
+        """Keep *records* (downloaded as ``<name>.<format>``); returns the result ID."""
+        result_id = secrets.token_urlsafe(12)
+        self.cache.put(result_id, StoredResult(records, name))
+        return result_id
+
+    def get(self, result_id: str) -> Optional[StoredResult]:
+        return self.cache.get(result_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return self.cache.stats()
+
+
+def serialize(result: StoredResult, fmt: str) -> bytes:
+    """
+    *result* as a Parquet or Arrow IPC file, built in memory (the text
+    formats are streamed instead, see ``app.utils.export``).
+
+    Raises:
+        ValueError: not a binary format.
+        ImportError: ``pyarrow`` is not installed.
+    """
+    if fmt not in ("parquet", "arrow"):
+        raise ValueError(f"Not a binary format: {fmt}")
+    frame = result.frame()
+
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    sink = io.BytesIO()
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        pq.write_table(table, sink)
+    else:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    return sink.getvalue()
@@ -0,0 +1,175 @@
+"""
+Persistent UniProt entry cache — one SQLite file, shared by every worker.
+
+Rows hold the raw entry JSON, zlib-compressed, keyed by accession (EC search
+results are kept under ``ec:<number>`` as their accession list). Entries
+older than the TTL read as missing; past the size cap the least recently
+read entries are dropped. A cache that cannot be opened or written only
+logs a warning and behaves as empty, so UniProt is still reachable.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    data BLOB NOT NULL,
+    fetched_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at);
+"""
+
+# SQLite's default limit on host parameters per statement is 999
+_BATCH = 500
+
+
+class UniProtCache:
+    """
+    Key -> JSON store in SQLite with TTL expiry and an LRU size cap.
+
+    Args:
+        path: Database file (created on first use).
+        ttl_seconds: Lifetime of an entry; ``None`` or <= 0 disables expiry.
+        max_entries: Entries kept before the least recently read are evicted.
+    """
+
+    def __init__(self, path: Path, ttl_seconds: Optional[float] = 30 * 86400, max_entries: int = 20000):
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds if ttl_seconds and ttl_seconds > 0 else None
+        self.max_entries = max(1, int(max_entries))
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread (and process: never reuse one across a
+        # fork); WAL lets readers run while one thread writes
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with self._schema_lock:
+                if not self._schema_ready:
+                    conn.executescript(_SCHEMA)
+                    self._schema_ready = True
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key: str) -> Optional[Any]:
+        """The cached JSON value of *key*, or None when missing or expired."""
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """``{key: value}`` for the keys that are cached and fresh."""
+        keys = list(dict.fromkeys(keys))
+        found: Dict[str, Any] = {}
+        if not keys:
+            return found
+        now = time.time()
+        oldest = now - self.ttl_seconds if self.ttl_seconds else float("-inf")
+        try:
+            conn = self._connection()
+            for start in range(0, len(keys), _BATCH):
+                batch = keys[start:start + _BATCH]
+                marks = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT key, data, fetched_at FROM entries WHERE key IN ({marks})", batch
+                ).fetchall()
+                for key, data, fetched_at in rows:
+                    if fetched_at >= oldest:
+                        found[key] = json.loads(zlib.decompress(data))
+            if found:
+                fresh = list(found)
+                for start in range(0, len(fresh), _BATCH):
+                    batch = fresh[start:start + _BATCH]
+                    conn.execute(
+                        f"UPDATE entries SET accessed_at = ? WHERE key IN ({','.join('?' * len(batch))})",
+                        [now, *batch],
+                    )
+        except (sqlite3.Error, OSError, ValueError, zlib.error) as e:
+            logger.warning(f"UniProt cache read failed: {e}")
+            found = {}
+        with self._stats_lock:
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put(self, key: str, value: Any) -> None:
+        self.put_many({key: value})
+
+    def put_many(self, values: Dict[str, Any]) -> None:
+        """Store *values* and evict down to the size cap."""
+        if not values:
+            return
+        now = time.time()
+        rows = [
+            (key, zlib.compress(json.dumps(value, separators=(",", ":")).encode("utf-8")), now, now)
+            for key, value in values.items()
+        ]
+        try:
+            conn = self._connection()
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)", rows)
+                conn.execute(
+                    "DELETE FROM entries WHERE key IN ("
+                    "SELECT key FROM entries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"UniProt cache write failed: {e}")
+
+    def purge_expired(self) -> int:
+        """Delete expired rows; returns how many."""
+        if not self.ttl_seconds:
+            return 0
+        try:
+            cursor = self._connection().execute(
+                "DELETE FROM entries WHERE fetched_at < ?", (time.time() - self.ttl_seconds,)
+            )
+            return cursor.rowcount
+        except sqlite3.Error as e:
+            logger.warning(f"UniProt cache purge failed: {e}")
+            return 0
+
+    def clear(self) -> None:
+        try:
+            self._connection().execute("DELETE FROM entries")
+        except sqlite3.Error as e:
+            logger.warning(f"UniProt cache clear failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters and occupancy, JSON-ready."""
+        try:
+            entries = self._connection().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        except sqlite3.Error:
+            entries = None
+        with self._stats_lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            "path": str(self.path),
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
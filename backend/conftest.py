@@ -0,0 +1 @@
+"""Puts backend/ on sys.path so the tests import ``app`` as the server does."""
@@ -0,0 +1,112 @@
+"""
+Benchmark: legacy ``create_backtrack_df`` vs. ``backtrack_edges`` on the
+``produced_by`` index (the ``/api/backtrace`` frame).
+
+For a spread of targets (each with no source and with a random
+lower-generation source), builds the backtrace frame both ways, checks that
+they are identical — same rows, same order, same values after the viewer's
+NaN / EC-list normalization — and reports the latencies.
+
+The one intended difference is spelled out of the reference's input:
+``get_first_occurance`` only finds product IDs delimited by "+" or
+whitespace and misses those with a glued coefficient ("2C00221"), which
+``backtrack_edges`` counts. The reference runs on a copy of the table with
+those written "2 C00221"; --raw compares against the table as it is.
+
+Run from the backend/ directory::
+
+    python -m scripts.bench_backtrace [--limit N | --all] [--seed S]
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from app.core.hypergraph import backtrack_edges
+from app.core.viewer import MetabolicViewer
+from app.utils.helpers import create_backtrack_df, parse_ec_list
+
+COLUMNS = ["reaction", "source", "coenzyme", "equation", "reactant_gen", "product_gen", "target", "ec_list"]
+
+
+def legacy_frame(viewer: MetabolicViewer, df: pd.DataFrame, target: str, source: str) -> pd.DataFrame:
+    """The frame ``get_backtrace`` built before, up to the display step."""
+    backtrack_df = create_backtrack_df(df, target, viewer.gen_mapper, viewer.cofactors, source)
+    if backtrack_df.empty:
+        return backtrack_df
+    backtrack_df = backtrack_df.replace([np.inf, -np.inf], None)
+    backtrack_df = backtrack_df.fillna('N/A')
+    backtrack_df['ec_list'] = backtrack_df['ec_list'].apply(parse_ec_list)
+    return backtrack_df
+
+
+def same(old: pd.DataFrame, new: pd.DataFrame) -> bool:
+    if old.empty or new.empty:
+        return old.empty and new.empty
+    return old[COLUMNS].astype(object).values.tolist() == new[COLUMNS].astype(object).values.tolist()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--limit", type=int, default=40, help="targets, evenly spaced over the generations")
+    parser.add_argument("--all", action="store_true", help="every compound in generations.csv")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--raw", action="store_true", help="keep glued coefficients in the reference's input")
+    args = parser.parse_args()
+
+    viewer = MetabolicViewer()
+    gen_mapper = viewer.gen_mapper
+    reference_df = viewer.df
+    if not args.raw:
+        reference_df = reference_df.assign(
+            products=reference_df["products"].str.replace(r"(\d)([CZ]\d{5})", r"\1 \2", regex=True)
+        )
+
+    ordered = sorted(gen_mapper, key=lambda c: (gen_mapper[c], c))
+    if args.all:
+        targets = ordered
+    else:
+        step = max(len(ordered) // args.limit, 1)
+        targets = ordered[::step][:args.limit]
+
+    rng = random.Random(args.seed)
+    queries = []
+    for target in targets:
+        queries.append((target, ""))
+        lower = [c for c in ordered if 0 < gen_mapper[c] < gen_mapper[target]]
+        if lower:
+            queries.append((target, rng.choice(lower)))
+
+    t_old: List[float] = []
+    t_new: List[float] = []
+    mismatches: List[str] = []
+    for target, source in queries:
+        t0 = time.perf_counter()
+        old = legacy_frame(viewer, reference_df, target, source)
+        t1 = time.perf_counter()
+        new = viewer._backtrack_frame(
+            backtrack_edges(viewer.hypergraph, target, gen_mapper, viewer.cofactors, source)
+        )
+        t2 = time.perf_counter()
+        t_old.append(t1 - t0)
+        t_new.append(t2 - t1)
+        if not same(old, new):
+            mismatches.append(f"{target}<-{source}" if source else target)
+
+    ms = 1000
+    print(f"queries:        {len(queries)} ({len(targets)} targets)")
+    print(f"legacy median:  {statistics.median(t_old) * ms:10.2f} ms  (max {max(t_old) * ms:.1f} ms)")
+    print(f"index median:   {statistics.median(t_new) * ms:10.2f} ms  (max {max(t_new) * ms:.1f} ms)")
+    print(f"total speedup:  {sum(t_old) / max(sum(t_new), 1e-9):10.1f}x")
+    print(f"mismatches:     {len(mismatches)} {mismatches[:10]}")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
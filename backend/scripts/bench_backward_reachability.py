@@ -0,0 +1,178 @@
+"""
+Benchmark: explicit-stack ``backward_reachability`` vs. the recursive version.
+
+Expands every compound in generations.csv with both engines, one engine per
+pass, checks that the serialized AND-OR DAGs and stats are identical, and
+reports the timings.
+The recursive reference below is the implementation the stack-based
+engine replaced; it runs on the dataclass-edge graph it was written for
+(``scripts.legacy_graph``), so the timings compare against the code as it
+was, edge layout included.
+
+Run from the backend/ directory::
+
+    python -m scripts.bench_backward_reachability [--limit N | --largest N] [--repeat R]
+"""
+
+import argparse
+import gc
+import hashlib
+import json
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+import pandas as pd
+
+from app import DATA_DIR
+from app.core.hypergraph import (
+    CompoundNode,
+    HyperGraph,
+    ReactionNode,
+    _prune_unreachable,
+    backward_reachability,
+    tree_to_dict,
+)
+from scripts.legacy_graph import LegacyHyperGraph
+
+
+def recursive_backward_reachability(graph, target, gen_mapper, cofactors=None, sources=None, skip_cofactor=True):
+    """Reference: the original recursive AND-OR expansion."""
+    cofactors = cofactors or set()
+    sources = sources or set()
+    cofactor_set = cofactors if skip_cofactor else set()
+    memo: Dict[str, CompoundNode] = {}
+    stats = {"total_compounds": 0, "total_reactions": 0, "shared_compounds": 0, "max_depth": 0}
+
+    def _is_leaf(compound):
+        if compound in cofactor_set:
+            return True, "cofactor"
+        if sources and compound in sources:
+            return True, "source"
+        gen = gen_mapper.get(compound, -1)
+        if gen == 0:
+            return True, "gen0"
+        if gen == -1:
+            return True, "unknown"
+        return False, ""
+
+    def expand_compound(compound: str, ancestor_path: FrozenSet[str], depth: int) -> CompoundNode:
+        stats["max_depth"] = max(stats["max_depth"], depth)
+        gen = gen_mapper.get(compound, -1)
+        leaf, reason = _is_leaf(compound)
+        if leaf:
+            stats["total_compounds"] += 1
+            return CompoundNode(id=compound, generation=gen, is_leaf=True, leaf_reason=reason)
+        if compound in memo:
+            stats["shared_compounds"] += 1
+            return CompoundNode(id=compound, generation=gen, is_leaf=False, is_shared=True)
+
+        node = CompoundNode(id=compound, generation=gen)
+        stats["total_compounds"] += 1
+        memo[compound] = node
+        new_ancestor = ancestor_path | frozenset({compound})
+
+        seen_reactions = defaultdict(list)
+        for edge in graph.produced_by.get(compound, []):
+            seen_reactions[edge.reaction].append(edge)
+
+        for edges in seen_reactions.values():
+            edge = edges[0]
+            if gen >= 0 and edge.generation > gen:
+                continue
+            reactant_children: List[CompoundNode] = []
+            skip_reaction = False
+            for reactant in edge.reactants:
+                if reactant in cofactor_set:
+                    continue
+                if reactant in ancestor_path:
+                    skip_reaction = True
+                    break
+                reactant_children.append(expand_compound(reactant, new_ancestor, depth + 1))
+            if skip_reaction:
+                continue
+            node.producers.append(ReactionNode(
+                id=edge.id, reaction=edge.reaction, reaction_id=edge.reaction_id,
+                equation=edge.equation, ec_list=list(edge.ec_list), generation=edge.generation,
+                source=edge.source, coenzyme=edge.coenzyme, reactants=reactant_children,
+            ))
+            stats["total_reactions"] += 1
+
+        if not node.producers:
+            node.is_leaf = True
+            node.leaf_reason = "no_producers"
+        return node
+
+    if target not in graph.all_compounds and target not in gen_mapper:
+        return None, stats
+    root = expand_compound(target, frozenset(), 0)
+    if sources:
+        root = _prune_unreachable(root, sources)
+    return root, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--limit", type=int, default=None, help="only the first N compounds")
+    parser.add_argument("--largest", type=int, default=None, help="only the N highest-generation compounds")
+    parser.add_argument("--repeat", type=int, default=1, help="passes per engine; the best one is reported")
+    args = parser.parse_args()
+
+    df = pd.read_csv(DATA_DIR / "simulations.csv")
+    generation_df = pd.read_csv(DATA_DIR / "generations.csv").set_index("compound_id")
+    gen_mapper = generation_df["modified_generation"].dropna().to_dict()
+    cofactors = set(pd.read_csv(DATA_DIR / "cofactors.csv")["Compound ID"])
+    graph = HyperGraph.from_dataframe(df)
+    legacy = LegacyHyperGraph.from_dataframe(df)
+
+    targets = generation_df.index.tolist()[:args.limit]
+    if args.largest:
+        targets = sorted(gen_mapper, key=gen_mapper.get, reverse=True)[:args.largest]
+
+    def timed_pass(expand, graph_) -> Tuple[float, Dict[str, Optional[str]]]:
+        """
+        Run *expand* over every target in one pass and return the time plus
+        a digest of each result (None on RecursionError). The engines get
+        separate passes, with nothing of the other's results alive:
+        interleaving them per target charged each one for collecting the
+        other's garbage.
+        """
+        digests: Dict[str, Optional[str]] = {}
+        elapsed = 0.0
+        for target in targets:
+            gc.collect()
+            t0 = time.perf_counter()
+            try:
+                root, stats = expand(graph_, target, gen_mapper, cofactors)
+            except RecursionError:
+                digests[target] = None
+                continue
+            elapsed += time.perf_counter() - t0
+            tree = tree_to_dict(root) if root else None
+            digests[target] = hashlib.sha1(json.dumps([tree, stats], sort_keys=True).encode()).hexdigest()
+            del root, tree
+        return elapsed, digests
+
+    # Alternate the passes and keep each engine's best: on a shared box
+    # single passes vary by tens of percent
+    t_recursive = t_stack = float("inf")
+    for _ in range(args.repeat):
+        elapsed, expected = timed_pass(recursive_backward_reachability, legacy)
+        t_recursive = min(t_recursive, elapsed)
+        elapsed, got = timed_pass(backward_reachability, graph)
+        t_stack = min(t_stack, elapsed)
+    mismatches = [t for t in targets if expected[t] is not None and expected[t] != got[t]]
+    recursion_errors = sum(digest is None for digest in expected.values())
+
+    print(f"compounds:      {len(targets)}")
+    print(f"recursive:      {t_recursive:8.2f} s")
+    print(f"explicit stack: {t_stack:8.2f} s")
+    print(f"speedup:        {t_recursive / max(t_stack, 1e-9):8.2f}x")
+    print(f"recursion errors in reference: {recursion_errors}")
+    print(f"mismatches:     {len(mismatches)} {mismatches[:10]}")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark: nested ``tree_to_dict`` vs. DAG-by-reference ``tree_to_dag``.
+
+For the N highest-generation targets, expands the AND-OR DAG once and
+compares the JSON payload size and conversion + serialization time of both
+wire formats. Each DAG payload is re-inflated into the nested form and
+checked against ``tree_to_dict``.
+
+Run from the backend/ directory::
+
+    python -m scripts.bench_tree_serialization [--largest N]
+"""
+
+import argparse
+import json
+import sys
+import time
+import zlib
+from typing import Any, Dict, List, Set
+
+import pandas as pd
+
+from app import DATA_DIR
+from app.core.hypergraph import HyperGraph, backward_reachability, tree_to_dag, tree_to_dict
+
+
+def dumps(obj: Any) -> bytes:
+    """Serialize exactly as the /api/backtrace/tree endpoint does."""
+    return json.dumps(obj, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def inflate(dag: Dict[str, Any]) -> Dict[str, Any]:
+    """Rebuild the nested ``tree_to_dict`` form from a DAG payload."""
+    compounds, reactions = dag["compounds"], dag["reactions"]
+    emitted: Set[int] = set()
+
+    def compound(index: int) -> Dict[str, Any]:
+        entry = compounds[index]
+        stub = entry["isShared"] or (index in emitted and not entry["isLeaf"])
+        emitted.add(index)
+        result = {
+            "type": "compound",
+            "id": entry["id"],
+            "generation": entry["generation"],
+            "isLeaf": entry["isLeaf"] and not stub,
+            "isShared": stub,
+            "leafReason": entry["leafReason"] if not stub else "",
+        }
+        result["producers"] = [] if stub else [reaction(r) for r in entry["producers"]]
+        return result
+
+    def reaction(index: int) -> Dict[str, Any]:
+        entry = {"type": "reaction", **reactions[index]}
+        entry["reactants"] = [compound(c) for c in entry["reactants"]]
+        return entry
+
+    sys.setrecursionlimit(100000)
+    return compound(dag["root"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--largest", type=int, default=50, help="the N highest-generation compounds")
+    args = parser.parse_args()
+
+    df = pd.read_csv(DATA_DIR / "simulations.csv")
+    generation_df = pd.read_csv(DATA_DIR / "generations.csv").set_index("compound_id")
+    gen_mapper = generation_df["modified_generation"].dropna().to_dict()
+    cofactors = set(pd.read_csv(DATA_DIR / "cofactors.csv")["Compound ID"])
+    graph = HyperGraph.from_dataframe(df)
+
+    targets = sorted(gen_mapper, key=gen_mapper.get, reverse=True)[:args.largest]
+    size_tree = size_dag = zsize_tree = zsize_dag = 0
+    t_tree = t_dag = 0.0
+    mismatches: List[str] = []
+
+    for target in targets:
+        root, _ = backward_reachability(graph, target, gen_mapper, cofactors)
+        if root is None:
+            continue
+
+        t0 = time.perf_counter()
+        tree_body = dumps(tree_to_dict(root))
+        t1 = time.perf_counter()
+        dag = tree_to_dag(root)
+        dag_body = dumps(dag)
+        t2 = time.perf_counter()
+        t_tree += t1 - t0
+        t_dag += t2 - t1
+
+        size_tree += len(tree_body)
+        size_dag += len(dag_body)
+        zsize_tree += len(zlib.compress(tree_body, 6))
+        zsize_dag += len(zlib.compress(dag_body, 6))
+        if dumps(inflate(dag)) != tree_body:
+            mismatches.append(target)
+
+    mb = 1024 * 1024
+    print(f"targets:        {len(targets)}")
+    print(f"payload tree:   {size_tree / mb:10.2f} MB  (deflate {zsize_tree / mb:8.2f} MB)")
+    print(f"payload dag:    {size_dag / mb:10.2f} MB  (deflate {zsize_dag / mb:8.2f} MB)")
+    print(f"size ratio:     {size_tree / max(size_dag, 1):10.2f}x")
+    print(f"serialize tree: {t_tree:10.2f} s")
+    print(f"serialize dag:  {t_dag:10.2f} s")
+    print(f"speedup:        {t_tree / max(t_dag, 1e-9):10.2f}x")
+    print(f"mismatches:     {len(mismatches)} {mismatches[:10]}")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Benchmark: sequential vs. concurrent UniProt accession fetching
+(``get_uniprot_entries_from_mapper``), against a local stand-in server.
+
+The stand-in answers ``/uniprotkb/<accession>`` like rest.uniprot.org,
+replaying recorded entry JSON (``<accession>.json`` files in --replay DIR,
+e.g. saved with --record DIR) or, without recordings, a minimal synthetic
+entry. It adds --latency per request and can fail every Nth request with a
+503 to exercise the retries. The script checks that the concurrent fetch
+returns the same entries, in gene_mapper order, as the sequential loop,
+then repeats the concurrent fetch through a fresh on-disk entry cache: cold
+(only missing entries fetched) and warm (no request at all).
+
+Run from the backend/ directory::
+
+    python -m scripts.bench_uniprot [--ec 1.1.1.1] [--latency 80] [--fail-every 7]
+    python -m scripts.bench_uniprot --ec 1.1.1.1 --record recordings/   # needs network
+    python -m scripts.bench_uniprot --ec 1.1.1.1 --replay recordings/
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional
+
+from app.core import uniprot
+from app.core.viewer import MetabolicViewer
+from app.utils.uniprot_cache import UniProtCache
+
+
+def synthetic_entry(accession: str) -> dict:
+    return {
+        "primaryAccession": accession,
+        "uniProtkbId": f"{accession}_STANDIN",
+        "organism": {"scientificName": "Stand-in organism"},
+        "features": [
+            {"type": "Active site", "location": {"start": {"value": 10}, "end": {"value": 10}}, "description": ""},
+        ],
+    }
+
+
+def make_handler(replay: Optional[Path], latency: float, fail_every: int):
+    lock = threading.Lock()
+    counter = {"requests": 0}
+
+    class StandIn(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            with lock:
+                counter["requests"] += 1
+                n = counter["requests"]
+            time.sleep(latency)
+            accession = self.path.split("?")[0].rsplit("/", 1)[-1]
+            if fail_every and n % fail_every == 0:
+                return self.reply(503, {"messages": ["stand-in failure"]})
+            if replay is not None:
+                path = replay / f"{accession}.json"
+                if not path.exists():
+                    return self.reply(404, {"messages": ["not found"]})
+                return self.reply(200, json.loads(path.read_text()))
+            return self.reply(200, synthetic_entry(accession))
+
+        def reply(self, status: int, body: dict):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    return StandIn, counter
+
+
+def record(accessions, directory: Path):
+    directory.mkdir(parents=True, exist_ok=True)
+    for accession in accessions:
+        entry = uniprot.fetch_uniprot_by_accession(accession)
+        if entry is not None:
+            (directory / f"{accession}.json").write_text(json.dumps(entry))
+    print(f"recorded {len(list(directory.glob('*.json')))} entries in {directory}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--ec", help="EC number (default: the one with the most accessions)")
+    parser.add_argument("--latency", type=float, default=80, help="stand-in latency per request, ms")
+    parser.add_argument("--fail-every", type=int, default=0, help="answer every Nth request with 503")
+    parser.add_argument("--replay", type=Path, help="directory of recorded <accession>.json")
+    parser.add_argument("--record", type=Path, help="fetch the EC's entries from UniProt into this directory")
+    args = parser.parse_args()
+
+    gene_mapper = MetabolicViewer().gene_mapper
+    ec = args.ec
+    if ec is None:
+        counts = {}
+        for key, accessions in gene_mapper.items():
+            key_ec = key.split(":")[0]
+            counts[key_ec] = counts.get(key_ec, 0) + len(accessions)
+        ec = max(counts, key=counts.get)
+    listed = uniprot.list_accessions_for_ec(ec, gene_mapper, search_fallback=False)
+    accessions = [item["accession"] for item in listed]
+
+    if args.record:
+        record(accessions, args.record)
+        return
+
+    handler, counter = make_handler(args.replay, args.latency / 1000, args.fail_every)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    uniprot.UNIPROT_BASE_URL = f"http://127.0.0.1:{server.server_address[1]}"
+    uniprot.UNIPROT_BACKOFF = 0.05
+    uniprot.set_uniprot_cache(None)
+
+    t0 = time.perf_counter()
+    sequential = []
+    for item in listed:
+        entry_data = uniprot.fetch_uniprot_by_accession(item["accession"])
+        if entry_data is not None:
+            sequential.append(uniprot.parse_uniprot_entry(entry_data, organism_code=item["organism_code"]))
+    t1 = time.perf_counter()
+    concurrent = asyncio.run(uniprot.get_uniprot_entries_from_mapper(ec, gene_mapper))
+    t2 = time.perf_counter()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        uniprot.set_uniprot_cache(UniProtCache(Path(tmp) / "uniprot_cache.sqlite"))
+        cached_runs = []
+        for _ in ("cold", "warm"):
+            served = counter["requests"]
+            t3 = time.perf_counter()
+            entries = asyncio.run(uniprot.get_uniprot_entries_from_mapper(ec, gene_mapper))
+            cached_runs.append((time.perf_counter() - t3, counter["requests"] - served, entries == concurrent))
+    server.shutdown()
+
+    same = sequential == concurrent and all(ok for _, _, ok in cached_runs)
+    print(f"EC:             {ec} ({len(accessions)} accessions, {len(concurrent)} entries)")
+    print(f"stand-in:       {args.latency:.0f} ms latency, {counter['requests']} requests served")
+    print(f"sequential:     {(t1 - t0) * 1000:10.1f} ms")
+    print(f"concurrent:     {(t2 - t1) * 1000:10.1f} ms  ({uniprot.UNIPROT_CONCURRENCY} in flight)")
+    print(f"speedup:        {(t1 - t0) / max(t2 - t1, 1e-9):10.1f}x")
+    for label, (seconds, requests_made, _) in zip(("cold", "warm"), cached_runs):
+        print(f"cache {label}:     {seconds * 1000:10.1f} ms  ({requests_made} requests)")
+    print(f"same entries, same order: {same}")
+    sys.exit(0 if same else 1)
+
+
+if __name__ == "__main__":
+    main()
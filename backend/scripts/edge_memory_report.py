@@ -0,0 +1,94 @@
+"""
+Memory report: per-edge HyperEdge dataclasses vs. the columnar EdgeTable.
+
+Builds the hypergraph from simulations.csv twice — once with the previous
+layout (``scripts.legacy_graph``: one frozen dataclass per edge,
+dict-of-lists adjacency) and once with ``HyperGraph.from_dataframe`` — and
+reports the heap each keeps alive, as measured by ``tracemalloc`` (NumPy
+buffers included), also once every edge record has been decoded.
+
+It then times ``collect_flat_reactions`` for the --largest N
+highest-generation targets on both layouts and checks the rows match.
+
+Run from the backend/ directory::
+
+    python -m scripts.edge_memory_report [--largest 30]
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+import pandas as pd
+
+from app import DATA_DIR
+from app.core.hypergraph import HyperGraph, collect_flat_reactions
+from scripts.legacy_graph import LegacyHyperGraph, legacy_collect_flat_reactions
+
+
+def retained_bytes(build, df: pd.DataFrame):
+    """Bytes still allocated after *build(df)* returns, while its result is alive."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = build(df)
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return size, result
+
+
+def decode_records(graph: HyperGraph) -> None:
+    for index in range(graph.num_edges):
+        graph.edge_table.record(index)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--largest", type=int, default=30, help="targets for the traversal timing")
+    args = parser.parse_args()
+
+    df = pd.read_csv(DATA_DIR / "simulations.csv")
+    generation_df = pd.read_csv(DATA_DIR / "generations.csv").set_index("compound_id")
+    gen_mapper = generation_df["modified_generation"].dropna().to_dict()
+    cofactors = set(pd.read_csv(DATA_DIR / "cofactors.csv")["Compound ID"])
+
+    legacy_bytes, legacy = retained_bytes(LegacyHyperGraph.from_dataframe, df)
+    new_bytes, graph = retained_bytes(HyperGraph.from_dataframe, df)
+    record_bytes, _ = retained_bytes(lambda _: decode_records(graph), df)
+    table = graph.edge_table
+    n_edges = len(table)
+
+    print(f"simulations.csv: {len(df)} rows, {n_edges} edges, {graph.num_compounds} compounds\n")
+    print(f"{'layout':<34}{'total MB':>10}{'bytes/edge':>12}")
+    print(f"{'dataclass + dict-of-lists':<34}{legacy_bytes / 1e6:>10.2f}{legacy_bytes / len(legacy.edges):>12.0f}")
+    print(f"{'EdgeTable + CSR':<34}{new_bytes / 1e6:>10.2f}{new_bytes / n_edges:>12.0f}")
+    all_bytes = new_bytes + record_bytes
+    print(f"{'  + every record decoded':<34}{all_bytes / 1e6:>10.2f}{all_bytes / n_edges:>12.0f}")
+    print(f"\nreduction: {legacy_bytes / max(new_bytes, 1):.1f}x")
+    print(f"EdgeTable NumPy columns: {table.nbytes() / 1e6:.2f} MB")
+    print(
+        "categories: "
+        f"{len(table.reactions)} reactions, {len(table.reaction_ids)} reaction IDs, "
+        f"{len(table.sources)} sources, {len(table.coenzymes)} coenzymes, "
+        f"{len(table.directions)} directions, {len(table.ec_pool)} distinct EC lists"
+    )
+
+    # Traversal on a fresh table, so first-touch decoding is included
+    graph = HyperGraph.from_dataframe(df)
+    targets = sorted(gen_mapper, key=gen_mapper.get, reverse=True)[:args.largest]
+    t0 = time.perf_counter()
+    expected = [legacy_collect_flat_reactions(legacy, t, gen_mapper, cofactors) for t in targets]
+    t1 = time.perf_counter()
+    rows = [collect_flat_reactions(graph, t, gen_mapper, cofactors) for t in targets]
+    t2 = time.perf_counter()
+    print(f"\ncollect_flat_reactions, {len(targets)} largest targets:")
+    print(f"  dataclass edges: {t1 - t0:8.2f}s")
+    print(f"  EdgeTable:       {t2 - t1:8.2f}s  ({(t1 - t0) / max(t2 - t1, 1e-9):.2f}x)")
+    print(f"  identical rows:  {rows == expected}")
+
+
+if __name__ == "__main__":
+    main()
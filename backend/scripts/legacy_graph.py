@@ -0,0 +1,163 @@
+"""
+The hypergraph as it was before the columnar EdgeTable, kept as a reference
+for the benchmarks: one frozen dataclass per edge, built row by row, with
+dict-of-lists adjacency, and the flat backtrace collection that ran on it.
+
+Benchmarks time the current engines against this layout, not against the
+current ``HyperGraph``, so a regression in edge access shows up in them.
+"""
+
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, List, Set, Tuple
+
+import pandas as pd
+
+COMPOUND_RE = re.compile(r"[CZ]\d{5}")
+
+
+@dataclass(frozen=True)
+class LegacyHyperEdge:
+    id: str
+    reaction: str
+    reaction_id: str
+    reactants: FrozenSet[str]
+    products: FrozenSet[str]
+    reactant_gen: float
+    product_gen: float
+    generation: float
+    ec_list: List[str]
+    equation: str
+    source: str
+    coenzyme: str
+    direction: str
+
+
+class LegacyHyperGraph:
+    """``edges`` / ``produced_by`` / ``consumed_by`` / ``all_compounds``, as before."""
+
+    def __init__(self):
+        self.edges: Dict[str, LegacyHyperEdge] = {}
+        self.produced_by: Dict[str, List[LegacyHyperEdge]] = defaultdict(list)
+        self.consumed_by: Dict[str, List[LegacyHyperEdge]] = defaultdict(list)
+        self.all_compounds: Set[str] = set()
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> "LegacyHyperGraph":
+        """The row-by-row build the EdgeTable replaced."""
+        graph = cls()
+        for idx, row in df.iterrows():
+            reactant_set = frozenset(COMPOUND_RE.findall(str(row.get("reactants", ""))))
+            product_set = frozenset(COMPOUND_RE.findall(str(row.get("products", ""))))
+            if not reactant_set and not product_set:
+                continue
+
+            ec_raw = row.get("ec_list", "")
+            if pd.isna(ec_raw) or ec_raw == "":
+                ec_list = []
+            else:
+                ec_list = [e.strip() for e in str(ec_raw).split(",") if e.strip()]
+
+            reaction_name = str(row.get("reaction", f"R_{idx}"))
+            direction = str(row.get("direction", "forward"))
+            coenzyme = row.get("coenzyme", "")
+            source = row.get("source", "")
+            edge = LegacyHyperEdge(
+                id=f"{reaction_name}_{direction}_{idx}",
+                reaction=reaction_name,
+                reaction_id=str(row.get("reaction_id", "")),
+                reactants=reactant_set,
+                products=product_set,
+                reactant_gen=float(row.get("reactant_gen", 0) or 0),
+                product_gen=float(row.get("product_gen", 0) or 0),
+                generation=float(row.get("generation", 0) or 0),
+                ec_list=ec_list,
+                equation=str(row.get("equation", "")),
+                source="" if pd.isna(source) else source,
+                coenzyme="" if pd.isna(coenzyme) else coenzyme,
+                direction=direction,
+            )
+            graph.edges[edge.id] = edge
+            for compound in product_set:
+                graph.produced_by[compound].append(edge)
+                graph.all_compounds.add(compound)
+            for compound in reactant_set:
+                graph.consumed_by[compound].append(edge)
+                graph.all_compounds.add(compound)
+        return graph
+
+
+def legacy_collect_flat_reactions(
+    graph: LegacyHyperGraph,
+    target: str,
+    gen_mapper: Dict[str, float],
+    cofactors: Set[str],
+    include_lateral: bool = True,
+) -> List[Dict[str, Any]]:
+    """Reference: ``collect_flat_reactions`` on dataclass edges."""
+    target_gen = gen_mapper.get(target, float("inf"))
+    queue: Set[str] = {target}
+    processed: Set[str] = set(cofactors)
+    discovered_compounds: Set[str] = set()
+    seen_rxns: Dict[str, Tuple[LegacyHyperEdge, str]] = {}
+
+    while queue:
+        compound = queue.pop()
+        if compound in processed:
+            continue
+        processed.add(compound)
+        discovered_compounds.add(compound)
+
+        gen = gen_mapper.get(compound, -1)
+        if gen == 0 or gen == -1:
+            continue
+        if gen > target_gen and compound != target:
+            continue
+
+        best: Dict[str, LegacyHyperEdge] = {}
+        for edge in graph.produced_by.get(compound, []):
+            prev = best.get(edge.reaction)
+            if prev is None or edge.product_gen < prev.product_gen:
+                best[edge.reaction] = edge
+        if best:
+            min_pgen = min(e.product_gen for e in best.values())
+            best = {k: e for k, e in best.items() if e.product_gen <= min_pgen}
+
+        for rxn_name, edge in best.items():
+            if rxn_name not in seen_rxns:
+                seen_rxns[rxn_name] = (edge, compound)
+            for reactant in edge.reactants:
+                if reactant not in processed:
+                    queue.add(reactant)
+            for product in edge.products:
+                if product not in processed and product not in cofactors:
+                    queue.add(product)
+
+    if include_lateral:
+        for compound in discovered_compounds | {target}:
+            compound_gen = gen_mapper.get(compound, -1)
+            if compound_gen == -1:
+                continue
+            for edge in graph.consumed_by.get(compound, []):
+                if edge.reaction not in seen_rxns:
+                    if (edge.reactant_gen == compound_gen and
+                            edge.product_gen == edge.reactant_gen and
+                            edge.product_gen <= target_gen):
+                        seen_rxns[edge.reaction] = (edge, compound)
+
+    results: List[Dict[str, Any]] = []
+    for rxn_name, (edge, tgt_cpd) in seen_rxns.items():
+        results.append({
+            "reaction": rxn_name,
+            "source": edge.source or "",
+            "coenzyme": edge.coenzyme or "",
+            "equation": edge.equation or "",
+            "transition": f"{int(edge.reactant_gen)} -> {int(edge.product_gen)}",
+            "target": tgt_cpd,
+            "ec_list": edge.ec_list if edge.ec_list else [],
+            "reactant_gen": edge.reactant_gen,
+            "product_gen": edge.product_gen,
+        })
+    results.sort(key=lambda r: (r["product_gen"], r["reactant_gen"]))
+    return results
@@ -0,0 +1,25 @@
+"""Fixtures: the hand-built graphs of ``graphs``, expanded from their target."""
+
+import pytest
+
+from app.core.hypergraph import CompoundNode
+
+from graphs import (
+    CYCLIC_GENERATIONS, CYCLIC_ROWS, DIAMOND_GENERATIONS, DIAMOND_ROWS,
+    SHARED_GENERATIONS, SHARED_ROWS, expand,
+)
+
+
+@pytest.fixture
+def diamond() -> CompoundNode:
+    return expand(DIAMOND_ROWS, DIAMOND_GENERATIONS, "C00030")
+
+
+@pytest.fixture
+def shared() -> CompoundNode:
+    return expand(SHARED_ROWS, SHARED_GENERATIONS, "C00020")
+
+
+@pytest.fixture
+def cyclic() -> CompoundNode:
+    return expand(CYCLIC_ROWS, CYCLIC_GENERATIONS, "C00020")
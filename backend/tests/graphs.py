@@ -0,0 +1,109 @@
+"""
+Hand-built simulations tables and hypergraphs for the tests.
+
+``make_frame`` turns ``(reaction, reactants, products, generation, ecs)``
+rows into a frame shaped like simulations.csv, and ``make_graph`` loads it
+with ``HyperGraph.from_dataframe`` the way the app does, so the solution
+tests see the same DAGs ``backward_reachability`` builds in production.
+"""
+
+from typing import Dict, List, Sequence, Tuple
+
+import pandas as pd
+
+from app.core.hypergraph import CompoundNode, HyperGraph, backward_reachability
+
+Row = Tuple[str, Sequence[str], Sequence[str], float, Sequence[str]]
+
+
+def make_frame(rows: List[Row], generations: Dict[str, float]) -> pd.DataFrame:
+    """A simulations.csv-shaped frame; compounds may carry a glued coefficient ("2C00221")."""
+    records = []
+    for reaction, reactants, products, generation, ecs in rows:
+        records.append({
+            "reaction": reaction,
+            "direction": "forward",
+            "source": "TEST",
+            "coenzyme": "",
+            "equation": f"{' + '.join(reactants)} => {' + '.join(products)}",
+            "reactants": " + ".join(reactants),
+            "products": " + ".join(products),
+            "reactant_gen": max(generations.get(c.lstrip("0123456789"), 0) for c in reactants),
+            "product_gen": generation,
+            "generation": generation,
+            "reaction_id": reaction.split("_")[0],
+            "ec_list": ",".join(ecs),
+        })
+    return pd.DataFrame(records)
+
+
+def make_graph(rows: List[Row], generations: Dict[str, float]) -> HyperGraph:
+    return HyperGraph.from_dataframe(make_frame(rows, generations))
+
+
+def expand(rows: List[Row], generations: Dict[str, float], target: str, **kwargs) -> CompoundNode:
+    root, _ = backward_reachability(make_graph(rows, generations), target, generations, **kwargs)
+    return root
+
+
+# A (C00001) and B (C00002) are gen-0 leaves; P (C00030) is the target.
+#
+#   X <- A (R_X1) | B (R_X2)        Y <- A (R_Y1)        Z <- B (R_Z1)
+#   T <- X + Y (R_T1) | Z (R_T2)    P <- T (R_P)
+DIAMOND_GENERATIONS = {
+    "C00001": 0, "C00002": 0, "C00010": 1, "C00011": 1, "C00012": 1, "C00020": 2, "C00030": 3,
+}
+DIAMOND_ROWS: List[Row] = [
+    ("R_X1", ["C00001"], ["C00010"], 1, ["1.1.1.1"]),
+    ("R_X2", ["C00002"], ["C00010"], 1, ["1.1.1.2"]),
+    ("R_Y1", ["C00001"], ["C00011"], 1, ["2.2.2.2"]),
+    ("R_Z1", ["C00002"], ["C00012"], 1, ["2.2.2.3"]),
+    ("R_T1", ["C00010", "C00011"], ["C00020"], 2, ["3.3.3.3"]),
+    ("R_T2", ["C00012"], ["C00020"], 2, ["3.3.3.4"]),
+    ("R_P", ["C00020"], ["C00030"], 3, ["4.4.4.4", "4.4.4.5"]),
+]
+DIAMOND_SOLUTIONS = [
+    {"R_P", "R_T2", "R_Z1"},
+    {"R_P", "R_T1", "R_X1", "R_Y1"},
+    {"R_P", "R_T1", "R_X2", "R_Y1"},
+]
+
+# One reaction (R_Q) makes both reactants of T, so it occurs twice in the
+# DAG: {T1, Q, X1} is a derivation but not minimal, as {T1, Q} is one too.
+#
+#   A -> X + Y (R_Q)    X <- A (R_X1)    T <- X + Y (R_T1)
+SHARED_GENERATIONS = {"C00001": 0, "C00010": 1, "C00011": 1, "C00020": 2}
+SHARED_ROWS: List[Row] = [
+    ("R_Q", ["C00001"], ["C00010", "C00011"], 1, ["5.5.5.5"]),
+    ("R_X1", ["C00001"], ["C00010"], 1, ["1.1.1.1"]),
+    ("R_T1", ["C00010", "C00011"], ["C00020"], 2, ["3.3.3.3"]),
+]
+
+# X and Y make each other. Whichever of them T1 expands first keeps both
+# producers; the other loses the one that would close the cycle (R_X3 or
+# R_Y2, by frozenset order) and is a shared stub under T1.
+#
+#   X <- A (R_X1) | Y (R_X3)    Y <- A (R_Y1) | X (R_Y2)    T <- X + Y (R_T1)
+CYCLIC_GENERATIONS = {"C00001": 0, "C00010": 1, "C00011": 1, "C00020": 2}
+CYCLIC_ROWS: List[Row] = [
+    ("R_X1", ["C00001"], ["C00010"], 1, []),
+    ("R_X3", ["C00011"], ["C00010"], 1, []),
+    ("R_Y1", ["C00001"], ["C00011"], 1, []),
+    ("R_Y2", ["C00010"], ["C00011"], 1, []),
+    ("R_T1", ["C00010", "C00011"], ["C00020"], 2, []),
+]
+
+
+def reaction_sets(root: CompoundNode) -> List[set]:
+    """Every derivation of *root* as a set of reaction names, by brute force."""
+    def derivations(node):
+        if node.is_leaf or node.is_shared or not node.producers:
+            return [frozenset()]
+        found = []
+        for rxn in node.producers:
+            partial = [frozenset({rxn.reaction})]
+            for child in rxn.reactants:
+                partial = [p | c for p in partial for c in derivations(child)]
+            found.extend(partial)
+        return found
+    return [set(d) for d in derivations(root)]
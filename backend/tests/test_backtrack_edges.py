@@ -0,0 +1,86 @@
+import itertools
+
+import pandas as pd
+import pytest
+
+from app.core.hypergraph import HyperGraph, backtrack_edges
+from app.utils.helpers import create_backtrack_df
+
+from graphs import make_frame
+
+# A (C00001), B (C00002) gen 0; M (C00221) 1, N (C00222) 2, T (C00230) 3.
+# N is also made at a later generation (R_N3), which the first-occurrence
+# rule drops; S (C00210) is a side branch into T.
+GENERATIONS = {
+    "C00001": 0, "C00002": 0, "C00210": 1, "C00221": 1, "C00222": 2, "C00230": 3,
+}
+ROWS = [
+    ("R_M1", ["C00001"], ["C00221"], 1, ["1.1.1.1"]),
+    ("R_N1", ["C00221", "C00002"], ["C00222"], 2, ["2.2.2.2"]),
+    ("R_N2", ["C00221"], ["C00222", "C00001"], 2, []),
+    ("R_N3", ["C00001"], ["C00222"], 3, ["2.2.2.3"]),
+    ("R_S1", ["C00001"], ["C00210"], 1, []),
+    ("R_T1", ["C00222"], ["C00230"], 3, ["3.3.3.3"]),
+    ("R_T2", ["C00210", "C00002"], ["C00230"], 3, []),
+]
+# M written with a glued coefficient, as in "C00002 => 2C00221"
+GLUED_ROW = ("R_M2", ["C00002"], ["2C00221"], 1, [])
+
+QUERIES = [
+    (target, source)
+    for target, source in itertools.product(["C00221", "C00222", "C00230", "C00210"], ["", "C00210", "C00221"])
+    if target != source
+]
+
+
+def reference(df, target, source, cofactors=()):
+    frame = create_backtrack_df(df, target, GENERATIONS, list(cofactors), source)
+    return [] if frame.empty else list(zip(frame["reaction"], frame["target"]))
+
+
+def indexed(df, target, source, cofactors=()):
+    graph = HyperGraph.from_dataframe(df)
+    rows = backtrack_edges(graph, target, GENERATIONS, list(cofactors), source)
+    if not rows:
+        return []
+    table = graph.edge_table
+    # The reference's final sort, applied to the same pre-sort order
+    frame = pd.DataFrame({
+        "reaction": [table.record(edge).reaction for edge, _ in rows],
+        "target": [compound for _, compound in rows],
+        "generation": [table.generation[edge] for edge, _ in rows],
+    }).sort_values("generation").reset_index(drop=True)
+    return list(zip(frame["reaction"], frame["target"]))
+
+
+@pytest.mark.parametrize("target, source", QUERIES)
+def test_matches_create_backtrack_df(target, source):
+    df = make_frame(ROWS, GENERATIONS)
+    assert indexed(df, target, source) == reference(df, target, source)
+
+
+@pytest.mark.parametrize("cofactors", [["C00002"], ["C00221"]])
+def test_matches_create_backtrack_df_with_cofactors(cofactors):
+    df = make_frame(ROWS, GENERATIONS)
+    for target, source in QUERIES:
+        assert indexed(df, target, source, cofactors) == reference(df, target, source, cofactors)
+
+
+def test_later_generation_producer_is_dropped():
+    df = make_frame(ROWS, GENERATIONS)
+    reactions = [reaction for reaction, _ in indexed(df, "C00222", "")]
+    assert "R_N3" not in reactions
+    assert {"R_N1", "R_N2", "R_M1"} <= set(reactions)
+
+
+def test_glued_coefficient_counts_as_product():
+    # create_backtrack_df only finds IDs delimited by "+" or whitespace, so
+    # it misses "2C00221"; backtrack_edges reads the parsed products, which
+    # include it. Spelled "2 C00221", the reference finds it too.
+    df = make_frame(ROWS + [GLUED_ROW], GENERATIONS)
+    spaced = df.assign(products=df["products"].str.replace("2C00221", "2 C00221"))
+
+    for target, source in QUERIES:
+        assert indexed(df, target, source) == reference(spaced, target, source)
+    assert ("R_M2", "C00221") in indexed(df, "C00222", "")
+    assert ("R_M2", "C00221") not in reference(df, "C00222", "")
@@ -0,0 +1,95 @@
+from app.core.hypergraph import count_solutions
+
+from graphs import expand, reaction_sets
+
+
+def test_exact_count_matches_enumeration(diamond):
+    assert count_solutions(diamond) == (3, True)
+    assert len(reaction_sets(diamond)) == 3
+
+
+def test_cyclic_graph(cyclic):
+    count, exact = count_solutions(cyclic)
+    assert (count, exact) == (2, True)
+    assert count == len(reaction_sets(cyclic))
+
+
+def test_reaction_shared_between_branches_is_an_upper_bound(shared):
+    # Two derivations, {T1, Q} and {T1, Q, X1}: distinct here, but R_Q occurs
+    # twice in the DAG so distinct derivations may repeat a reaction set
+    count, exact = count_solutions(shared)
+    assert count == len(reaction_sets(shared)) == 2
+    assert exact is False
+
+
+def fan(width, producers):
+    """T (C99999) <- X0 + ... + X<width-1> (RT); *producers(i, x)* makes each X."""
+    generations = {"C00001": 0, "C00002": 0, "C99999": 2}
+    rows = []
+    reactants = []
+    for i in range(width):
+        compound = f"C{10000 + i:05d}"
+        generations[compound] = 1
+        reactants.append(compound)
+        for row in producers(i, compound):
+            rows.append(row)
+            for product in row[2]:
+                generations.setdefault(product, 1)
+    rows.append(("RT_fwd", reactants, ["C99999"], 2, []))
+    return rows, generations
+
+
+def either_leaf(i, compound):
+    # Made from A or from B
+    return [(f"RA{i}_fwd", ["C00001"], [compound], 1, []), (f"RB{i}_fwd", ["C00002"], [compound], 1, [])]
+
+
+def cyclic_pair(i, compound):
+    # X and its partner Y make each other, as in the cyclic fixture; T's
+    # reactants are the X's, so each pair is reached through X
+    partner = f"C{20000 + i:05d}"
+    return [
+        (f"RX{i}_fwd", ["C00001"], [compound], 1, []),
+        (f"RXY{i}_fwd", [partner], [compound], 1, []),
+        (f"RY{i}_fwd", ["C00001"], [partner], 1, []),
+        (f"RYX{i}_fwd", [compound], [partner], 1, []),
+    ]
+
+
+def test_big_int_count_without_enumerating():
+    # 70 reactants, each made from A or B: 2**70 solutions
+    count, exact = count_solutions(expand(*fan(70, either_leaf), "C99999"))
+    assert count == 2 ** 70
+    assert count > 2 ** 64
+    assert exact is True
+
+
+def test_big_int_count_on_cyclic_graph():
+    # Each X has two derivations whichever edge of its cycle is cut
+    for width in (2, 3, 4):
+        root = expand(*fan(width, cyclic_pair), "C99999")
+        assert count_solutions(root) == (len(reaction_sets(root)), True)
+
+    assert count_solutions(expand(*fan(70, cyclic_pair), "C99999")) == (2 ** 70, True)
+
+
+def test_big_int_count_on_shared_graph():
+    # RQ makes both X0 and X1, so it occurs twice in the DAG: X0 and X1
+    # have three producers each, the others two
+    def with_shared(width):
+        rows, generations = fan(width, either_leaf)
+        return rows + [("RQ_fwd", ["C00001"], ["C10000", "C10001"], 1, [])], generations
+
+    for width in (2, 3, 4):
+        root = expand(*with_shared(width), "C99999")
+        assert count_solutions(root) == (len(reaction_sets(root)), False)
+
+    count, exact = count_solutions(expand(*with_shared(70), "C99999"))
+    assert count == 9 * 2 ** 68
+    assert exact is False
+
+
+def test_leaf_target_has_one_empty_solution():
+    root = expand([("R_X1", ["C00001"], ["C00010"], 1, [])], {"C00001": 0, "C00010": 1}, "C00001")
+    assert root.is_leaf
+    assert count_solutions(root) == (1, True)
@@ -0,0 +1,48 @@
+import functools
+
+from app.core.hypergraph import essential_reactions
+
+from graphs import DIAMOND_ROWS, expand, reaction_sets
+
+
+def intersection(root):
+    return sorted(functools.reduce(set.intersection, reaction_sets(root)))
+
+
+def test_only_the_last_step_is_essential(diamond):
+    reactions, ecs = essential_reactions(diamond)
+    assert reactions == ["R_P"] == intersection(diamond)
+    assert ecs == ["4.4.4.4", "4.4.4.5"]
+
+
+def test_equals_intersection_of_all_solutions(diamond, shared, cyclic):
+    for root in (diamond, shared, cyclic):
+        assert essential_reactions(root)[0] == intersection(root)
+
+
+def test_single_route_is_fully_essential():
+    # Without B and Z the only route to P runs through X1, Y1 and T1
+    rows = [row for row in DIAMOND_ROWS if not {"C00002", "C00012"} & set(row[1])]
+    generations = {"C00001": 0, "C00010": 1, "C00011": 1, "C00020": 2, "C00030": 3}
+    root = expand(rows, generations, "C00030")
+
+    reactions, ecs = essential_reactions(root)
+    assert reactions == ["R_P", "R_T1", "R_X1", "R_Y1"] == intersection(root)
+    assert ecs == ["1.1.1.1", "2.2.2.2", "3.3.3.3", "4.4.4.4", "4.4.4.5"]
+
+
+def test_ec_shared_by_alternatives_is_a_bottleneck():
+    # Two reactions make X, both catalysed by 1.1.1.1
+    generations = {"C00001": 0, "C00002": 0, "C00010": 1}
+    rows = [
+        ("R_X1", ["C00001"], ["C00010"], 1, ["1.1.1.1", "9.9.9.9"]),
+        ("R_X2", ["C00002"], ["C00010"], 1, ["1.1.1.1"]),
+    ]
+    reactions, ecs = essential_reactions(expand(rows, generations, "C00010"))
+    assert reactions == []
+    assert ecs == ["1.1.1.1"]
+
+
+def test_leaf_has_nothing_essential():
+    root = expand([("R_X1", ["C00001"], ["C00010"], 1, ["1.1.1.1"])], {"C00001": 0, "C00010": 1}, "C00001")
+    assert essential_reactions(root) == ([], [])
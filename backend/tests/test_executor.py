@@ -0,0 +1,121 @@
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+from app.core.executor import ClientDisconnected, ViewerExecutor
+from app.core.hypergraph import backward_reachability, top_solutions
+from app.utils.cancellation import CallCancelled, cancel_scope, check_cancelled
+
+from graphs import DIAMOND_GENERATIONS, DIAMOND_ROWS, make_graph
+
+
+class StubViewer:
+    """Viewer methods that spin until cancelled, sleep, or echo."""
+
+    def __init__(self):
+        self.stopped = threading.Event()
+
+    async def spin(self, seconds):
+        # Like the AND-OR loops: check the flag while working
+        deadline = time.monotonic() + seconds
+        try:
+            while time.monotonic() < deadline:
+                check_cancelled()
+                time.sleep(0.005)
+        except CallCancelled:
+            self.stopped.set()
+            raise
+        return "finished"
+
+    async def block(self, seconds):
+        # No check point: only a process worker can be stopped
+        time.sleep(seconds)
+        return os.getpid()
+
+    async def echo(self, value):
+        return value
+
+    def spin_items(self, seconds):
+        yield "first"
+        yield asyncio.run(self.spin(seconds))
+
+
+def test_check_cancelled_outside_a_scope_is_a_noop():
+    check_cancelled()
+
+
+def test_expansion_and_ranking_stop_once_cancelled():
+    graph = make_graph(DIAMOND_ROWS, DIAMOND_GENERATIONS)
+    root, _ = backward_reachability(graph, "C00030", DIAMOND_GENERATIONS)
+    cancelled = threading.Event()
+    cancelled.set()
+    with cancel_scope(cancelled):
+        with pytest.raises(CallCancelled):
+            backward_reachability(graph, "C00030", DIAMOND_GENERATIONS)
+        with pytest.raises(CallCancelled):
+            top_solutions(root, 5)
+
+
+def test_thread_timeout_stops_the_running_call():
+    viewer = StubViewer()
+    executor = ViewerExecutor(viewer, kind="thread", max_workers=1, timeout=0.2)
+
+    async def scenario():
+        with pytest.raises(asyncio.TimeoutError):
+            await executor.run("spin", 30)
+        assert await asyncio.to_thread(viewer.stopped.wait, 2)
+        # The single worker thread is free again
+        return await executor.run("echo", 7)
+
+    try:
+        assert asyncio.run(scenario()) == 7
+    finally:
+        executor.shutdown()
+
+
+def test_thread_disconnect_stops_a_running_iteration():
+    viewer = StubViewer()
+    executor = ViewerExecutor(viewer, kind="thread", max_workers=1, timeout=None)
+    gone = asyncio.Event()
+
+    async def is_disconnected():
+        return gone.is_set()
+
+    async def scenario():
+        items = executor.iterate("spin_items", 30, is_disconnected=is_disconnected)
+        assert await items.__anext__() == "first"
+        # Once the next step is running, not while it is still queued
+        asyncio.get_running_loop().call_later(0.3, gone.set)
+        with pytest.raises(ClientDisconnected):
+            await items.__anext__()
+        assert await asyncio.to_thread(viewer.stopped.wait, 2)
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+
+
+def test_process_timeout_recycles_the_stuck_worker():
+    executor = ViewerExecutor(StubViewer(), kind="process", max_workers=2, timeout=None)
+
+    async def scenario():
+        executor.start()
+        stuck = asyncio.ensure_future(executor.run("block", 30, timeout=0.5))
+        # Held by the same pool when the stuck worker is killed: run again
+        other = asyncio.ensure_future(executor.run("block", 1.0))
+        with pytest.raises(asyncio.TimeoutError):
+            await stuck
+        assert isinstance(await other, int)
+        assert executor._generation == 1
+        return await executor.run("echo", 7)
+
+    t0 = time.monotonic()
+    try:
+        assert asyncio.run(scenario()) == 7
+    finally:
+        executor.shutdown()
+    assert time.monotonic() - t0 < 10
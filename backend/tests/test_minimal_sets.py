@@ -0,0 +1,59 @@
+import itertools
+import random
+
+from app.core.hypergraph import MinimalSetFilter, enumerate_solutions, minimal_sets
+
+
+def brute_force_minimal(masks):
+    distinct = list(dict.fromkeys(masks))
+    return [m for m in distinct if not any(o != m and o & m == o for o in distinct)]
+
+
+def test_filter_rejects_supersets_and_duplicates():
+    keep = MinimalSetFilter()
+    assert keep.offer(0b0110)
+    assert not keep.offer(0b0110)
+    assert not keep.offer(0b1110)
+    assert keep.offer(0b1001)
+    assert keep.dominated(0b1111)
+    assert not keep.dominated(0b0100)
+
+
+def test_filter_checks_only_earlier_sets():
+    keep = MinimalSetFilter()
+    assert keep.offer(0b111)
+    # A subset offered later is kept: ordering by size is the caller's job
+    assert keep.offer(0b001)
+
+
+def test_empty_set_dominates_everything():
+    keep = MinimalSetFilter()
+    assert keep.offer(0)
+    assert not keep.offer(0b1)
+    assert not keep.offer(0)
+
+
+def test_minimal_sets_keeps_original_order():
+    masks = [0b1110, 0b0010, 0b1000, 0b1010, 0b0010, 0b0101]
+    assert minimal_sets(masks) == [0b0010, 0b1000, 0b0101]
+
+
+def test_minimal_sets_matches_brute_force():
+    rng = random.Random(0)
+    for _ in range(200):
+        masks = [rng.getrandbits(8) for _ in range(rng.randint(0, 30))]
+        assert minimal_sets(masks) == brute_force_minimal(masks)
+
+
+def test_minimal_sets_on_big_bitsets():
+    high = [1 << 200, (1 << 200) | (1 << 3), (1 << 3) | 1]
+    assert minimal_sets(high) == [1 << 200, (1 << 3) | 1]
+
+
+def test_enumerate_solutions_are_minimal(shared, diamond):
+    assert [{r["reaction"] for r in s} for s in enumerate_solutions(shared)] == [{"R_Q", "R_T1"}]
+
+    solutions = [frozenset(r["reaction"] for r in s) for s in enumerate_solutions(diamond)]
+    assert len(solutions) == 3
+    for a, b in itertools.permutations(solutions, 2):
+        assert not a <= b
@@ -0,0 +1,149 @@
+import itertools
+
+import pytest
+
+from app.core.hypergraph import (
+    _RankedDerivations, count_solutions, enumerate_solutions, ranked_solutions, top_solutions,
+)
+
+from graphs import DIAMOND_SOLUTIONS, expand, reaction_sets
+
+
+def names(solution):
+    return {rxn["reaction"] for rxn in solution}
+
+
+def test_yields_every_solution_cheapest_first(diamond):
+    ranked = list(ranked_solutions(diamond))
+
+    assert [cost for cost, _ in ranked] == [3, 4, 4]
+    assert names(ranked[0][1]) == {"R_P", "R_T2", "R_Z1"}
+    assert sorted(map(sorted, (names(s) for _, s in ranked))) == sorted(map(sorted, DIAMOND_SOLUTIONS))
+
+
+def test_same_solutions_as_enumerate_solutions(diamond):
+    ranked = sorted(sorted(names(s)) for _, s in ranked_solutions(diamond))
+    enumerated = sorted(sorted(names(s)) for s in enumerate_solutions(diamond))
+    assert ranked == enumerated
+
+
+@pytest.mark.parametrize("cost, expected", [
+    # Every solution ends in R_P (generation 3): ties go to fewer reactions
+    ("max_generation", [(3, 3), (3, 4), (3, 4)]),
+    # R_P carries two EC numbers, every other reaction one
+    ("ecs", [(4, 3), (5, 4), (5, 4)]),
+])
+def test_other_costs(diamond, cost, expected):
+    ranked = list(ranked_solutions(diamond, cost=cost))
+    assert [(c, len(s)) for c, s in ranked] == expected
+
+
+def test_lazy_prefix(diamond):
+    first = next(ranked_solutions(diamond))
+    assert first[0] == 3
+    assert list(itertools.islice(ranked_solutions(diamond), 2))[0] == first
+
+
+def test_reactions_sorted_by_generation(diamond):
+    for _, solution in ranked_solutions(diamond):
+        generations = [rxn["generation"] for rxn in solution]
+        assert generations == sorted(generations)
+
+
+def test_top_solutions_are_subset_minimal(shared):
+    # The stream has both distinct sets; top_solutions keeps the minimal one
+    assert [names(s) for _, s in ranked_solutions(shared)] == [
+        {"R_Q", "R_T1"},
+        {"R_Q", "R_T1", "R_X1"},
+    ]
+    solutions, complete = top_solutions(shared, 10)
+    assert [names(s) for _, s in solutions] == [{"R_Q", "R_T1"}]
+    assert complete
+
+
+def test_top_solutions_of_diamond(diamond):
+    solutions, complete = top_solutions(diamond, 2)
+    assert [cost for cost, _ in solutions] == [3, 4]
+    assert complete
+
+
+def block_chain(levels):
+    """
+    N_j <- N_{j-1} + X_j + Y_j, where RQja and RQjb each make both X_j and
+    Y_j: four derivations per block, two of them the same reaction set.
+    """
+    generations = {"C00001": 0}
+    rows = []
+    previous = "C00001"
+    for j in range(levels):
+        n, x, y = f"C{10000 + j:05d}", f"C{20000 + j:05d}", f"C{30000 + j:05d}"
+        generations.update({n: j + 1, x: j + 1, y: j + 1})
+        rows += [
+            (f"RQ{j}a_fwd", ["C00001"], [x, y], j + 1, []),
+            (f"RQ{j}b_fwd", ["C00001"], [x, y], j + 1, []),
+            (f"RN{j}_fwd", [previous, x, y], [n], j + 1, []),
+        ]
+        previous = n
+    return expand(rows, generations, previous)
+
+
+def take(ranking, root, k):
+    found = []
+    while len(found) < k:
+        derivation = ranking.kth(root, len(found))
+        if derivation is None:
+            break
+        found.append(derivation)
+    return found
+
+
+def test_repeated_reaction_sets_are_not_carried_up():
+    root = block_chain(6)
+    assert count_solutions(root) == (4 ** 6, False)
+    every_set = {frozenset(s) for s in reaction_sets(root)}
+    assert len(every_set) == 3 ** 6
+
+    ranking = _RankedDerivations("reactions")
+    found = take(ranking, root, 50)
+    sets = [frozenset(r["reaction"] for r in ranking.reactions(mask)) for *_, mask in found]
+    assert len(set(sets)) == 50
+    assert set(sets) <= every_set
+    # Each block's duplicate is dropped where it arises, so the work grows
+    # with the sets taken, not with the 4**6 derivations
+    assert ranking.examined <= 3 * 50
+
+
+def test_deep_chain_stays_within_a_bound():
+    root = block_chain(10)  # 4**10 derivations
+    ranking = _RankedDerivations("reactions")
+    assert len(take(ranking, root, 50)) == 50
+    assert ranking.examined <= 4 * 50
+    assert not ranking.truncated
+
+
+def test_work_bound_reports_a_partial_result():
+    # RQa and RQb each make all 12 reactants of T: 2**12 derivations but
+    # only three reaction sets, the third ({T, RQb}) ranked last
+    width = 12
+    generations = {"C00001": 0, "C99999": 2}
+    reactants = [f"C{10000 + i:05d}" for i in range(width)]
+    generations.update({c: 1 for c in reactants})
+    rows = [
+        ("RQa_fwd", ["C00001"], reactants, 1, []),
+        ("RQb_fwd", ["C00001"], reactants, 1, []),
+        ("RT_fwd", reactants, ["C99999"], 2, []),
+    ]
+    root = expand(rows, generations, "C99999")
+
+    solutions, complete = top_solutions(root, 3, max_examined=500)
+    assert not complete
+    assert [names(s) for _, s in solutions] == [{"RT_fwd", "RQa_fwd"}]
+
+    solutions, complete = top_solutions(root, 3, max_examined=2 ** (width + 1))
+    assert complete
+    assert sorted(sorted(names(s)) for _, s in solutions) == [["RQa_fwd", "RT_fwd"], ["RQb_fwd", "RT_fwd"]]
+
+
+def test_unknown_cost_is_rejected(diamond):
+    with pytest.raises(ValueError):
+        next(ranked_solutions(diamond, cost="length"))
@@ -0,0 +1,99 @@
+import asyncio
+import base64
+import json
+
+import pytest
+
+from app.core.hypergraph import SolutionSpace
+from app.core.viewer import MetabolicViewer
+from app.utils.result_cache import ResultCache
+
+from graphs import DIAMOND_GENERATIONS, DIAMOND_ROWS, make_graph, reaction_sets
+
+
+def solution_names(space, index):
+    return {space.reactions[i]["reaction"] for i in space.solution(index)}
+
+
+def test_random_access_covers_every_solution(diamond):
+    space = SolutionSpace(diamond)
+    assert (space.total, space.exact) == (3, True)
+
+    found = [solution_names(space, i) for i in range(space.total)]
+    assert sorted(map(sorted, found)) == sorted(map(sorted, reaction_sets(diamond)))
+    assert space.page(1, 10) == [space.solution(1), space.solution(2)]
+    assert space.page(3, 10) == []
+    with pytest.raises(IndexError):
+        space.solution(3)
+
+
+@pytest.fixture
+def viewer():
+    # Only what get_solutions_page touches; skips loading the dataset
+    viewer = object.__new__(MetabolicViewer)
+    viewer.hypergraph = make_graph(DIAMOND_ROWS, DIAMOND_GENERATIONS)
+    viewer.gen_mapper = DIAMOND_GENERATIONS
+    viewer.cofactors = []
+    viewer.solution_cache = ResultCache()
+    viewer.dataset_version = "v1"
+    return viewer
+
+
+def pages(viewer, limit):
+    result = asyncio.run(viewer.get_solutions_page("C00030", limit=limit))
+    yield result
+    while result["next_cursor"]:
+        result = asyncio.run(viewer.get_solutions_page("C00030", cursor=result["next_cursor"], limit=limit))
+        yield result
+
+
+def test_cursor_round_trip(viewer):
+    first, *rest = pages(viewer, limit=2)
+    assert first["total"] == "3"
+    assert len(first["solutions"]) == 2
+    assert "reactions" in first
+    assert [page["offset"] for page in rest] == [2]
+    assert all("reactions" not in page for page in rest)
+
+    space = viewer.solution_cache.get(viewer._tree_cache_key("C00030", None, True))
+    streamed = [s for page in (first, *rest) for s in page["solutions"]]
+    assert streamed == [space.solution(i) for i in range(space.total)]
+
+
+def test_cursor_encodes_query_and_offset(viewer):
+    key = viewer._tree_cache_key("C00030", None, True)
+    cursor = viewer._encode_cursor(key, 40)
+    assert viewer._decode_cursor(key, cursor) == 40
+    assert "=" not in cursor
+
+
+def tamper(cursor, **changes):
+    payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    payload.update(changes)
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def test_tampered_cursor_is_rejected(viewer):
+    key = viewer._tree_cache_key("C00030", None, True)
+    cursor = viewer._encode_cursor(key, 2)
+
+    with pytest.raises(ValueError, match="does not belong"):
+        viewer._decode_cursor(key, tamper(cursor, q="0123456789ab"))
+    with pytest.raises(ValueError, match="Malformed"):
+        viewer._decode_cursor(key, tamper(cursor, o=-1))
+    with pytest.raises(ValueError, match="Malformed"):
+        viewer._decode_cursor(key, tamper(cursor, o="two"))
+    with pytest.raises(ValueError, match="Malformed"):
+        viewer._decode_cursor(key, cursor[:-3])
+    with pytest.raises(ValueError, match="Malformed"):
+        viewer._decode_cursor(key, "not a cursor")
+
+
+def test_cursor_is_bound_to_query_and_dataset(viewer):
+    cursor = asyncio.run(viewer.get_solutions_page("C00030", limit=1))["next_cursor"]
+
+    with pytest.raises(ValueError, match="does not belong"):
+        asyncio.run(viewer.get_solutions_page("C00030", sources=["C00001"], cursor=cursor, limit=1))
+    viewer.dataset_version = "v2"
+    with pytest.raises(ValueError, match="does not belong"):
+        asyncio.run(viewer.get_solutions_page("C00030", cursor=cursor, limit=1))
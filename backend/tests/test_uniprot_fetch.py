@@ -0,0 +1,133 @@
+import asyncio
+import threading
+import time
+
+import pytest
+import requests
+
+from app.core import uniprot
+
+# The fixture replaces time.sleep to record backoff delays
+_sleep = time.sleep
+
+
+class StubResponse:
+    def __init__(self, status_code, body=None, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self._body = body
+
+    def json(self):
+        return self._body
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} error", response=self)
+
+
+class StubSession:
+    """Answers GETs from a per-URL script of statuses; tracks concurrent calls."""
+
+    def __init__(self, script=None, delay=0.0):
+        self.script = {url: list(statuses) for url, statuses in (script or {}).items()}
+        self.delay = delay
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def get(self, url, params=None, timeout=None):
+        with self._lock:
+            self.calls.append(url)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            statuses = self.script.get(url)
+            status = statuses.pop(0) if statuses else 200
+        try:
+            _sleep(self.delay)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+        if isinstance(status, tuple):
+            status, headers = status
+        else:
+            headers = {}
+        accession = url.rsplit("/", 1)[-1]
+        return StubResponse(status, {"primaryAccession": accession}, headers)
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    delays = []
+    monkeypatch.setattr(uniprot, "UNIPROT_BASE_URL", "http://uniprot.test")
+    monkeypatch.setattr(uniprot, "UNIPROT_RETRIES", 3)
+    monkeypatch.setattr(uniprot, "UNIPROT_BACKOFF", 0.5)
+    monkeypatch.setattr(uniprot.time, "sleep", delays.append)
+    monkeypatch.setattr(uniprot, "_entry_cache", None)
+    monkeypatch.setattr(uniprot, "_entry_cache_ready", True)
+
+    def install(session):
+        monkeypatch.setattr(uniprot, "_session", session)
+        return session, delays
+
+    return install
+
+
+def test_retries_rate_limit_and_server_errors(stub):
+    url = "http://uniprot.test/uniprotkb/P12345"
+    session, delays = stub(StubSession({url: [429, 503, 200]}))
+
+    assert uniprot.download_uniprot_entry("P12345") == {"primaryAccession": "P12345"}
+    assert session.calls == [url] * 3
+    assert delays == [0.5, 1.0]
+
+
+def test_retry_after_header_is_honoured(stub):
+    url = "http://uniprot.test/uniprotkb/P12345"
+    session, delays = stub(StubSession({url: [(429, {"Retry-After": "7"}), 200]}))
+
+    assert uniprot.uniprot_get(url).status_code == 200
+    assert delays == [7.0]
+
+
+def test_gives_up_after_max_attempts(stub):
+    url = "http://uniprot.test/uniprotkb/P12345"
+    session, delays = stub(StubSession({url: [500] * 10}))
+
+    assert uniprot.uniprot_get(url).status_code == 500
+    assert len(session.calls) == uniprot.UNIPROT_RETRIES + 1
+    assert delays == [0.5, 1.0, 2.0]
+    assert uniprot.download_uniprot_entry("P12345") is None
+
+
+def test_client_errors_are_not_retried(stub):
+    url = "http://uniprot.test/uniprotkb/P12345"
+    session, delays = stub(StubSession({url: [404]}))
+
+    assert uniprot.download_uniprot_entry("P12345") is None
+    assert session.calls == [url]
+    assert delays == []
+
+
+def test_connection_errors_are_retried_then_raised(stub):
+    class Unreachable(StubSession):
+        def get(self, url, params=None, timeout=None):
+            self.calls.append(url)
+            raise requests.ConnectionError("refused")
+
+    session, delays = stub(Unreachable())
+
+    with pytest.raises(requests.ConnectionError):
+        uniprot.uniprot_get("http://uniprot.test/uniprotkb/P12345")
+    assert len(session.calls) == uniprot.UNIPROT_RETRIES + 1
+
+
+def test_concurrent_fetch_is_bounded_by_the_semaphore(stub):
+    session, _ = stub(StubSession(delay=0.02))
+    accessions = [f"P{i:05d}" for i in range(12)]
+
+    entries = asyncio.run(uniprot.fetch_uniprot_entries(accessions, concurrency=3))
+
+    assert [entry["primaryAccession"] for entry in entries] == accessions
+    assert len(session.calls) == len(accessions)
+    assert 1 < session.max_in_flight <= 3